@@ -1,17 +1,32 @@
-from flask import Flask, send_from_directory, jsonify, current_app
+from flask import Flask, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_cors import CORS
-from flask_migrate import Migrate
-from flask_mail import Mail
 import os
+from app.db_session import RoutingSession
 
-# Initialize extensions
-db = SQLAlchemy()
+# Initialize extensions (the session routes @replica_safe reads to the read replica).
+# Flask-Migrate and Flask-Mail are set up on first use: `flask db` (app/cli.py)
+# and the mail sender (app/utils/outbox.py) are the only things that need them
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 bcrypt = Bcrypt()
-migrate = Migrate()
 cors = CORS()
-mail = Mail()
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_environment_loaded = False
+
+
+def load_environment():
+    """Read .env into os.environ once per process, before config.py is imported"""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    from dotenv import load_dotenv
+
+    # An explicit path: find_dotenv() walks the call stack and every parent directory
+    load_dotenv(os.path.join(ROOT, '.env'))
+    _environment_loaded = True
 
 def create_app(config_name='default'):
     """Application factory"""
@@ -19,7 +34,7 @@ def create_app(config_name='default'):
                 static_folder='../frontend',  # ADD THIS
                 template_folder='../frontend')  # ADD THIS
 
-    print(f"🚀 Loading configuration: {config_name}")
+    load_environment()
 
     try:
         # Import and use the config from root directory
@@ -27,33 +42,28 @@ def create_app(config_name='default'):
 
         config_obj = config_dict[config_name]
         app.config.from_object(config_obj)
-        print("✅ Configuration loaded successfully from config.py")
-
-        # Debug: Print key configurations
-        print("📋 CONFIGURATION DETAILS:")
-        print(f"   DATABASE: {app.config.get('SQLALCHEMY_DATABASE_URI', 'Not set')}")
-        print(f"   MAIL_SERVER: {app.config.get('MAIL_SERVER', 'Not set')}")
-        print(f"   MAIL_USERNAME: {app.config.get('MAIL_USERNAME', 'Not set')}")
-        print(f"   MAIL_PASSWORD_SET: {bool(app.config.get('MAIL_PASSWORD', ''))}")
+        app.logger.debug(f"Configuration loaded: {config_name}")
 
     except ImportError as e:
-        print(f"❌ Cannot import config: {e}")
-        print("   Make sure config.py is in the same directory as run.py")
+        app.logger.error(f"Cannot import config: {e} (config.py must be in the same directory as run.py)")
         # Fallback configuration
         app.config['SECRET_KEY'] = 'fallback-secret-key'
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///marketplace.db'
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
         app.config['JWT_SECRET_KEY'] = 'fallback-jwt-secret'
     except KeyError as e:
-        print(f"❌ Config '{config_name}' not found: {e}")
+        app.logger.error(f"Config '{config_name}' not found: {e}")
     except Exception as e:
-        print(f"❌ Error loading configuration: {e}")
+        app.logger.error(f"Error loading configuration: {e}")
 
-    # Initialize extensions
+    # Initialize extensions (pool class first: db.init_app builds the engines)
+    from app.utils.db_pool import configure_engine_options, install_engine_events
+    configure_engine_options(app)
     db.init_app(app)
+    install_engine_events(app, db)
+    from app.utils.replica import init_replica_routing
+    init_replica_routing(app)
     bcrypt.init_app(app)
-    migrate.init_app(app, db)
-    mail.init_app(app)
 
     # Configure CORS
     cors.init_app(app,
@@ -69,35 +79,26 @@ def create_app(config_name='default'):
         }
     )
 
+    # gzip/br/zstd for API responses
+    from app.utils.compression import init_compression
+    init_compression(app)
+
+    # Frontend files are scanned into memory once; requests never probe the disk
+    from app.utils.assets import get_static_manifest
+
     @app.route('/')
     def serve_frontend():
-        return send_from_directory(app.template_folder, 'index.html')
+        return get_static_manifest().response('index.html')
 
     @app.route('/<path:path>')
     def serve_static(path):
-        # Try to serve static files first
-        if os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
-        # If not found, serve index.html (for frontend routing)
-        return send_from_directory(app.template_folder, 'index.html')
-
-    # Uploads route - PRODUCTION READY
-    @app.route('/uploads/<path:filename>')
-    def serve_uploads(filename):
-        """Serve uploaded files - PRODUCTION READY"""
-        try:
-            # Use absolute path for production
-            uploads_dir = os.path.join(app.root_path, 'uploads')
-            os.makedirs(uploads_dir, exist_ok=True)
-            os.makedirs(os.path.join(uploads_dir, 'products'), exist_ok=True)
-
-            file_path = os.path.join(uploads_dir, filename)
-            if os.path.exists(file_path):
-                return send_from_directory(os.path.dirname(file_path), os.path.basename(file_path))
-            return "File not found", 404
-        except Exception as e:
-            print(f"❌ Error serving upload: {str(e)}")
-            return "Error serving file", 500
+        # Known files come from the manifest, anything else is index.html (for frontend routing)
+        return get_static_manifest().response(path)
+
+    # Uploads directory is created once here, not on every image request
+    app.config.setdefault('UPLOADS_ROOT', os.path.join(app.root_path, 'uploads'))
+    if app.config.get('STORAGE_BACKEND', 'local') == 'local':
+        os.makedirs(os.path.join(app.config['UPLOADS_ROOT'], 'products'), exist_ok=True)
 
     # Import and register blueprints
     from app.routes.contact import contact_bp
@@ -106,6 +107,10 @@ def create_app(config_name='default'):
     from app.routes.categories import categories_bp
     from app.routes.notifications import notifications_bp
     from app.routes.admin import admin_bp
+    from app.routes.uploads import uploads_bp
+    from app.routes.storage import storage_bp
+    from app.routes.health import health_bp
+    from app.routes.saved_searches import saved_searches_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(products_bp, url_prefix='/api/products')
@@ -113,10 +118,17 @@ def create_app(config_name='default'):
     app.register_blueprint(notifications_bp, url_prefix='/api/notifications')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
     app.register_blueprint(contact_bp, url_prefix='/api/contact')
-
-    # Health check
-    @app.route('/api/health')
-    def health_check():
-        return jsonify({'status': 'healthy', 'service': 'Marketplace API'})
+    app.register_blueprint(uploads_bp, url_prefix='/uploads')
+    app.register_blueprint(storage_bp, url_prefix='/api/storage')
+    app.register_blueprint(health_bp, url_prefix='/api')
+    app.register_blueprint(saved_searches_bp, url_prefix='/api/saved-searches')
+
+    # Model hooks that keep site_stats and daily_stats current, and the maintenance commands
+    from app.utils import site_stats, rollups
+    from app.cli import register_commands
+    register_commands(app)
+
+    with app.app_context():
+        get_static_manifest()
 
     return app
@@ -0,0 +1,403 @@
+import asyncio
+import math
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import jwt
+from flask import current_app, jsonify, request
+from sqlalchemy import func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+from app import create_app, db
+from app.models.category import Category
+from app.models.notification import Notification
+from app.models.product import Product
+from app.models.user import User
+from app.utils.categories import get_cached_categories_async
+from app.utils.db_pool import install_transaction_timeouts, install_web_timeouts
+from app.utils.views import record_view
+
+# Request bodies bigger than this are spooled to disk before the sync app reads them
+SPOOL_MAX_SIZE = 1024 * 1024
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+
+def async_database_url(url):
+    """The app's database URL with the matching async driver (asyncpg / aiosqlite)"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend}; set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def async_engine_options(config, url):
+    """SQLALCHEMY_ENGINE_OPTIONS, translated for asyncpg"""
+    options = {
+        'pool_pre_ping': config.get('DB_POOL_PRE_PING', True),
+        'pool_recycle': config.get('DB_POOL_RECYCLE', 1800)
+    }
+    if url.get_backend_name() != 'postgresql':
+        return options
+
+    if config.get('DB_PGBOUNCER') and config.get('DB_POOL_SIZE') == 0:
+        options['poolclass'] = NullPool
+    else:
+        options.update(
+            pool_size=config.get('DB_POOL_SIZE', 5),
+            max_overflow=config.get('DB_MAX_OVERFLOW', 10),
+            pool_timeout=config.get('DB_POOL_TIMEOUT', 10)
+        )
+
+    if config.get('DB_PGBOUNCER'):
+        # Transaction pooling hands each transaction to any server connection,
+        # so asyncpg's named prepared statements must be switched off
+        options['connect_args'] = {'statement_cache_size': 0}
+    else:
+        server_settings = {}
+        if config.get('DB_STATEMENT_TIMEOUT_MS'):
+            server_settings['statement_timeout'] = str(config['DB_STATEMENT_TIMEOUT_MS'])
+        if config.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS'):
+            server_settings['idle_in_transaction_session_timeout'] = str(config['DB_IDLE_IN_TRANSACTION_TIMEOUT_MS'])
+        if server_settings:
+            options['connect_args'] = {'server_settings': server_settings}
+    return options
+
+
+def _environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope"""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf-8').decode('latin-1'),
+        'PATH_INFO': path.encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        # The body is fully buffered, so it can be read to EOF even without Content-Length
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            environ[name] = value
+            continue
+        key = f'HTTP_{name}'
+        if key in environ:
+            value = environ[key] + ('; ' if name == 'COOKIE' else ',') + value
+        environ[key] = value
+    return environ
+
+
+async def _read_body(receive):
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body.write(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    body.seek(0)
+    return body
+
+
+def _encode_headers(headers):
+    return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+
+async def _paginate(session, query, page, per_page):
+    """(total, items, pages) the way Flask-SQLAlchemy's paginate(error_out=False) counts them"""
+    page = page if page and page > 0 else 1
+    per_page = per_page if per_page and per_page > 0 else 20
+    total = await session.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+    items = (await session.scalars(query.limit(per_page).offset((page - 1) * per_page))).all()
+    return total, items, math.ceil(total / per_page) if total else 0
+
+
+async def _products_to_dicts(session, products):
+    """Product.to_dict() for a page of products, with sellers and categories loaded in two queries"""
+    user_ids = {product.user_id for product in products}
+    category_ids = {product.category_id for product in products}
+    sellers, categories = {}, {}
+    if user_ids:
+        sellers = {user.id: user for user in (await session.scalars(select(User).where(User.id.in_(user_ids)))).all()}
+    if category_ids:
+        categories = {
+            category.id: category
+            for category in (await session.scalars(select(Category).where(Category.id.in_(category_ids)))).all()
+        }
+    return [
+        product.to_dict(seller=sellers.get(product.user_id), category=categories.get(product.category_id))
+        for product in products
+    ]
+
+
+async def get_products(session):
+    """Async GET /api/products/ (same filters and response as products.get_products)"""
+    try:
+        category_id = request.args.get('category_id', type=int)
+        search = request.args.get('search', '')
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+
+        query = select(Product).where(Product.is_active == True)
+        if category_id:
+            query = query.where(Product.category_id == category_id)
+        if search:
+            query = query.where(
+                (Product.name.ilike(f'%{search}%')) |
+                (Product.description.ilike(f'%{search}%'))
+            )
+
+        total, products, pages = await _paginate(session, query.order_by(Product.created_at.desc()), page, per_page)
+
+        return jsonify({
+            'products': await _products_to_dicts(session, products),
+            'total': total,
+            'pages': pages,
+            'current_page': page
+        }), 200
+
+    except Exception as e:
+        print(f"❌ Error in async get_products: {str(e)}")
+        return jsonify({
+            'message': 'Error fetching products',
+            'error': str(e),
+            'debug_info': 'Check server logs for details'
+        }), 500
+
+
+async def get_product(session, product_id):
+    """Async GET /api/products/<id>"""
+    try:
+        product = await session.scalar(
+            select(Product).where(Product.id == product_id, Product.is_active == True).limit(1)
+        )
+
+        if not product:
+            return jsonify({'message': 'Product not found'}), 404
+
+        record_view(product.id)
+
+        return jsonify({
+            'product': (await _products_to_dicts(session, [product]))[0]
+        }), 200
+
+    except Exception as e:
+        return jsonify({'message': 'Error fetching product', 'error': str(e)}), 500
+
+
+async def get_categories(session):
+    """Async GET /api/categories/ (shares the process-level cache with the sync route)"""
+    try:
+        version, body = await get_cached_categories_async(session)
+
+        response = current_app.response_class(body, status=200, mimetype='application/json')
+        response.set_etag(f'categories-{version}')
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('CATEGORY_CACHE_MAX_AGE', 60)
+
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({'message': 'Error fetching categories', 'error': str(e)}), 500
+
+
+async def _current_user(session):
+    """token_required for async handlers: returns (user, None) or (None, error response)"""
+    token = None
+    if 'Authorization' in request.headers:
+        try:
+            token = request.headers['Authorization'].split(" ")[1]
+        except IndexError:
+            return None, (jsonify({'message': 'Invalid token format'}), 401)
+
+    if not token:
+        return None, (jsonify({'message': 'Token is missing'}), 401)
+
+    try:
+        payload = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+    except jwt.ExpiredSignatureError:
+        return None, (jsonify({'message': 'Token has expired'}), 401)
+    except jwt.InvalidTokenError:
+        return None, (jsonify({'message': 'Token is invalid'}), 401)
+
+    user = await session.get(User, payload['user_id'])
+    if not user:
+        return None, (jsonify({'message': 'User not found'}), 401)
+    if not user.is_active:
+        return None, (jsonify({'message': 'User account is deactivated'}), 401)
+    return user, None
+
+
+async def get_user_notifications(session):
+    """Async GET /api/notifications/"""
+    current_user, error = await _current_user(session)
+    if error:
+        return error
+
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        unread_only = request.args.get('unread_only', 'false').lower() == 'true'
+
+        query = select(Notification).where(Notification.user_id == current_user.id)
+        if unread_only:
+            query = query.where(Notification.is_read == False)
+
+        total, notifications, pages = await _paginate(
+            session, query.order_by(Notification.created_at.desc()), page, per_page
+        )
+        unread_count = await session.scalar(
+            select(func.count(Notification.id))
+            .where(Notification.user_id == current_user.id, Notification.is_read == False)
+        )
+
+        return jsonify({
+            'notifications': [notification.to_dict() for notification in notifications],
+            'total': total,
+            'unread_count': unread_count,
+            'pages': pages,
+            'current_page': page
+        }), 200
+
+    except Exception as e:
+        return jsonify({'message': 'Error fetching notifications', 'error': str(e)}), 500
+
+
+# GET paths answered on the event loop; anything else goes to the Flask app in a thread
+ASYNC_ROUTES = [
+    (re.compile(r'^/api/products/$'), get_products),
+    (re.compile(r'^/api/products/(?P<product_id>\d+)$'), get_product),
+    (re.compile(r'^/api/categories/$'), get_categories),
+    (re.compile(r'^/api/notifications/$'), get_user_notifications)
+]
+
+
+class AsyncReadApp:
+    """ASGI wrapper around the Flask app.
+
+    GETs of the catalogue, categories and notifications run as coroutines
+    over an async engine, so one process can wait on many queries at once.
+    Their responses still go through the Flask app's after_request hooks
+    (compression, CORS, sticky-primary cookie). Every other request is
+    handed to the unchanged WSGI app on a bounded thread pool.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        config = flask_app.config
+        with flask_app.app_context():
+            url = db.engine.url
+        if config.get('ASYNC_DATABASE_URL'):
+            url = make_url(config['ASYNC_DATABASE_URL'])
+        else:
+            url = async_database_url(url)
+
+        self.engine = create_async_engine(url, **async_engine_options(config, url))
+        if config.get('DB_PGBOUNCER') and url.get_backend_name() == 'postgresql':
+            install_transaction_timeouts(self.engine.sync_engine, config)
+        install_web_timeouts(self.engine.sync_engine, config)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.get('ASGI_WSGI_THREADS', 8), thread_name_prefix='wsgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            return
+
+        if scope['method'] == 'GET':
+            for pattern, handler in ASYNC_ROUTES:
+                match = pattern.match(scope['path'])
+                if match:
+                    params = {name: int(value) for name, value in match.groupdict().items()}
+                    return await self.call_async(handler, params, scope, receive, send)
+
+        await self.call_wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def call_async(self, handler, params, scope, receive, send):
+        environ = _environ(scope, await _read_body(receive))
+        with self.flask_app.request_context(environ):
+            async with self.sessionmaker() as session:
+                result = await handler(session, **params)
+            response = self.flask_app.process_response(self.flask_app.make_response(result))
+            app_iter, status, headers = response.get_wsgi_response(environ)
+            body = b''.join(app_iter)
+
+        await send({
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': _encode_headers(headers)
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def call_wsgi(self, scope, receive, send):
+        environ = _environ(scope, await _read_body(receive))
+        loop = asyncio.get_running_loop()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+            return lambda data: None
+
+        app_iter = await loop.run_in_executor(self.executor, self.flask_app, environ, start_response)
+        try:
+            chunks = iter(app_iter)
+            # Streamed responses are pulled chunk by chunk off the event loop
+            chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            await send({
+                'type': 'http.response.start',
+                'status': started['status'],
+                'headers': _encode_headers(started['headers'])
+            })
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, next, chunks, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(app_iter, 'close'):
+                await loop.run_in_executor(self.executor, app_iter.close)
+
+
+def create_asgi_app(config_name='default'):
+    """ASGI application: uvicorn asgi:app (needs uvicorn plus asyncpg or aiosqlite)"""
+    return AsyncReadApp(create_app(config_name))
@@ -0,0 +1,187 @@
+import click
+from flask.cli import AppGroup
+from datetime import datetime, timedelta
+
+stats_cli = AppGroup('stats', help='Admin dashboard statistics.')
+rollups_cli = AppGroup('rollups', help='Daily analytics rollups.')
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+uploads_cli = AppGroup('uploads', help='Uploaded file maintenance.')
+assets_cli = AppGroup('assets', help='Frontend static assets.')
+mail_cli = AppGroup('mail', help='Email outbox.')
+listings_cli = AppGroup('listings', help='Listing expiry, archiving and the similar-listings index.')
+
+
+@stats_cli.command('reconcile')
+def reconcile_stats():
+    """Recompute site_stats from one aggregate query (run periodically from cron)"""
+    from app.utils.site_stats import reconcile_site_stats
+
+    stats = reconcile_site_stats()
+    click.echo(f"✅ site_stats reconciled: {stats.to_dict()}")
+
+
+
+@rollups_cli.command('backfill')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), help='First day to rebuild (YYYY-MM-DD).')
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), help='Last day to rebuild, defaults to today.')
+@click.option('--days', default=90, show_default=True, help='Days to rebuild when --start is not given.')
+def backfill_rollups(start, end, days):
+    """Rebuild daily_stats rows for a date range from the base tables"""
+    from app.utils.rollups import backfill_daily_stats
+
+    end = end.date() if end else datetime.utcnow().date()
+    start = start.date() if start else end - timedelta(days=days - 1)
+    if start > end:
+        raise click.BadParameter('--start must not be after --end')
+
+    written = backfill_daily_stats(start, end)
+    click.echo(f"✅ daily_stats rebuilt for {start} .. {end}: {written} rows")
+
+
+
+@jobs_cli.command('work')
+@click.option('--once', is_flag=True, help='Exit once the queue is drained.')
+@click.option('--batch-size', type=int, help='Jobs claimed per poll.')
+@click.option('--poll-interval', type=float, help='Seconds to sleep when the queue is empty.')
+def work_jobs(once, batch_size, poll_interval):
+    """Run the background job worker"""
+    from app.utils.jobs import work
+
+    work(poll_interval=poll_interval, batch_size=batch_size, once=once)
+
+
+@uploads_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='Report what would be deleted without deleting.')
+@click.option('--grace-hours', default=24.0, show_default=True,
+              help='Keep unreferenced files modified more recently than this.')
+@click.option('--batch-size', default=500, show_default=True, help='Files examined per directory-scan batch.')
+@click.option('--max-rate', type=float, help='Maximum deletions per second.')
+def gc_uploads(dry_run, grace_hours, batch_size, max_rate):
+    """Delete uploaded images that no product references (run periodically from cron)"""
+    from app.utils.upload_gc import collect_orphaned_uploads
+
+    summary = collect_orphaned_uploads(
+        grace_period=timedelta(hours=grace_hours),
+        batch_size=batch_size,
+        max_deletes_per_second=max_rate,
+        dry_run=dry_run,
+        log=click.echo
+    )
+    verb = 'would free' if dry_run else 'freed'
+    click.echo(f"✅ Upload GC: scanned {summary['scanned']} files in {summary['seconds']}s, "
+               f"{summary['referenced']} referenced, {summary['too_new']} in grace period, "
+               f"{summary['orphaned']} orphaned, {summary['deleted']} deleted, "
+               f"{summary['errors']} errors; {verb} {summary['bytes_freed']} bytes")
+
+
+@uploads_cli.command('backfill-metadata')
+@click.option('--batch-size', default=200, show_default=True, help='Products read per batch.')
+def backfill_image_metadata(batch_size):
+    """Queue size and placeholder extraction for existing product images"""
+    from app.utils.images import backfill_image_metadata as backfill
+
+    queued = backfill(batch_size=batch_size, log=click.echo)
+    click.echo(f"✅ Queued {queued} images; run the job worker to process them")
+
+
+@assets_cli.command('compress')
+@click.option('--gzip-level', default=9, show_default=True, help='gzip compression level.')
+@click.option('--brotli-quality', default=11, show_default=True, help='Brotli quality (needs the brotli package).')
+def compress_frontend(gzip_level, brotli_quality):
+    """Precompress frontend assets to .gz/.br at build time"""
+    from flask import current_app
+    from app.utils.assets import compress_assets
+
+    written = compress_assets(current_app.static_folder, brotli_quality=brotli_quality,
+                              gzip_level=gzip_level, log=click.echo)
+    click.echo(f"✅ Precompressed {len(written)} assets; restart the app to pick them up")
+
+
+@mail_cli.command('send')
+@click.option('--once', is_flag=True, help='Exit once the outbox is drained.')
+@click.option('--batch-size', type=int, help='Emails claimed per batch.')
+@click.option('--poll-interval', type=float, help='Seconds to sleep when the outbox is empty.')
+def send_mail(once, batch_size, poll_interval):
+    """Run the mail sender (one reused SMTP connection)"""
+    from app.utils.outbox import run_sender
+
+    run_sender(poll_interval=poll_interval, batch_size=batch_size, once=once)
+
+
+@mail_cli.command('debug-server')
+@click.option('--host', default='127.0.0.1', show_default=True)
+@click.option('--port', default=1025, show_default=True)
+def mail_debug_server(host, port):
+    """Local SMTP server that prints received mail (use with MAIL_USE_TLS=false)"""
+    from app.utils.debug_smtp import DebuggingSMTPServer
+
+    server = DebuggingSMTPServer(host, port)
+    click.echo(f"📨 Debugging SMTP server on {host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+@listings_cli.command('expire')
+@click.option('--batch-size', type=int, help='Listings deactivated per batch/commit.')
+def expire_listings_command(batch_size):
+    """Deactivate listings past their expiry date (run periodically from cron)"""
+    from app.utils.listings import expire_listings
+
+    expired = expire_listings(batch_size=batch_size)
+    click.echo(f"✅ {expired} listings expired")
+
+
+@listings_cli.command('archive')
+@click.option('--batch-size', type=int, help='Listings moved per batch/commit.')
+def archive_listings_command(batch_size):
+    """Move long-sold and long-inactive listings to products_archive (run periodically from cron)"""
+    from app.utils.listings import expire_listings, archive_listings
+
+    expired = expire_listings(batch_size=batch_size)
+    archived = archive_listings(batch_size=batch_size)
+    click.echo(f"✅ {expired} listings expired, {archived} archived")
+
+
+@listings_cli.command('similar')
+@click.option('--category-id', type=int, help='Only rebuild this category.')
+def rebuild_similar_command(category_id):
+    """Recompute the similar-listings index (run nightly from cron; new and edited listings update it in between)"""
+    from app.utils.similar import rebuild_similar_products
+
+    indexed = rebuild_similar_products(category_id=category_id)
+    click.echo(f"✅ Similar listings computed for {indexed} listings")
+
+
+class MigrateGroup(click.Group):
+    """`flask db`: Flask-Migrate (and alembic) are only imported when it is used"""
+
+    def _migrate_cli(self, ctx):
+        from flask.cli import ScriptInfo
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_cli
+        from app import db
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if 'migrate' not in app.extensions:
+            Migrate(app, db)
+        return db_cli
+
+    def list_commands(self, ctx):
+        return self._migrate_cli(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._migrate_cli(ctx).get_command(ctx, name)
+
+
+def register_commands(app):
+    """Attach the maintenance CLI groups to the app"""
+    app.cli.add_command(MigrateGroup('db', help='Perform database migrations.'))
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(uploads_cli)
+    app.cli.add_command(assets_cli)
+    app.cli.add_command(mail_cli)
+    app.cli.add_command(listings_cli)
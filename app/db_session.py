@@ -0,0 +1,41 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+# Bind key of the optional read replica (SQLALCHEMY_BINDS, see config.py)
+REPLICA_BIND = 'replica'
+
+
+def _is_write(clause):
+    if clause is None:
+        return False
+    if isinstance(clause, (UpdateBase, TextClause)):
+        # Raw SQL may write, so it stays on the primary too
+        return True
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica while g.read_replica is set.
+
+    app.utils.replica.replica_safe sets the flag for the duration of a
+    handler. Flushes, DML, raw SQL and SELECT ... FOR UPDATE always go to
+    the primary, and once the session has flushed, the rest of the request
+    reads from the primary as well.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_app_context() or not g.get('read_replica'):
+            return engine
+
+        if self._flushing:
+            g.read_replica = False
+            return engine
+
+        engines = self._db.engines
+        replica = engines.get(REPLICA_BIND)
+        if replica is None or engine is not engines.get(None) or _is_write(clause):
+            return engine
+        return replica
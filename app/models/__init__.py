@@ -1,7 +1,19 @@
 from .user import User
 from .product import Product
+from .product_archive import ProductArchive
+from .product_stats import ProductStats
 from .category import Category
 from .notification import Notification
 from .user_session import UserSession
+from .site_stats import SiteStats
+from .cache_version import CacheVersion
+from .user_deletion_job import UserDeletionJob
+from .daily_stats import DailyStats
+from .job import Job
+from .uploaded_image import UploadedImage
+from .stored_file import StoredFile
+from .outbox_email import OutboxEmail
+from .saved_search import SavedSearch
+from .similar_product import SimilarProduct
 
-__all__ = ['User', 'Product', 'Category', 'Notification', 'UserSession']
\ No newline at end of file
+__all__ = ['User', 'Product', 'ProductArchive', 'ProductStats', 'Category', 'Notification', 'UserSession', 'SiteStats', 'CacheVersion', 'UserDeletionJob', 'DailyStats', 'Job', 'UploadedImage', 'StoredFile', 'OutboxEmail', 'SavedSearch', 'SimilarProduct']
\ No newline at end of file
@@ -0,0 +1,10 @@
+from app import db
+from datetime import datetime
+
+class CacheVersion(db.Model):
+    """Version stamp per cached dataset, shared by every worker process"""
+    __tablename__ = 'cache_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,35 @@
+from app import db
+
+class DailyStats(db.Model):
+    """Per-day activity counters, one row per (category, day).
+
+    category_id 0 holds the site-wide totals (and the user counters, which
+    have no category), so a chart for the whole site is a single range read.
+    """
+    __tablename__ = 'daily_stats'
+    __table_args__ = (
+        db.UniqueConstraint('category_id', 'day', name='uq_daily_stats_category_day'),
+    )
+    
+    ALL_CATEGORIES = 0
+    COUNTERS = ('new_users', 'deactivated_users', 'new_listings', 'sold_listings', 'deactivated_listings')
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    # Not a foreign key: 0 is the site-wide row and history outlives categories
+    category_id = db.Column(db.Integer, nullable=False, default=0)
+    new_users = db.Column(db.Integer, nullable=False, default=0)
+    deactivated_users = db.Column(db.Integer, nullable=False, default=0)
+    new_listings = db.Column(db.Integer, nullable=False, default=0)
+    sold_listings = db.Column(db.Integer, nullable=False, default=0)
+    deactivated_listings = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        """Convert daily stats row to dictionary"""
+        data = {
+            'day': self.day.isoformat() if self.day else None,
+            'category_id': self.category_id
+        }
+        for counter in self.COUNTERS:
+            data[counter] = getattr(self, counter) or 0
+        return data
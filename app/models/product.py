@@ -2,25 +2,83 @@ from app import db
 from datetime import datetime
 import json
 
+# to_dict() looks the seller/category up itself unless they are passed in
+_LOOKUP = object()
+
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        # Only live rows are indexed: the expiry sweep looks for active listings past expires_at
+        db.Index('ix_products_expires_at', 'expires_at',
+                 postgresql_where=db.text('is_active'), sqlite_where=db.text('is_active')),
+        # Sold/inactive rows waiting to be moved to products_archive
+        db.Index('ix_products_archive_candidates', 'updated_at',
+                 postgresql_where=db.text('is_sold OR NOT is_active'),
+                 sqlite_where=db.text('is_sold OR NOT is_active')),
+        # Similar-listings workers read a category's recent changes (app/utils/similar.py)
+        db.Index('ix_products_category_updated_at', 'category_id', 'updated_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
     price = db.Column(db.Numeric(10, 2))
     location = db.Column(db.String(255), nullable=True)
     image_urls = db.Column(db.JSON)  # Store as JSON array
+    image_variants = db.Column(db.JSON)  # {image_url: {'width', 'height', 'placeholder', 'color', 'variants': [...]}}
     contact_info = db.Column(db.Text, nullable=False)
     is_active = db.Column(db.Boolean, default=True)
     is_sold = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Listing TTL (LISTING_TTL_DAYS); `expired` marks a deactivation by the expiry sweep, which the owner may renew
+    expires_at = db.Column(db.DateTime, nullable=True)
+    expired = db.Column(db.Boolean, nullable=False, default=False)
+    
+    def _responsive_images(self, source_urls, processed_urls, base_url):
+        """Build <picture>/srcset-ready entries for each image.
+
+        Each entry has the original as 'src', the JPEG variants as the
+        'srcset' fallback, and the modern formats as 'sources' in order of
+        preference, plus the size and a BlurHash/colour placeholder so the
+        layout can be painted before any image loads. Images that are not
+        processed yet only have 'src'.
+        """
+        image_variants = self.image_variants or {}
+        images = []
+        
+        for source_url, full_url in zip(source_urls, processed_urls):
+            meta = image_variants.get(source_url) or {}
+            srcsets = {}
+            for variant in meta.get('variants') or []:
+                variant_url = variant['url']
+                if variant_url.startswith('/'):
+                    variant_url = f"{base_url}{variant_url}"
+                srcsets.setdefault(variant['format'], []).append(f"{variant_url} {variant['width']}w")
+            
+            images.append({
+                'src': full_url,
+                'width': meta.get('width'),
+                'height': meta.get('height'),
+                'placeholder': meta.get('placeholder'),
+                'color': meta.get('color'),
+                'srcset': ', '.join(srcsets.get('jpeg', [])),
+                'sources': [
+                    {'type': f'image/{fmt}', 'srcset': ', '.join(srcsets[fmt])}
+                    for fmt in ('avif', 'webp') if fmt in srcsets
+                ]
+            })
+        
+        return images
     
-    def to_dict(self):
-        """Convert product object to dictionary"""
+    def to_dict(self, seller=_LOOKUP, category=_LOOKUP):
+        """Convert product object to dictionary.
+
+        Listings that already loaded the sellers and categories in bulk
+        (the async read path) pass them in instead of a query per product.
+        """
         try:
             from app.models.user import User
             from app.models.category import Category
@@ -49,6 +107,7 @@ class Product(db.Model):
             
             # Clean and validate image URLs
             processed_urls = []
+            source_urls = []  # stored URL for each processed URL, for variant lookup
             for url in image_urls:
                 if url and isinstance(url, str):
                     # Clean the URL - remove any malformed data
@@ -69,19 +128,28 @@ class Product(db.Model):
                         # Use configuration for base URL instead of hardcoding
                         base_url = current_app.config.get('BASE_URL', 'http://127.0.0.1:5000')
                         processed_urls.append(f"{base_url}{url}")
+                        source_urls.append(url)
                     elif url.startswith('uploads/'):
                         base_url = current_app.config.get('BASE_URL', 'http://127.0.0.1:5000')
                         processed_urls.append(f"{base_url}/{url}")
+                        source_urls.append(url)
                     elif url.startswith(('http://', 'https://')):
                         # Only keep valid external URLs
                         processed_urls.append(url)
+                        source_urls.append(url)
                     else:
                         # Skip invalid URLs
                         print(f"⚠️ Skipping invalid URL format: {url}")
             
+            # Responsive variants generated after upload (app/utils/images.py)
+            images = self._responsive_images(source_urls, processed_urls,
+                                             current_app.config.get('BASE_URL', 'http://127.0.0.1:5000'))
+            
             # Get seller and category
-            seller = User.query.get(self.user_id)
-            category = Category.query.get(self.category_id)
+            if seller is _LOOKUP:
+                seller = User.query.get(self.user_id)
+            if category is _LOOKUP:
+                category = Category.query.get(self.category_id)
             
             # Format price in RWF
             price_display = None
@@ -99,11 +167,14 @@ class Product(db.Model):
                 'price_display': price_display,  # Add this field
                 'location': self.location,  # ADD THIS LINE
                 'image_urls': processed_urls,
+                'images': images,
                 'contact_info': self.contact_info,
                 'is_active': self.is_active,
                 'is_sold': self.is_sold,
                 'created_at': self.created_at.isoformat() if self.created_at else None,
                 'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+                'expires_at': self.expires_at.isoformat() if self.expires_at else None,
+                'expired': bool(self.expired),
                 'seller_username': seller.username if seller else 'Unknown',
                 'category_name': category.name if category else 'Uncategorized'
             }
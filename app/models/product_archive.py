@@ -0,0 +1,55 @@
+from app import db
+from app.models.product import Product, _LOOKUP
+from datetime import datetime
+
+class ProductArchive(db.Model):
+    """Sold, expired or deactivated listing moved out of the products table.
+
+    Rows keep the id they had in products, so owner and admin links stay
+    valid. The public listing endpoints never read this table.
+    """
+    __tablename__ = 'products_archive'
+    
+    REASON_SOLD = 'sold'
+    REASON_EXPIRED = 'expired'
+    REASON_INACTIVE = 'inactive'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    name = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    price = db.Column(db.Numeric(10, 2))
+    location = db.Column(db.String(255), nullable=True)
+    image_urls = db.Column(db.JSON)
+    image_variants = db.Column(db.JSON)
+    contact_info = db.Column(db.Text, nullable=False)
+    is_active = db.Column(db.Boolean, default=False)
+    is_sold = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    expires_at = db.Column(db.DateTime)
+    expired = db.Column(db.Boolean, nullable=False, default=False)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    archive_reason = db.Column(db.String(20), nullable=False)
+    
+    # Columns copied from products as-is when a listing is archived
+    PRODUCT_COLUMNS = (
+        'id', 'user_id', 'category_id', 'name', 'description', 'price', 'location', 'image_urls',
+        'image_variants', 'contact_info', 'is_active', 'is_sold', 'created_at', 'updated_at',
+        'expires_at', 'expired'
+    )
+    
+    # Same JSON shape as a live listing
+    _responsive_images = Product._responsive_images
+    _product_dict = Product.to_dict
+    
+    def to_dict(self, seller=_LOOKUP, category=_LOOKUP):
+        """Convert archived product to dictionary (a product dict plus the archive fields)"""
+        result = self._product_dict(seller, category)
+        result.update(
+            is_archived=True,
+            archived_at=self.archived_at.isoformat() if self.archived_at else None,
+            archive_reason=self.archive_reason
+        )
+        return result
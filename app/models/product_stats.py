@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+class ProductStats(db.Model):
+    """Per-listing counters written in batches by app/utils/views.py.
+
+    Kept out of products so counting a view never locks or rewrites the
+    listing row the public pages read.
+    """
+    __tablename__ = 'product_stats'
+    
+    # Not a foreign key: the row follows the listing into products_archive
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    views = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert stats row to dictionary"""
+        return {
+            'product_id': self.product_id,
+            'views': self.views or 0,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
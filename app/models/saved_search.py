@@ -0,0 +1,35 @@
+from app import db
+from datetime import datetime
+
+class SavedSearch(db.Model):
+    """A buyer's alert: new listings matching it create a notification.
+
+    Deleting a search only deactivates it, so the matching index in the
+    job worker can pick the change up from updated_at.
+    """
+    __tablename__ = 'saved_searches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    keywords = db.Column(db.String(200), nullable=True)  # every word must appear in the name/description
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+    location = db.Column(db.String(255), nullable=True)  # substring of the listing's location
+    min_price = db.Column(db.Numeric(10, 2), nullable=True)
+    max_price = db.Column(db.Numeric(10, 2), nullable=True)
+    is_active = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        """Convert saved search object to dictionary"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'keywords': self.keywords,
+            'category_id': self.category_id,
+            'location': self.location,
+            'min_price': float(self.min_price) if self.min_price is not None else None,
+            'max_price': float(self.max_price) if self.max_price is not None else None,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
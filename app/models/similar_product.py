@@ -0,0 +1,27 @@
+from app import db
+from datetime import datetime
+
+class SimilarProduct(db.Model):
+    """Precomputed neighbours of a listing, best first (app/utils/similar.py).
+
+    The product page reads one listing's rows by primary key instead of
+    comparing listing text at request time.
+    """
+    __tablename__ = 'similar_products'
+    
+    # Not foreign keys: rows are rebuilt wholesale, and neighbours that are
+    # no longer active are skipped when the list is read
+    product_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    rank = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    similar_id = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Convert similar product row to dictionary"""
+        return {
+            'product_id': self.product_id,
+            'rank': self.rank,
+            'similar_id': self.similar_id,
+            'score': self.score
+        }
@@ -0,0 +1,39 @@
+from app import db
+
+class SiteStats(db.Model):
+    """Single-row table holding the admin dashboard counters.
+
+    The counters are adjusted incrementally by the model hooks in
+    app/utils/site_stats.py and periodically reconciled from one
+    aggregate query. The week counters only grow between reconciles, so
+    they are accurate to within SITE_STATS_MAX_AGE.
+    """
+    __tablename__ = 'site_stats'
+
+    SINGLETON_ID = 1
+
+    id = db.Column(db.Integer, primary_key=True)
+    total_users = db.Column(db.Integer, nullable=False, default=0)
+    total_products = db.Column(db.Integer, nullable=False, default=0)
+    active_products = db.Column(db.Integer, nullable=False, default=0)
+    total_categories = db.Column(db.Integer, nullable=False, default=0)
+    users_with_products = db.Column(db.Integer, nullable=False, default=0)
+    new_users_week = db.Column(db.Integer, nullable=False, default=0)
+    new_products_week = db.Column(db.Integer, nullable=False, default=0)
+    reconciled_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        """Convert stats row to the dashboard payload"""
+        total_users = self.total_users or 0
+        users_with_products = self.users_with_products or 0
+        return {
+            'total_users': total_users,
+            'total_products': self.total_products or 0,
+            'active_products': self.active_products or 0,
+            'total_categories': self.total_categories or 0,
+            'new_users_week': self.new_users_week or 0,
+            'new_products_week': self.new_products_week or 0,
+            'users_with_products': users_with_products,
+            'active_users_percentage': round((users_with_products / total_users * 100) if total_users > 0 else 0, 1),
+            'reconciled_at': self.reconciled_at.isoformat() if self.reconciled_at else None
+        }
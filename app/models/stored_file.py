@@ -0,0 +1,13 @@
+from app import db
+from datetime import datetime
+
+class StoredFile(db.Model):
+    """A content-addressed upload and how many products (live or archived) use it"""
+    __tablename__ = 'stored_files'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    url = db.Column(db.String(500), unique=True, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_referenced_at = db.Column(db.DateTime, default=datetime.utcnow)
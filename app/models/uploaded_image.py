@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+
+class UploadedImage(db.Model):
+    """An uploaded product image and the variants generated from it"""
+    __tablename__ = 'uploaded_images'
+    
+    STATUS_PENDING = 'pending'
+    STATUS_READY = 'ready'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='SET NULL'), nullable=True)
+    # Set once a product starts using the image, so late-finishing processing
+    # can still update that product
+    product_id = db.Column(db.Integer, nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    width = db.Column(db.Integer)
+    height = db.Column(db.Integer)
+    variants = db.Column(db.JSON)  # [{'width', 'height', 'format', 'url'}, ...]
+    placeholder = db.Column(db.String(64))  # BlurHash, painted before the image loads
+    color = db.Column(db.String(7))  # average colour, '#rrggbb'
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+    
+    def meta(self):
+        """Per-image metadata as stored on Product.image_variants"""
+        return {
+            'width': self.width,
+            'height': self.height,
+            'placeholder': self.placeholder,
+            'color': self.color,
+            'variants': self.variants or []
+        }
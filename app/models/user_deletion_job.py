@@ -0,0 +1,54 @@
+from app import db
+from datetime import datetime
+
+class UserDeletionJob(db.Model):
+    """Progress record for a background user deletion"""
+    __tablename__ = 'user_deletion_jobs'
+    
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_CLEANING_FILES = 'cleaning_files'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    # Not a foreign key: the job outlives the user row it deletes
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    requested_by = db.Column(db.Integer, nullable=True)
+    username = db.Column(db.String(50))
+    email = db.Column(db.String(100))
+    status = db.Column(db.String(20), nullable=False, default=STATUS_PENDING)
+    products_deleted = db.Column(db.Integer, nullable=False, default=0)
+    notifications_deleted = db.Column(db.Integer, nullable=False, default=0)
+    images_queued = db.Column(db.Integer, nullable=False, default=0)
+    images_deleted = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+    
+    def to_dict(self):
+        """Convert deletion job to dictionary"""
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'requested_by': self.requested_by,
+            'deleted_user': {
+                'id': self.user_id,
+                'username': self.username,
+                'email': self.email
+            },
+            'status': self.status,
+            'deleted_products_count': self.products_deleted or 0,
+            'deleted_notifications_count': self.notifications_deleted or 0,
+            'queued_images_count': self.images_queued or 0,
+            'deleted_images_count': self.images_deleted or 0,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -2,37 +2,30 @@ from flask import Blueprint, request, jsonify
 from app import db
 from app.models.user import User
 from app.models.product import Product
+from app.models.product_archive import ProductArchive
 from app.models.category import Category
-from app.models.notification import Notification
-from app.routes.products import delete_product_images
+from app.models.user_deletion_job import UserDeletionJob
 from app.utils.auth import token_required, admin_required
+from app.utils.categories import category_product_counts, bump_categories_version
+from app.utils.db_pool import pool_statuses
+from app.utils.jobs import enqueue
+from app.utils.listings import listing_expires_at
+from app.utils.views import product_views
+from app.utils.rollups import get_daily_stats, get_daily_stats_by_category
+from app.utils.replica import replica_safe
+from app.utils.site_stats import get_site_stats, reconcile_site_stats
+from app.utils.user_deletion import start_user_deletion
 from datetime import datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__)
-# Add this to your admin.py after the imports
 @admin_bp.route('/dashboard', methods=['GET'])
 @token_required
 @admin_required
 def get_dashboard(current_user):
     """Simple dashboard endpoint that matches frontend expectation"""
     try:
-        # Basic counts
-        total_users = User.query.count()
-        total_products = Product.query.count()
-        active_products = Product.query.filter_by(is_active=True).count()
-        total_categories = Category.query.count()
-        
         return jsonify({
-            'stats': {
-                'total_users': total_users,
-                'total_products': total_products,
-                'active_products': active_products,
-                'total_categories': total_categories,
-                'new_users_week': 0,  # You can calculate these later
-                'new_products_week': 0,
-                'users_with_products': 0,
-                'active_users_percentage': 0
-            }
+            'stats': get_site_stats().to_dict()
         }), 200
         
     except Exception as e:
@@ -42,41 +35,78 @@ def get_dashboard(current_user):
 @token_required
 @admin_required
 def get_dashboard_stats(current_user):
-    """Get admin dashboard statistics"""
+    """Get admin dashboard statistics (single-row read of site_stats)"""
     try:
-        # Basic counts
-        total_users = User.query.count()
-        total_products = Product.query.count()
-        active_products = Product.query.filter_by(is_active=True).count()
-        total_categories = Category.query.count()
-        
-        # Recent activity (last 7 days)
-        week_ago = datetime.utcnow() - timedelta(days=7)
-        new_users_week = User.query.filter(User.created_at >= week_ago).count()
-        new_products_week = Product.query.filter(Product.created_at >= week_ago).count()
-        
-        # User activity stats
-        users_with_products = db.session.query(Product.user_id).distinct().count()
+        if request.args.get('refresh', 'false').lower() == 'true':
+            stats = reconcile_site_stats()
+        else:
+            stats = get_site_stats()
         
         return jsonify({
-            'stats': {
-                'total_users': total_users,
-                'total_products': total_products,
-                'active_products': active_products,
-                'total_categories': total_categories,
-                'new_users_week': new_users_week,
-                'new_products_week': new_products_week,
-                'users_with_products': users_with_products,
-                'active_users_percentage': round((users_with_products / total_users * 100) if total_users > 0 else 0, 1)
-            }
+            'stats': stats.to_dict()
         }), 200
         
     except Exception as e:
         return jsonify({'message': 'Error fetching dashboard stats', 'error': str(e)}), 500
 
+@admin_bp.route('/db-pool', methods=['GET'])
+@token_required
+@admin_required
+def get_db_pool(current_user):
+    """Connection pool usage and checkout waits of this worker process (?reset=true clears them)"""
+    try:
+        pools = pool_statuses(db)
+        if request.args.get('reset', 'false').lower() == 'true':
+            for engine in db.engines.values():
+                metrics = getattr(engine.pool, 'metrics', None)
+                if metrics is not None:
+                    metrics.reset()
+
+        return jsonify({'pools': pools}), 200
+
+    except Exception as e:
+        return jsonify({'message': 'Error fetching pool metrics', 'error': str(e)}), 500
+
+@admin_bp.route('/stats/daily', methods=['GET'])
+@token_required
+@admin_required
+def get_daily_stats_series(current_user):
+    """Daily new users / listings / sold / deactivations for a date range"""
+    try:
+        try:
+            end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() \
+                if request.args.get('end') else datetime.utcnow().date()
+            start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() \
+                if request.args.get('start') else end - timedelta(days=29)
+        except ValueError:
+            return jsonify({'message': 'Dates must be formatted as YYYY-MM-DD'}), 400
+        
+        if start > end:
+            return jsonify({'message': 'start must not be after end'}), 400
+        if (end - start).days > 731:
+            return jsonify({'message': 'Date range is limited to two years'}), 400
+        
+        response = {
+            'start': start.isoformat(),
+            'end': end.isoformat()
+        }
+        
+        if request.args.get('breakdown') == 'category':
+            response['categories'] = get_daily_stats_by_category(start, end)
+        else:
+            category_id = request.args.get('category_id', 0, type=int)
+            response['category_id'] = category_id
+            response['days'] = get_daily_stats(start, end, category_id)
+        
+        return jsonify(response), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching daily stats', 'error': str(e)}), 500
+
 @admin_bp.route('/users', methods=['GET'])
 @token_required
 @admin_required
+@replica_safe
 def get_all_users(current_user):
     """Get all users with pagination"""
     try:
@@ -87,10 +117,9 @@ def get_all_users(current_user):
         query = User.query
         
         if search:
-            query = query.filter(
-                (User.username.ilike(f'%{search}%')) |
-                (User.email.ilike(f'%{search}%'))
-            )
+            from app.utils.user_search import apply_user_search
+
+            query = apply_user_search(query, search)
         
         users = query.order_by(User.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
@@ -109,16 +138,22 @@ def get_all_users(current_user):
 @admin_bp.route('/categories', methods=['GET'])
 @token_required
 @admin_required
+@replica_safe
 def get_all_categories(current_user):
     """Get all categories for admin"""
     try:
+        active_only = request.args.get('active_only', 'false').lower() == 'true'
         categories = Category.query.order_by(Category.name).all()
         
-        # Get product count for each category
+        # Product counts for every category come from a single GROUP BY
+        counts = category_product_counts()
+        
         categories_data = []
         for category in categories:
+            total, active = counts.get(category.id, (0, 0))
             category_dict = category.to_dict()
-            category_dict['product_count'] = Product.query.filter_by(category_id=category.id).count()
+            category_dict['product_count'] = active if active_only else total
+            category_dict['active_product_count'] = active
             categories_data.append(category_dict)
         
         return jsonify({
@@ -156,6 +191,7 @@ def toggle_user_active(current_user, user_id):
 @admin_bp.route('/products', methods=['GET'])
 @token_required
 @admin_required
+@replica_safe
 def get_all_products(current_user):
     """Get all products with admin controls"""
     try:
@@ -173,9 +209,10 @@ def get_all_products(current_user):
         products = query.order_by(Product.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
+        views = product_views(product.id for product in products.items)
         
         return jsonify({
-            'products': [product.to_dict() for product in products.items],
+            'products': [dict(product.to_dict(), views=views.get(product.id, 0)) for product in products.items],
             'total': products.total,
             'pages': products.pages,
             'current_page': page
@@ -184,6 +221,40 @@ def get_all_products(current_user):
     except Exception as e:
         return jsonify({'message': 'Error fetching products', 'error': str(e)}), 500
 
+@admin_bp.route('/products/archive', methods=['GET'])
+@token_required
+@admin_required
+@replica_safe
+def get_archived_products(current_user):
+    """Get archived listings (?reason=sold|expired|inactive, ?user_id=)"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        reason = request.args.get('reason')
+        user_id = request.args.get('user_id', type=int)
+        
+        query = ProductArchive.query
+        
+        if reason:
+            query = query.filter_by(archive_reason=reason)
+        if user_id:
+            query = query.filter_by(user_id=user_id)
+        
+        products = query.order_by(ProductArchive.archived_at.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+        views = product_views(product.id for product in products.items)
+        
+        return jsonify({
+            'products': [dict(product.to_dict(), views=views.get(product.id, 0)) for product in products.items],
+            'total': products.total,
+            'pages': products.pages,
+            'current_page': page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching archived products', 'error': str(e)}), 500
+
 @admin_bp.route('/products/<int:product_id>/toggle-active', methods=['PUT'])
 @token_required
 @admin_required
@@ -192,6 +263,10 @@ def toggle_product_active(current_user, product_id):
     try:
         product = Product.query.get_or_404(product_id)
         product.is_active = not product.is_active
+        if product.is_active and product.expired:
+            # Reactivating an expired listing renews it, or the next sweep would expire it again
+            product.expired = False
+            product.expires_at = listing_expires_at()
         db.session.commit()
         
         action = 'activated' if product.is_active else 'deactivated'
@@ -225,6 +300,7 @@ def create_category(current_user):
             description=data.get('description', '')
         )
         db.session.add(category)
+        bump_categories_version()
         db.session.commit()
         
         return jsonify({
@@ -245,13 +321,15 @@ def delete_category(current_user, category_id):
         category = Category.query.get_or_404(category_id)
         
         # Check if category has products
-        product_count = Product.query.filter_by(category_id=category_id).count()
+        product_count = Product.query.filter_by(category_id=category_id).count() + \
+            ProductArchive.query.filter_by(category_id=category_id).count()
         if product_count > 0:
             return jsonify({
                 'message': f'Cannot delete category with {product_count} products. Move products first.'
             }), 400
         
         db.session.delete(category)
+        bump_categories_version()
         db.session.commit()
         
         return jsonify({'message': 'Category deleted successfully'}), 200
@@ -277,21 +355,18 @@ def delete_product_admin(current_user, product_id):
             'name': product.name,
             'seller_id': product.user_id
         }
-        image_urls = product.image_urls or []
+        image_urls = list(dict.fromkeys(product.image_urls or []))
         
-        # Delete the product from database
+        # Delete the product from database; image files go in the background
         db.session.delete(product)
-        db.session.commit()
-        
-        # Delete physical image files
-        deleted_files = []
         if image_urls:
-            deleted_files = delete_product_images(image_urls)
+            enqueue('delete_product_images', {'image_urls': image_urls}, commit=False)
+        db.session.commit()
         
         return jsonify({
             'message': 'Product permanently deleted',
             'deleted_product': product_info,
-            'deleted_images_count': len(deleted_files)
+            'queued_images_count': len(image_urls)
         }), 200
         
     except Exception as e:
@@ -303,7 +378,7 @@ def delete_product_admin(current_user, product_id):
 @token_required
 @admin_required
 def delete_user(current_user, user_id):
-    """Admin delete user account and clean up their product images"""
+    """Admin delete user account - runs as a background job, returns immediately"""
     try:
         user = User.query.get_or_404(user_id)
         
@@ -311,44 +386,31 @@ def delete_user(current_user, user_id):
         if user.id == current_user.id:
             return jsonify({'message': 'Cannot delete your own account'}), 400
         
-        # Store user info for response
-        user_info = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email
-        }
-        
-        # Get all user's products to clean up images
-        user_products = Product.query.filter_by(user_id=user_id).all()
-        all_image_urls = []
+        job, created = start_user_deletion(user, current_user)
         
-        for product in user_products:
-            if product.image_urls:
-                all_image_urls.extend(product.image_urls)
-        
-        # Delete user's notifications first
-        Notification.query.filter_by(user_id=user_id).delete()
-        
-        # Delete user's products
-        Product.query.filter_by(user_id=user_id).delete()
-        
-        # Delete the user
-        db.session.delete(user)
-        db.session.commit()
+        return jsonify({
+            'message': 'User deletion started' if created else 'User deletion already in progress',
+            'deleted_user': job.to_dict()['deleted_user'],
+            'job': job.to_dict(),
+            'status_url': f'/api/admin/user-deletions/{job.id}'
+        }), 202
         
-        # Delete physical image files
-        deleted_files = []
-        if all_image_urls:
-            deleted_files = delete_product_images(all_image_urls)
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error deleting user {user_id}: {str(e)}")
+        return jsonify({'message': 'Error deleting user', 'error': str(e)}), 500
+
+@admin_bp.route('/user-deletions/<int:job_id>', methods=['GET'])
+@token_required
+@admin_required
+def get_user_deletion(current_user, job_id):
+    """Progress of a background user deletion"""
+    try:
+        job = UserDeletionJob.query.get_or_404(job_id)
         
         return jsonify({
-            'message': 'User and their data deleted successfully',
-            'deleted_user': user_info,
-            'deleted_products_count': len(user_products),
-            'deleted_images_count': len(deleted_files)
+            'job': job.to_dict()
         }), 200
         
     except Exception as e:
-        db.session.rollback()
-        print(f"❌ Error deleting user {user_id}: {str(e)}")
-        return jsonify({'message': 'Error deleting user', 'error': str(e)}), 500     
\ No newline at end of file
+        return jsonify({'message': 'Error fetching deletion job', 'error': str(e)}), 500
@@ -1,19 +1,26 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.category import Category
 from app.utils.auth import token_required, admin_required
+from app.utils.categories import get_cached_categories, bump_categories_version
+from app.utils.replica import replica_safe
 
 categories_bp = Blueprint('categories', __name__)
 
 @categories_bp.route('/', methods=['GET'])
+@replica_safe
 def get_categories():
-    """Get all categories"""
+    """Get all categories (served from the process-level cache)"""
     try:
-        categories = Category.query.order_by(Category.name).all()
+        version, body = get_cached_categories()
         
-        return jsonify({
-            'categories': [category.to_dict() for category in categories]
-        }), 200
+        response = current_app.response_class(body, status=200, mimetype='application/json')
+        response.set_etag(f'categories-{version}')
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('CATEGORY_CACHE_MAX_AGE', 60)
+        
+        # Turns into a bodyless 304 when If-None-Match matches
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({'message': 'Error fetching categories', 'error': str(e)}), 500
@@ -40,6 +47,7 @@ def create_category(current_user):
         )
         
         db.session.add(new_category)
+        bump_categories_version()
         db.session.commit()
         
         return jsonify({
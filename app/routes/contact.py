@@ -1,48 +1,15 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_mail import Message
 from datetime import datetime
-from flask_mail import Mail
+from app.models.outbox_email import OutboxEmail
+from app.utils.auth import token_required, admin_required
+from app.utils.jobs import task
+from app.utils.outbox import queue_email, CONTACT_ADDRESS
 
 
 contact_bp = Blueprint('contact', __name__)
 
-@contact_bp.route('/send-message', methods=['POST'])
-def send_contact_message():
-    """Send contact form message to admin email"""
-    try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['name', 'email', 'subject', 'message']
-        if not data or not all(field in data for field in required_fields):
-            return jsonify({
-                'message': 'Missing required fields: name, email, subject, message'
-            }), 400
-        
-        name = data['name']
-        email = data['email']
-        subject = data['subject']
-        message_content = data['message']
-        
-        # Debug: Print current configuration
-        print("🔧 Email Configuration:")
-        print(f"  MAIL_SERVER: {current_app.config.get('MAIL_SERVER')}")
-        print(f"  MAIL_USERNAME: {current_app.config.get('MAIL_USERNAME')}")
-        print(f"  MAIL_DEFAULT_SENDER: {current_app.config.get('MAIL_DEFAULT_SENDER')}")
-        print(f"  MAIL_PASSWORD_SET: {bool(current_app.config.get('MAIL_PASSWORD'))}")
-        
-        # Create email message with fallback sender
-        sender = current_app.config.get('MAIL_DEFAULT_SENDER') or 'hillsmarket.official@gmail.com'
-        
-        msg = Message(
-            subject=f"Marketplace Contact: {subject}",
-            sender=sender,
-            recipients=['hillsmarket.official@gmail.com'],
-            reply_to=email
-        )
-        
-        # Email body
-        msg.body = f"""
+def _contact_email_body(name, email, subject, message, sent_at):
+    return f"""
 New Contact Form Message from Marketplace
 
 Name: {name}
@@ -50,26 +17,51 @@ Email: {email}
 Subject: {subject}
 
 Message:
-{message_content}
+{message}
 
 ---
 Sent from Marketplace Contact Form
-Timestamp: {datetime.utcnow()}
+Timestamp: {sent_at}
 """
+
+@task('send_contact_email', max_attempts=8)
+def send_contact_email(name, email, subject, message, sent_at):
+    """Background task kept for jobs queued before the outbox; moves them into it"""
+    queue_email(
+        subject=f"Marketplace Contact: {subject}",
+        body=_contact_email_body(name, email, subject, message, sent_at),
+        recipients=[CONTACT_ADDRESS],
+        reply_to=email
+    )
+
+@contact_bp.route('/send-message', methods=['POST'])
+def send_contact_message():
+    """Queue contact form message for delivery to admin email"""
+    try:
+        data = request.get_json()
         
-        # Send email
-        from flask_mail import Mail
-        mail = Mail(current_app)
-        mail.send(msg)
+        # Validate required fields
+        required_fields = ['name', 'email', 'subject', 'message']
+        if not data or not all(field in data for field in required_fields):
+            return jsonify({
+                'message': 'Missing required fields: name, email, subject, message'
+            }), 400
         
-        print(f"✅ Contact email sent from {name} ({email})")
+        # Persisted to the outbox; the mail sender process does the SMTP
+        queue_email(
+            subject=f"Marketplace Contact: {data['subject']}",
+            body=_contact_email_body(data['name'], data['email'], data['subject'],
+                                     data['message'], str(datetime.utcnow())),
+            recipients=[CONTACT_ADDRESS],
+            reply_to=data['email']
+        )
         
         return jsonify({
             'message': 'Thank you! Your message has been sent successfully.'
         }), 200
         
     except Exception as e:
-        print(f"❌ Error sending contact email: {str(e)}")
+        print(f"❌ Error queueing contact email: {str(e)}")
         import traceback
         print(f"❌ Stack trace: {traceback.format_exc()}")
         
@@ -79,11 +71,16 @@ Timestamp: {datetime.utcnow()}
         }), 500
 
 @contact_bp.route('/test-email', methods=['GET'])
-def test_email():
-    """Test endpoint to verify email configuration"""
+@token_required
+@admin_required
+def test_email(current_user):
+    """Test endpoint to verify email configuration.
+
+    The test email goes through the outbox like every other email, and
+    the response returns as soon as it is queued. Poll
+    /test-email/<email id> for the mail sender's verdict.
+    """
     try:
-        from flask_mail import Message
-        
         # Debug: Print current configuration
         print("🧪 Testing email configuration...")
         print(f"  MAIL_SERVER: {current_app.config.get('MAIL_SERVER')}")
@@ -91,16 +88,7 @@ def test_email():
         print(f"  MAIL_DEFAULT_SENDER: {current_app.config.get('MAIL_DEFAULT_SENDER')}")
         print(f"  MAIL_PASSWORD_SET: {bool(current_app.config.get('MAIL_PASSWORD'))}")
         
-        # Use fallback sender if config is missing
-        sender = current_app.config.get('MAIL_DEFAULT_SENDER') or 'hillsmarket.official@gmail.com'
-        
-        msg = Message(
-            subject="Test Email from Marketplace",
-            sender=sender,
-            recipients=['hillsmarket.official@gmail.com']
-        )
-        
-        msg.body = f"""
+        body = f"""
 This is a test email from your Marketplace application.
 
 If you're receiving this, your email configuration is working correctly!
@@ -112,15 +100,20 @@ Configuration:
 - Username: {current_app.config.get('MAIL_USERNAME')}
 """
         
-        mail = Mail(current_app)
-        mail.send(msg)
-        
-        print("✅ Test email sent successfully!")
+        email = queue_email(
+            subject="Test Email from Marketplace",
+            body=body,
+            recipients=[CONTACT_ADDRESS],
+            kind='test'
+        )
         
+        print("📮 Test email queued")
         return jsonify({
             'success': True,
-            'message': 'Test email sent successfully to hillsmarket.official@gmail.com'
-        }), 200
+            'message': f'Test email queued for {CONTACT_ADDRESS}; the mail sender delivers it',
+            'email': email.to_dict(),
+            'status_url': f'/api/contact/test-email/{email.id}'
+        }), 202
         
     except Exception as e:
         print(f"❌ Failed to send test email: {str(e)}")
@@ -139,6 +132,40 @@ Configuration:
             }
         }), 500
 
+@contact_bp.route('/test-email/<int:email_id>', methods=['GET'])
+@token_required
+@admin_required
+def test_email_status(current_user, email_id):
+    """Delivery status of a queued test email.
+
+    Pending emails are still retried, so an error on one is reported
+    without counting as a failure; only a failed email gets a 500.
+    """
+    email = OutboxEmail.query.filter_by(id=email_id, kind='test').first()
+    if not email:
+        return jsonify({'message': 'Test email not found'}), 404
+    
+    if email.status == OutboxEmail.STATUS_SENT:
+        return jsonify({
+            'success': True,
+            'message': f'Test email sent successfully to {CONTACT_ADDRESS}',
+            'email': email.to_dict()
+        }), 200
+    
+    if email.status == OutboxEmail.STATUS_FAILED:
+        return jsonify({
+            'success': False,
+            'message': 'Failed to send test email',
+            'error': email.last_error or 'Delivery failed',
+            'email': email.to_dict()
+        }), 500
+    
+    return jsonify({
+        'success': True,
+        'message': 'Test email not delivered yet',
+        'email': email.to_dict()
+    }), 202
+
 @contact_bp.route('/debug-email-config', methods=['GET'])
 def debug_email_config():
     """Debug endpoint to check email configuration"""
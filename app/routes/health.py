@@ -1,10 +1,38 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, current_app
+from app.utils.readiness import get_readiness
 
 health_bp = Blueprint('health', __name__)
 
+# Built once: the liveness probe runs constantly and should cost next to nothing
+LIVENESS_BODY = b'{"status":"alive","service":"Marketplace API"}'
+# /api/health keeps the body existing monitors check for
+HEALTH_BODY = b'{"status":"healthy","service":"Marketplace API"}'
+LIVENESS_HEADERS = {'Content-Type': 'application/json', 'Cache-Control': 'no-store'}
+
+
 @health_bp.route('/health')
 def health_check():
-    return jsonify({
-        'status': 'healthy',
-        'message': 'MarketPlace API is running'
-    })
\ No newline at end of file
+    """Liveness under the original path and body"""
+    return HEALTH_BODY, 200, LIVENESS_HEADERS
+
+
+@health_bp.route('/health/live')
+def liveness():
+    """Liveness: the process answers HTTP. No database, no disk"""
+    return LIVENESS_BODY, 200, LIVENESS_HEADERS
+
+
+@health_bp.route('/health/ready')
+def readiness():
+    """Readiness: database and upload storage, plus pool and replica details (503 when not ready)"""
+    try:
+        result = get_readiness()
+        status = 200 if result['ready'] else 503
+        response = jsonify(dict(result, status='ready' if result['ready'] else 'unavailable'))
+    except Exception as e:
+        current_app.logger.exception('Readiness check failed')
+        response, status = jsonify({'status': 'unavailable', 'ready': False, 'error': str(e)}), 503
+
+    response.status_code = status
+    response.cache_control.no_store = True
+    return response
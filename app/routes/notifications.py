@@ -3,12 +3,16 @@ from app import db
 from app.models.notification import Notification
 from app.models.user import User
 from app.utils.auth import token_required, admin_required
+from app.utils.jobs import task, enqueue
+from app.utils.replica import replica_safe
+from sqlalchemy import insert, select, literal, true, false
 from datetime import datetime
 
 notifications_bp = Blueprint('notifications', __name__)
 
 @notifications_bp.route('/', methods=['GET'])
 @token_required
+@replica_safe
 def get_user_notifications(current_user):
     """Get notifications for current user"""
     try:
@@ -78,35 +82,45 @@ def mark_all_as_read(current_user):
         db.session.rollback()
         return jsonify({'message': 'Error updating notifications', 'error': str(e)}), 500
 
+@task('broadcast_notification')
+def broadcast_notification_task(message, created_at):
+    """Background task: fan a broadcast out to every active user.
+
+    One INSERT ... SELECT, so no user rows are loaded into Python, and a
+    failed attempt leaves no partial fan-out behind to duplicate on retry.
+    """
+    created_at = datetime.fromisoformat(created_at)
+    db.session.execute(
+        insert(Notification).from_select(
+            ['user_id', 'message', 'is_read', 'is_admin_notification', 'created_at'],
+            select(User.id, literal(message), false(), true(), literal(created_at))
+            .where(User.is_active == True)
+        )
+    )
+    db.session.commit()
+
 @notifications_bp.route('/broadcast', methods=['POST'])
 @token_required
 @admin_required
 def broadcast_notification(current_user):
-    """Send notification to all users (admin only)"""
+    """Send notification to all users (admin only) - fan-out runs in the background"""
     try:
         data = request.get_json()
         
         if not data or not data.get('message'):
             return jsonify({'message': 'Notification message is required'}), 400
         
-        # Get all active users
-        users = User.query.filter_by(is_active=True).all()
+        users_count = User.query.filter_by(is_active=True).count()
         
-        # Create notifications for each user
-        for user in users:
-            notification = Notification(
-                user_id=user.id,
-                message=data['message'],
-                is_admin_notification=True
-            )
-            db.session.add(notification)
-        
-        db.session.commit()
+        enqueue('broadcast_notification', {
+            'message': data['message'],
+            'created_at': datetime.utcnow().isoformat()
+        })
         
         return jsonify({
-            'message': f'Notification sent to {len(users)} users',
-            'users_notified': len(users)
-        }), 201
+            'message': f'Notification queued for {users_count} users',
+            'users_notified': users_count
+        }), 202
         
     except Exception as e:
         db.session.rollback()
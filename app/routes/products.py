@@ -1,48 +1,27 @@
 from flask import Blueprint, request, jsonify, current_app
 from app import db
 from app.models.product import Product
+from app.models.product_archive import ProductArchive
+from app.models.product_stats import ProductStats
+from app.models.similar_product import SimilarProduct
 from app.models.category import Category
 from app.models.user import User
+from app.models.uploaded_image import UploadedImage
 from app.utils.auth import token_required
+from app.utils.replica import replica_safe
+from app.utils.images import attach_product_images, release_uploaded_images
+from app.utils.jobs import task, enqueue
+from app.utils.listings import listing_expires_at
+import app.utils.saved_searches  # registers the match_saved_searches task
+from app.utils.similar import similar_listings
+from app.utils.views import record_view, product_views
+from app.utils.storage import get_storage
+from app.utils.uploads import (
+    store_upload, reference_stored_files, release_stored_files, storage_key,
+    presign_upload, complete_direct_upload, UploadTooLarge
+)
 from datetime import datetime
-import os
-import uuid
 import json  # ADD THIS IMPORT
-from werkzeug.utils import secure_filename
-
-import os
-
-def delete_product_images(image_urls):
-    """Delete physical image files from uploads folder"""
-    try:
-        deleted_files = []
-        for image_url in image_urls:
-            if image_url and isinstance(image_url, str):
-                # Extract filename from URL
-                if image_url.startswith('/uploads/products/'):
-                    filename = image_url.split('/')[-1]
-                    file_path = os.path.join('uploads', 'products', filename)
-                elif image_url.startswith('http') and '/uploads/products/' in image_url:
-                    filename = image_url.split('/uploads/products/')[-1]
-                    file_path = os.path.join('uploads', 'products', filename)
-                else:
-                    continue
-                
-                # Delete the file if it exists
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    deleted_files.append(filename)
-                    print(f"✅ Deleted image file: {filename}")
-                else:
-                    print(f"⚠️ Image file not found: {file_path}")
-        
-        print(f"🗑️ Cleaned up {len(deleted_files)} image files")
-        return deleted_files
-        
-    except Exception as e:
-        print(f"❌ Error deleting image files: {str(e)}")
-        return []
-
 
 # Create the blueprint first
 products_bp = Blueprint('products', __name__)
@@ -55,6 +34,7 @@ def allowed_file(filename):
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 @products_bp.route('/', methods=['GET'])
+@replica_safe
 def get_products():
     """Get all active products with optional filtering"""
     try:
@@ -133,6 +113,7 @@ def get_products():
         }), 500
 
 @products_bp.route('/<int:product_id>', methods=['GET'])
+@replica_safe
 def get_product(product_id):
     """Get single product details"""
     try:
@@ -141,6 +122,9 @@ def get_product(product_id):
         if not product:
             return jsonify({'message': 'Product not found'}), 404
         
+        # Buffered in memory and written in batches, so this read stays a read
+        record_view(product.id)
+        
         return jsonify({
             'product': product.to_dict()
         }), 200
@@ -148,6 +132,24 @@ def get_product(product_id):
     except Exception as e:
         return jsonify({'message': 'Error fetching product', 'error': str(e)}), 500
 
+@products_bp.route('/<int:product_id>/similar', methods=['GET'])
+@replica_safe
+def get_similar_products(product_id):
+    """Get listings similar to a product, from the precomputed index"""
+    try:
+        limit = request.args.get('limit', 6, type=int)
+        limit = max(1, min(limit, current_app.config.get('SIMILAR_LISTINGS_COUNT', 12)))
+        similar = similar_listings(product_id, limit)
+        
+        return jsonify({
+            'product_id': product_id,
+            'similar': similar,
+            'total': len(similar)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching similar products', 'error': str(e)}), 500
+
 @products_bp.route('/', methods=['POST'])
 @token_required
 def create_product(current_user):
@@ -201,10 +203,18 @@ def create_product(current_user):
             price=data.get('price'),
             location=data['location'].strip(),  # ADD THIS LINE
             image_urls=image_urls,
-            contact_info=data['contact_info'].strip()
+            contact_info=data['contact_info'].strip(),
+            expires_at=listing_expires_at()
         )
         
         db.session.add(new_product)
+        attach_product_images(new_product)
+        # Each product using a stored file is one reference to it
+        reference_stored_files(dict.fromkeys(image_urls))
+        db.session.flush()
+        # Saved-search alerts and similar listings are worked out in the job worker
+        enqueue('match_saved_searches', {'product_id': new_product.id}, commit=False)
+        enqueue('update_similar_products', {'product_id': new_product.id}, commit=False)
         db.session.commit()
         
         # Return the created product with proper data
@@ -238,36 +248,94 @@ def upload_product_image(current_user):
             return jsonify({'message': 'No image selected'}), 400
         
         if file and allowed_file(file.filename):
-            # Use absolute path for production
-            upload_folder = os.path.join(current_app.root_path, 'uploads', 'products')
-            os.makedirs(upload_folder, exist_ok=True)
-            
-            # Generate unique filename
-            filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4().hex}_{filename}"
-            file_path = os.path.join(upload_folder, unique_filename)
+            # Content-addressed: identical photos are stored once
+            extension = file.filename.rsplit('.', 1)[1].lower()
+            image_url, created = store_upload(file, extension)
             
-            # Save file
-            file.save(file_path)
+            uploaded_image = _register_upload(image_url, current_user)
+            db.session.commit()
             
-            # Return the URL path for accessing the image
-            image_url = f"/uploads/products/{unique_filename}"
-            
-            print(f"✅ Image uploaded successfully: {image_url}")
-            print(f"📁 File saved at: {file_path}")
+            print(f"✅ Image uploaded successfully: {image_url} ({'new' if created else 'deduplicated'})")
             
             return jsonify({
                 'message': 'Image uploaded successfully',
-                'image_url': image_url
+                'image_url': image_url,
+                'image_id': uploaded_image.id
             }), 200
         else:
             return jsonify({'message': 'Invalid file type. Allowed: png, jpg, jpeg, gif, webp'}), 400
             
     except Exception as e:
+        db.session.rollback()
         print(f"❌ Error uploading image: {str(e)}")
         return jsonify({'message': 'Error uploading image', 'error': str(e)}), 500
 
-# ... rest of your products.py routes remain the same
+def _register_upload(image_url, user):
+    # Resized WebP/JPEG variants are built by the job worker, once per content
+    uploaded_image = UploadedImage.query.filter_by(url=image_url).first()
+    if uploaded_image is None:
+        uploaded_image = UploadedImage(url=image_url, user_id=user.id)
+        db.session.add(uploaded_image)
+        db.session.flush()
+        enqueue('process_product_image', {'image_id': uploaded_image.id}, commit=False)
+    return uploaded_image
+
+
+@products_bp.route('/upload-url', methods=['POST'])
+@token_required
+def create_upload_url(current_user):
+    """Presigned PUT so the client uploads an image straight to storage"""
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename', '')
+        digest = str(data.get('sha256', '')).lower()
+        size = data.get('size')
+        
+        if not allowed_file(filename):
+            return jsonify({'message': 'Invalid file type. Allowed: png, jpg, jpeg, gif, webp'}), 400
+        if len(digest) != 64 or any(c not in '0123456789abcdef' for c in digest):
+            return jsonify({'message': 'sha256 of the file is required'}), 400
+        if not isinstance(size, int) or size <= 0 or size > current_app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'message': 'File size is missing or too large'}), 400
+        
+        extension = filename.rsplit('.', 1)[1].lower()
+        result = presign_upload(digest, extension, size, current_app.config.get('PRESIGNED_UPLOAD_EXPIRES', 900))
+        
+        return jsonify(result), 200
+        
+    except Exception as e:
+        print(f"❌ Error creating upload URL: {str(e)}")
+        return jsonify({'message': 'Error creating upload URL', 'error': str(e)}), 500
+
+
+@products_bp.route('/upload-complete', methods=['POST'])
+@token_required
+def complete_upload(current_user):
+    """Record an image the client has uploaded with a presigned URL"""
+    try:
+        data = request.get_json() or {}
+        try:
+            image_url = complete_direct_upload(data.get('key'), current_app.config['MAX_CONTENT_LENGTH'])
+        except UploadTooLarge:
+            return jsonify({'message': 'File too large'}), 413
+        if image_url is None:
+            return jsonify({'message': 'Upload not found'}), 404
+        
+        uploaded_image = _register_upload(image_url, current_user)
+        db.session.commit()
+        
+        print(f"✅ Direct upload recorded: {image_url}")
+        
+        return jsonify({
+            'message': 'Image uploaded successfully',
+            'image_url': image_url,
+            'image_id': uploaded_image.id
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error completing upload: {str(e)}")
+        return jsonify({'message': 'Error completing upload', 'error': str(e)}), 500
 
 @products_bp.route('/<int:product_id>', methods=['PUT'])
 @token_required
@@ -301,17 +369,24 @@ def update_product(current_user, product_id):
         if 'image_urls' in data:
             # Find images that were removed
             new_image_urls = data['image_urls'] or []
-            removed_images = [url for url in old_image_urls if url not in new_image_urls]
+            removed_images = [url for url in dict.fromkeys(old_image_urls) if url not in new_image_urls]
+            added_images = [url for url in dict.fromkeys(new_image_urls) if url not in old_image_urls]
             
-            # Delete removed image files
+            # Delete removed image files once this update is committed
             if removed_images:
-                delete_product_images(removed_images)
+                enqueue('delete_product_images', {'image_urls': removed_images}, commit=False)
+            reference_stored_files(added_images)
             
             product.image_urls = new_image_urls
+            attach_product_images(product)
         if 'contact_info' in data:
             product.contact_info = data['contact_info'].strip()
+        if 'is_sold' in data:
+            product.is_sold = bool(data['is_sold'])
         if 'is_active' in data and current_user.is_admin:
             product.is_active = data['is_active']
+        if any(field in data for field in ('name', 'description', 'category_id', 'is_active')):
+            enqueue('update_similar_products', {'product_id': product.id}, commit=False)
         
         product.updated_at = datetime.utcnow()
         db.session.commit()
@@ -325,6 +400,37 @@ def update_product(current_user, product_id):
         db.session.rollback()
         return jsonify({'message': 'Error updating product', 'error': str(e)}), 500
 
+@products_bp.route('/<int:product_id>/renew', methods=['POST'])
+@token_required
+def renew_product(current_user, product_id):
+    """Extend a listing by LISTING_TTL_DAYS; reactivates it if it had expired"""
+    try:
+        product = Product.query.get_or_404(product_id)
+        
+        if product.user_id != current_user.id and not current_user.is_admin:
+            return jsonify({'message': 'Unauthorized to renew this product'}), 403
+        if product.is_sold:
+            return jsonify({'message': 'Sold listings cannot be renewed'}), 400
+        if not product.is_active and not product.expired:
+            return jsonify({'message': 'This listing was deactivated by an administrator'}), 400
+        
+        product.expires_at = listing_expires_at()
+        if product.expired:
+            product.is_active = True
+            product.expired = False
+            enqueue('update_similar_products', {'product_id': product.id}, commit=False)
+        product.updated_at = datetime.utcnow()
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Product renewed successfully',
+            'product': product.to_dict()
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error renewing product', 'error': str(e)}), 500
+
 @products_bp.route('/<int:product_id>', methods=['DELETE'])
 @token_required
 def delete_product(current_user, product_id):
@@ -336,21 +442,20 @@ def delete_product(current_user, product_id):
         if product.user_id != current_user.id and not current_user.is_admin:
             return jsonify({'message': 'Unauthorized to delete this product'}), 403
         
-        # Store image URLs for cleanup
-        image_urls = product.image_urls or []
+        # Store image URLs for cleanup (one reference each, however often listed)
+        image_urls = list(dict.fromkeys(product.image_urls or []))
         
-        # HARD DELETE - Remove from database
+        # HARD DELETE - Remove from database; image files go in the background
+        ProductStats.query.filter_by(product_id=product.id).delete(synchronize_session=False)
+        SimilarProduct.query.filter_by(product_id=product.id).delete(synchronize_session=False)
         db.session.delete(product)
-        db.session.commit()
-        
-        # Delete physical image files
-        deleted_files = []
         if image_urls:
-            deleted_files = delete_product_images(image_urls)
+            enqueue('delete_product_images', {'image_urls': image_urls}, commit=False)
+        db.session.commit()
         
         return jsonify({
             'message': 'Product deleted successfully',
-            'deleted_images_count': len(deleted_files)
+            'queued_images_count': len(image_urls)
         }), 200
         
     except Exception as e:
@@ -359,40 +464,45 @@ def delete_product(current_user, product_id):
 
 # Improve the delete_product_images function
 def delete_product_images(image_urls):
-    """Delete physical image files from uploads folder - PRODUCTION READY"""
+    """Release product images and delete the files nothing references any more.
+
+    Uploads are content-addressed and shared between products, so a file
+    (and its variants) is only unlinked once no product uses it. Pass each
+    product's URLs once.
+    """
     try:
         deleted_files = []
-        for image_url in image_urls:
-            if image_url and isinstance(image_url, str):
-                # Extract filename from URL
-                filename = None
-                
-                if image_url.startswith('/uploads/products/'):
-                    filename = image_url.split('/')[-1]
-                elif image_url.startswith('http') and '/uploads/products/' in image_url:
-                    filename = image_url.split('/uploads/products/')[-1].split('?')[0]
+        unreferenced = release_uploaded_images(release_stored_files(image_urls))
+        storage = get_storage()
+        
+        for image_url in unreferenced:
+            key = storage_key(image_url)
+            if key:
+                # Delete the file if it exists
+                if storage.delete(key):
+                    deleted_files.append(key)
+                    print(f"✅ Deleted image file: {key}")
                 else:
-                    filename = image_url
-                
-                if filename:
-                    # Use absolute path for production
-                    file_path = os.path.join(current_app.root_path, 'uploads', 'products', filename)
-                    
-                    # Delete the file if it exists
-                    if os.path.exists(file_path):
-                        os.remove(file_path)
-                        deleted_files.append(filename)
-                        print(f"✅ Deleted image file: {filename}")
-                    else:
-                        print(f"⚠️ Image file not found: {file_path}")
+                    print(f"⚠️ Image file not found: {key}")
         
         print(f"🗑️ Cleaned up {len(deleted_files)} image files")
         return deleted_files
         
     except Exception as e:
+        db.session.rollback()
         print(f"❌ Error deleting image files: {str(e)}")
         return []
 
+@task('delete_product_images')
+def delete_product_images_task(image_urls):
+    """Background task: unlink image files of deleted/edited products"""
+    delete_product_images(image_urls)
+
+def _with_views(products):
+    """to_dict() of each product plus its view count (one query for the page)"""
+    views = product_views(product.id for product in products)
+    return [dict(product.to_dict(), views=views.get(product.id, 0)) for product in products]
+
 @products_bp.route('/user/products', methods=['GET'])
 @token_required
 def get_user_products(current_user):
@@ -406,7 +516,7 @@ def get_user_products(current_user):
             .paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
-            'products': [product.to_dict() for product in products.items],
+            'products': _with_views(products.items),
             'total': products.total,
             'pages': products.pages,
             'current_page': page
@@ -427,7 +537,7 @@ def get_my_products(current_user):
             .paginate(page=page, per_page=per_page, error_out=False)
         
         return jsonify({
-            'products': [product.to_dict() for product in products.items],
+            'products': _with_views(products.items),
             'total': products.total,
             'pages': products.pages,
             'current_page': page
@@ -436,6 +546,45 @@ def get_my_products(current_user):
     except Exception as e:
         return jsonify({'message': 'Error fetching user products', 'error': str(e)}), 500    
     
+@products_bp.route('/user/archive', methods=['GET'])
+@token_required
+def get_user_archived_products(current_user):
+    """Get the current user's archived (sold, expired or deactivated) listings"""
+    try:
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', 20, type=int)
+        
+        products = ProductArchive.query.filter_by(user_id=current_user.id)\
+            .order_by(ProductArchive.archived_at.desc())\
+            .paginate(page=page, per_page=per_page, error_out=False)
+        
+        return jsonify({
+            'products': _with_views(products.items),
+            'total': products.total,
+            'pages': products.pages,
+            'current_page': page
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching archived products', 'error': str(e)}), 500
+
+@products_bp.route('/archive/<int:product_id>', methods=['GET'])
+@token_required
+def get_archived_product(current_user, product_id):
+    """Get one archived listing (owner or admin only)"""
+    try:
+        product = db.session.get(ProductArchive, product_id)
+        
+        if not product or (product.user_id != current_user.id and not current_user.is_admin):
+            return jsonify({'message': 'Product not found'}), 404
+        
+        return jsonify({
+            'product': product.to_dict()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'message': 'Error fetching archived product', 'error': str(e)}), 500
+    
 @products_bp.route('/test', methods=['GET'])
 def test_products():
     """Test endpoint to verify Product model works"""
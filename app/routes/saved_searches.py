@@ -0,0 +1,102 @@
+from flask import Blueprint, request, jsonify, current_app
+from app import db
+from app.models.saved_search import SavedSearch
+from app.models.category import Category
+from app.utils.auth import token_required
+from app.utils.replica import replica_safe
+
+saved_searches_bp = Blueprint('saved_searches', __name__)
+
+def _price(value):
+    """A non-negative price from the request, or None when left out"""
+    if value is None or value == '':
+        return None
+    price = float(value)
+    if price < 0:
+        raise ValueError('Prices cannot be negative')
+    return price
+
+@saved_searches_bp.route('/', methods=['GET'])
+@token_required
+@replica_safe
+def get_saved_searches(current_user):
+    """Get the current user's saved searches"""
+    try:
+        searches = SavedSearch.query.filter_by(user_id=current_user.id, is_active=True)\
+            .order_by(SavedSearch.created_at.desc()).all()
+
+        return jsonify({
+            'saved_searches': [search.to_dict() for search in searches],
+            'total': len(searches)
+        }), 200
+
+    except Exception as e:
+        return jsonify({'message': 'Error fetching saved searches', 'error': str(e)}), 500
+
+@saved_searches_bp.route('/', methods=['POST'])
+@token_required
+def create_saved_search(current_user):
+    """Save a search; new listings matching it notify the user"""
+    try:
+        data = request.get_json(force=True) or {}
+
+        keywords = (data.get('keywords') or '').strip() or None
+        location = (data.get('location') or '').strip() or None
+        category_id = data.get('category_id') or None
+        try:
+            min_price = _price(data.get('min_price'))
+            max_price = _price(data.get('max_price'))
+        except (TypeError, ValueError) as e:
+            return jsonify({'message': f'Invalid price: {str(e)}'}), 400
+
+        if not any((keywords, location, category_id, min_price is not None, max_price is not None)):
+            return jsonify({'message': 'Give at least one of keywords, category_id, location, min_price, max_price'}), 400
+        if keywords and len(keywords) > 200:
+            return jsonify({'message': 'Keywords must be at most 200 characters'}), 400
+        if min_price is not None and max_price is not None and min_price > max_price:
+            return jsonify({'message': 'min_price cannot be above max_price'}), 400
+        if category_id and not db.session.get(Category, category_id):
+            return jsonify({'message': 'Invalid category'}), 400
+
+        limit = current_app.config.get('SAVED_SEARCH_LIMIT_PER_USER', 20)
+        if SavedSearch.query.filter_by(user_id=current_user.id, is_active=True).count() >= limit:
+            return jsonify({'message': f'You can keep at most {limit} saved searches'}), 400
+
+        search = SavedSearch(
+            user_id=current_user.id,
+            keywords=keywords,
+            category_id=category_id,
+            location=location,
+            min_price=min_price,
+            max_price=max_price
+        )
+        db.session.add(search)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Search saved',
+            'saved_search': search.to_dict()
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error saving search', 'error': str(e)}), 500
+
+@saved_searches_bp.route('/<int:search_id>', methods=['DELETE'])
+@token_required
+def delete_saved_search(current_user, search_id):
+    """Delete a saved search (deactivated, so the matching index sees the change)"""
+    try:
+        search = SavedSearch.query.filter_by(id=search_id, user_id=current_user.id, is_active=True).first()
+
+        if not search:
+            return jsonify({'message': 'Saved search not found'}), 404
+
+        search.is_active = False
+        db.session.commit()
+
+        return jsonify({'message': 'Saved search deleted'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Error deleting saved search', 'error': str(e)}), 500
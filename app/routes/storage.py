@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify, current_app
+from app.utils.storage import get_storage
+from app.utils.uploads import save_verified_upload
+
+storage_bp = Blueprint('storage', __name__)
+
+
+@storage_bp.route('/local-upload/<token>', methods=['PUT'])
+def local_upload(token):
+    """Presigned PUT target for the local storage backend.
+
+    Plays the part S3/MinIO play in production so the direct-upload flow
+    works the same everywhere. The token names the key and the declared
+    size; the body must hash to the SHA-256 in the key and be no larger.
+    """
+    storage = get_storage()
+    if not storage.is_local:
+        return jsonify({'message': 'Not found'}), 404
+
+    data = storage.verify_upload_token(token)
+    if data is None:
+        return jsonify({'message': 'Upload URL is invalid or has expired'}), 403
+
+    try:
+        max_size = min(filter(None, (data.get('size'), current_app.config.get('MAX_CONTENT_LENGTH'))), default=None)
+        if not save_verified_upload(data['key'], request.stream, max_size):
+            return jsonify({'message': 'Upload does not match the requested file'}), 400
+        return '', 200
+    except Exception as e:
+        print(f"❌ Error storing direct upload: {str(e)}")
+        return jsonify({'message': 'Error storing upload', 'error': str(e)}), 500
@@ -0,0 +1,67 @@
+from flask import Blueprint, current_app, send_file, abort, redirect
+from werkzeug.security import safe_join
+from app.utils.storage import get_storage
+from app.utils.uploads import CONTENT_KEY
+
+uploads_bp = Blueprint('uploads', __name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+@uploads_bp.route('/<path:filename>')
+def serve_uploads(filename):
+    """Serve uploaded files.
+
+    In 'x-accel-redirect' / 'x-sendfile' mode the front proxy does the
+    transfer and the worker only returns headers. In 'direct' mode the file
+    is sent with a strong ETag, conditional GET and byte-range support.
+    With object storage the client is redirected to the stored copy.
+    """
+    storage = get_storage()
+    if not storage.is_local:
+        match = CONTENT_KEY.match(filename)
+        response = redirect(storage.url(filename), code=301 if match else 302)
+        if match:
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        return response
+
+    uploads_root = current_app.config['UPLOADS_ROOT']
+    file_path = safe_join(uploads_root, filename)
+    if file_path is None:
+        abort(404)
+
+    match = CONTENT_KEY.match(filename)
+    mode = current_app.config.get('UPLOADS_SERVE_MODE', 'direct')
+
+    if mode in ('x-accel-redirect', 'x-sendfile'):
+        response = current_app.response_class()
+        if mode == 'x-accel-redirect':
+            response.headers['X-Accel-Redirect'] = current_app.config['UPLOADS_ACCEL_PREFIX'].rstrip('/') + '/' + filename
+        else:
+            response.headers['X-Sendfile'] = file_path
+        # The proxy picks the type from the file
+        del response.headers['Content-Type']
+    else:
+        try:
+            response = send_file(
+                file_path,
+                # The content hash is the strongest possible ETag; others use mtime/size
+                etag=match.group(2) + (match.group(3) or '') if match else True,
+                conditional=True,
+                max_age=None
+            )
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return "File not found", 404
+        response.headers['Accept-Ranges'] = 'bytes'
+
+    response.cache_control.no_cache = None
+    if match:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.public = True
+        response.cache_control.max_age = current_app.config.get('UPLOADS_MAX_AGE', 86400)
+
+    return response
@@ -0,0 +1,198 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from flask import current_app, request
+
+# Precompressed siblings, in order of preference: (Content-Encoding, suffix)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Worth compressing at build time; images are compressed already
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.svg', '.txt', '.map', '.xml'}
+
+# Long-lived caching only for these top-level folders
+CACHEABLE_DIRS = ('css/', 'js/', 'images/')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# href="css/style.css" / src="js/main.js" in HTML, rewritten to ?v=<etag> URLs
+ASSET_REFERENCE = re.compile(r'''((?:href|src)=["'])((?:css|js|images)/[^"'?#]+)(["'])''')
+
+
+class Asset:
+    """One file of the frontend, held in memory"""
+
+    def __init__(self, path, body, mtime):
+        self.path = path
+        self.body = body
+        self.size = len(body)
+        self.mtime = mtime
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type in ('application/javascript', 'application/json'):
+            self.content_type += '; charset=utf-8'
+        # Content-Encoding -> compressed body
+        self.encoded = {}
+
+
+def _fingerprint_references(asset, assets):
+    """Copy of an HTML asset with its css/js/images references pointing at ?v=<etag>"""
+    def fingerprint(match):
+        target = assets.get(match.group(2))
+        if target is None:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}?v={target.etag}{match.group(3)}"
+
+    body = ASSET_REFERENCE.sub(fingerprint, asset.body.decode('utf-8')).encode('utf-8')
+    if body == asset.body:
+        return asset
+
+    rewritten = Asset(asset.path, body, asset.mtime)
+    # Precompressed siblings hold the old body; compress the new one here
+    rewritten.encoded['gzip'] = gzip.compress(body, 9)
+    try:
+        import brotli
+        rewritten.encoded['br'] = brotli.compress(body, quality=11)
+    except ImportError:
+        pass
+    return rewritten
+
+
+class StaticManifest:
+    """Paths, sizes, mtimes and hashes of the frontend, scanned once.
+
+    Requests are answered from memory, so neither deep links nor assets
+    touch the filesystem. .br/.gz files next to an asset (see `flask
+    assets compress`) are picked up as precompressed variants, unless they
+    are older than the asset itself.
+
+    References from HTML to css/, js/ and images/ files are rewritten to
+    fingerprinted ?v=<etag> URLs, so a deploy changes the URLs index.html
+    asks for and browsers never pair it with stale cached assets.
+    """
+
+    def __init__(self, root, index='index.html'):
+        self.root = root
+        self.index = index
+        self.assets = {}
+        self.scan()
+
+    def scan(self):
+        assets = {}
+        encoded_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(encoded_suffixes):
+                    continue
+                full_path = os.path.join(directory, filename)
+                path = os.path.relpath(full_path, self.root).replace(os.sep, '/')
+                with open(full_path, 'rb') as f:
+                    asset = Asset(path, f.read(), os.path.getmtime(full_path))
+
+                for encoding, suffix in ENCODINGS:
+                    encoded_path = full_path + suffix
+                    if os.path.isfile(encoded_path) and os.path.getmtime(encoded_path) >= asset.mtime:
+                        with open(encoded_path, 'rb') as f:
+                            asset.encoded[encoding] = f.read()
+
+                assets[path] = asset
+
+        for path, asset in list(assets.items()):
+            if path.endswith('.html'):
+                assets[path] = _fingerprint_references(asset, assets)
+
+        self.assets = assets
+        return self
+
+    def get(self, path):
+        return self.assets.get(path)
+
+    def response(self, path):
+        """Response for a frontend path; unknown paths get index.html (SPA routing)"""
+        asset = self.assets.get(path)
+        if asset is None:
+            asset = self.assets.get(self.index)
+            if asset is None:
+                return current_app.response_class('Not found', status=404)
+
+        accepted = request.accept_encodings
+        encoding = next((name for name, _ in ENCODINGS if name in asset.encoded and accepted[name]), None)
+        body = asset.encoded[encoding] if encoding else asset.body
+
+        response = current_app.response_class(body, content_type=asset.content_type)
+        # Each encoding is a different representation, so it gets its own ETag
+        response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+        response.last_modified = asset.mtime
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if asset.encoded:
+            response.vary.add('Accept-Encoding')
+
+        if asset.path.startswith(CACHEABLE_DIRS):
+            response.cache_control.public = True
+            max_age = current_app.config.get('STATIC_MAX_AGE', 0)
+            if request.args.get('v') == asset.etag:
+                # Fingerprinted URL: the content can never change
+                response.cache_control.max_age = IMMUTABLE_MAX_AGE
+                response.cache_control.immutable = True
+            elif max_age:
+                response.cache_control.max_age = max_age
+            else:
+                # Plain URL: its content changes with each deploy, so revalidate (304s)
+                response.cache_control.no_cache = True
+        else:
+            # index.html and friends: always revalidate, answered with 304s
+            response.cache_control.no_cache = True
+
+        return response.make_conditional(request, accept_ranges=True, complete_length=len(body))
+
+
+def get_static_manifest():
+    """The app's manifest; rescanned per request when STATIC_MANIFEST_RELOAD is on"""
+    manifest = current_app.extensions.get('static_manifest')
+    if manifest is None:
+        manifest = current_app.extensions['static_manifest'] = StaticManifest(current_app.static_folder)
+    elif current_app.config.get('STATIC_MANIFEST_RELOAD'):
+        manifest.scan()
+    return manifest
+
+
+def compress_assets(root, brotli_quality=11, gzip_level=9, log=print):
+    """Write .gz (and .br, if the brotli package is installed) next to text assets.
+
+    Meant to run at build/deploy time; compressed files smaller than the
+    original are kept, others are removed. Returns {path: {encoding: size}}.
+    """
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        log("⚠️ brotli is not installed, writing gzip only")
+
+    written = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if os.path.splitext(filename)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            full_path = os.path.join(directory, filename)
+            with open(full_path, 'rb') as f:
+                body = f.read()
+
+            outputs = {'gzip': ('.gz', gzip.compress(body, compresslevel=gzip_level, mtime=0))}
+            if brotli is not None:
+                outputs['br'] = ('.br', brotli.compress(body, quality=brotli_quality))
+
+            path = os.path.relpath(full_path, root).replace(os.sep, '/')
+            for encoding, (suffix, compressed) in outputs.items():
+                if len(compressed) >= len(body):
+                    if os.path.exists(full_path + suffix):
+                        os.remove(full_path + suffix)
+                    continue
+                with open(full_path + suffix, 'wb') as f:
+                    f.write(compressed)
+                written.setdefault(path, {})[encoding] = len(compressed)
+            log(f"🗜️ {path}: {len(body)} bytes -> {written.get(path, {})}")
+
+    return written
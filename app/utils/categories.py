@@ -0,0 +1,138 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select, func, case
+from app import db
+from app.models.category import Category
+from app.models.product import Product
+from app.models.cache_version import CacheVersion
+from datetime import datetime
+
+CATEGORIES_CACHE_NAME = 'categories'
+
+# Process-level cache of the serialized public category list
+_cache_lock = threading.Lock()
+_cache = {
+    'version': None,
+    'checked_at': 0.0,
+    'body': None
+}
+
+
+def category_product_counts():
+    """Product counts per category in one GROUP BY.
+
+    Returns {category_id: (total_count, active_count)}.
+    """
+    rows = db.session.execute(
+        select(
+            Product.category_id,
+            func.count(Product.id),
+            func.coalesce(func.sum(case((Product.is_active == True, 1), else_=0)), 0)
+        ).group_by(Product.category_id)
+    )
+    return {category_id: (int(total), int(active)) for category_id, total, active in rows}
+
+
+def _current_version():
+    version = db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == CATEGORIES_CACHE_NAME)
+    ).scalar()
+    return version or 0
+
+
+def bump_categories_version():
+    """Invalidate the category list in every worker.
+
+    Runs inside the caller's transaction, so the new version becomes
+    visible together with the category change on commit. An upsert, so
+    the first writers on a fresh database cannot both insert the row.
+    """
+    table = CacheVersion.__table__
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(name=CATEGORIES_CACHE_NAME, version=1, updated_at=now)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': table.c.version + 1, 'updated_at': now}
+        ))
+    else:
+        # Generic fallback: update, insert the row if it does not exist yet
+        result = db.session.execute(
+            table.update()
+            .where(table.c.name == CATEGORIES_CACHE_NAME)
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            db.session.execute(table.insert().values(name=CATEGORIES_CACHE_NAME, version=1, updated_at=now))
+
+    # This process can drop its copy right away instead of waiting for the TTL
+    with _cache_lock:
+        _cache['checked_at'] = 0.0
+
+
+def get_cached_categories():
+    """Return (version, json_body) for the public category list.
+
+    The version stamp is only re-read after CATEGORY_CACHE_TTL seconds, and
+    the list is only re-queried and re-serialized when the stamp has moved.
+    """
+    ttl = current_app.config.get('CATEGORY_CACHE_TTL', 5)
+    now = time.monotonic()
+
+    with _cache_lock:
+        if _cache['body'] is not None and now - _cache['checked_at'] < ttl:
+            return _cache['version'], _cache['body']
+
+    version = _current_version()
+
+    with _cache_lock:
+        if _cache['body'] is not None and _cache['version'] == version:
+            _cache['checked_at'] = now
+            return version, _cache['body']
+
+    categories = Category.query.order_by(Category.name).all()
+    body = current_app.json.dumps({
+        'categories': [category.to_dict() for category in categories]
+    })
+
+    with _cache_lock:
+        _cache.update(version=version, checked_at=now, body=body)
+
+    return version, body
+
+
+async def get_cached_categories_async(session):
+    """get_cached_categories() over an AsyncSession, for the ASGI read path (app/asgi.py)"""
+    ttl = current_app.config.get('CATEGORY_CACHE_TTL', 5)
+    now = time.monotonic()
+
+    with _cache_lock:
+        if _cache['body'] is not None and now - _cache['checked_at'] < ttl:
+            return _cache['version'], _cache['body']
+
+    version = (await session.scalar(
+        select(CacheVersion.version).where(CacheVersion.name == CATEGORIES_CACHE_NAME)
+    )) or 0
+
+    with _cache_lock:
+        if _cache['body'] is not None and _cache['version'] == version:
+            _cache['checked_at'] = now
+            return version, _cache['body']
+
+    categories = (await session.scalars(select(Category).order_by(Category.name))).all()
+    body = current_app.json.dumps({
+        'categories': [category.to_dict() for category in categories]
+    })
+
+    with _cache_lock:
+        _cache.update(version=version, checked_at=now, body=body)
+
+    return version, body
@@ -0,0 +1,155 @@
+import gzip
+import zlib
+from flask import request
+
+# Mimetypes worth compressing; images and uploads are compressed already
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/csv',
+    'text/event-stream'
+}
+
+
+def _load_brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def _load_zstd():
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+class Compressor:
+    """Negotiated gzip/br/zstd compression of responses.
+
+    Brotli and zstd are used when their packages (brotli, zstandard) are
+    installed; gzip always works. Installed as an after_request hook by
+    init_compression().
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.min_size = config.get('COMPRESS_MIN_SIZE', 500)
+        self.path_prefixes = tuple(config.get('COMPRESS_PATH_PREFIXES', ['/api/']))
+        self.levels = {
+            'gzip': config.get('COMPRESS_LEVEL', 6),
+            'br': config.get('COMPRESS_BR_LEVEL', 4),
+            'zstd': config.get('COMPRESS_ZSTD_LEVEL', 3)
+        }
+        self.brotli = _load_brotli()
+        self.zstd = _load_zstd()
+
+        # Server preference, best ratio per CPU first
+        self.encodings = []
+        for encoding in config.get('COMPRESS_ALGORITHMS', ['zstd', 'br', 'gzip']):
+            if encoding == 'br' and self.brotli is None:
+                continue
+            if encoding == 'zstd' and self.zstd is None:
+                continue
+            self.encodings.append(encoding)
+
+    def choose_encoding(self, accept_encodings):
+        for encoding in self.encodings:
+            if accept_encodings[encoding]:
+                return encoding
+        return None
+
+    def compress(self, encoding, data):
+        level = self.levels[encoding]
+        if encoding == 'gzip':
+            return gzip.compress(data, compresslevel=level, mtime=0)
+        if encoding == 'br':
+            return self.brotli.compress(data, quality=level)
+        return self.zstd.ZstdCompressor(level=level).compress(data)
+
+    def compress_stream(self, encoding, chunks):
+        """Compress an iterable chunk by chunk, flushing after each one.
+
+        Flushing keeps streamed responses (exports, event streams) flowing
+        to the client instead of waiting for the compressor's buffer.
+        """
+        level = self.levels[encoding]
+        if encoding == 'gzip':
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            compress = compressor.compress
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            finish = compressor.flush
+        elif encoding == 'br':
+            compressor = self.brotli.Compressor(quality=level)
+            compress = compressor.process
+            flush = compressor.flush
+            finish = compressor.finish
+        else:
+            compressor = self.zstd.ZstdCompressor(level=level).compressobj()
+            compress = compressor.compress
+            flush = lambda: compressor.flush(self.zstd.COMPRESSOBJ_FLUSH_BLOCK)
+            finish = compressor.flush
+
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compress(chunk) + flush()
+        yield finish()
+
+    def _eligible(self, response):
+        if not request.path.startswith(self.path_prefixes):
+            return False
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return False
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        if response.cache_control.no_transform:
+            return False
+        return True
+
+    def after_request(self, response):
+        if not self._eligible(response):
+            return response
+
+        # The body depends on Accept-Encoding even when we send it as-is
+        response.vary.add('Accept-Encoding')
+
+        encoding = self.choose_encoding(request.accept_encodings)
+        if encoding is None or request.method == 'HEAD':
+            return response
+
+        if response.is_streamed:
+            response.response = self.compress_stream(encoding, response.response)
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            response.set_data(self.compress(encoding, data))
+
+        response.headers['Content-Encoding'] = encoding
+        # Same resource, different bytes: keep conditional requests working
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+
+def init_compression(app):
+    """Compress API responses for clients that accept it (COMPRESS_ENABLED)"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return None
+    compressor = Compressor(app)
+    app.after_request(compressor.after_request)
+    app.extensions['compressor'] = compressor
+    return compressor
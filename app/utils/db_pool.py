@@ -0,0 +1,181 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import NullPool, QueuePool
+
+# Upper bounds (ms) of the checkout-wait histogram; the last bucket is +Inf
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """Checkout counts and wait times of one pool, for this process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record(self, wait, timed_out=False):
+        wait_ms = wait * 1000
+        index = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.buckets[index] += 1
+
+    def to_dict(self):
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            labels = [f'le_{bound}ms' for bound in WAIT_BUCKETS_MS] + ['inf']
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait * 1000 / waits, 3) if waits else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 3),
+                'wait_histogram_ms': dict(zip(labels, self.buckets))
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection.
+
+    The wait includes opening a new connection when the pool grows into
+    its overflow, which is what a request actually feels.
+    """
+
+    # Log as QueuePool does: under the module name, this would be a child of
+    # Flask's `app` logger and print every checkout whenever that is at DEBUG
+    _sqla_logger_namespace = 'sqlalchemy.pool.impl.QueuePool'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+
+def pool_status(engine):
+    """Size/usage of an engine's pool plus its checkout metrics (if timed)"""
+    pool = engine.pool
+    status = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        checked_out = pool.checkedout()
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_in=pool.checkedin(),
+            checked_out=checked_out,
+            overflow=max(pool.overflow(), 0),
+            saturation=round(checked_out / capacity, 3) if capacity else None
+        )
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        status['metrics'] = metrics.to_dict()
+    return status
+
+
+def pool_statuses(db):
+    """pool_status() of every bind, keyed by bind name ('default' for the main one)"""
+    return {bind or 'default': pool_status(engine) for bind, engine in db.engines.items()}
+
+
+def install_transaction_timeouts(engine, config):
+    """SET LOCAL the configured timeouts at the start of every transaction on `engine`"""
+    statements = []
+    if config.get('DB_STATEMENT_TIMEOUT_MS'):
+        statements.append(f"SET LOCAL statement_timeout = {int(config['DB_STATEMENT_TIMEOUT_MS'])}")
+    if config.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS'):
+        statements.append(
+            f"SET LOCAL idle_in_transaction_session_timeout = {int(config['DB_IDLE_IN_TRANSACTION_TIMEOUT_MS'])}"
+        )
+
+    def on_begin(connection):
+        for statement in statements:
+            connection.exec_driver_sql(statement)
+
+    if statements:
+        event.listen(engine, 'begin', on_begin)
+
+
+def install_web_timeouts(engine, config):
+    """Apply WEB_STATEMENT_TIMEOUT_MS to a web worker's engine.
+
+    Kept out of the shared connection options so `flask db upgrade`, the
+    batch CLIs and the job worker can run long statements. Set once per
+    new connection, or with SET LOCAL per transaction behind PgBouncer.
+    """
+    timeout = int(config.get('WEB_STATEMENT_TIMEOUT_MS') or 0)
+    if not timeout or engine.dialect.name != 'postgresql' or getattr(engine, '_web_timeouts', False):
+        return
+    engine._web_timeouts = True
+
+    if config.get('DB_PGBOUNCER'):
+        def on_begin(connection):
+            connection.exec_driver_sql(f"SET LOCAL statement_timeout = {timeout}")
+
+        event.listen(engine, 'begin', on_begin)
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"SET statement_timeout = {timeout}")
+        cursor.close()
+        # Committed, so the pool's reset-on-return rollback keeps it
+        dbapi_connection.commit()
+
+    event.listen(engine, 'connect', on_connect)
+
+
+def configure_engine_options(app):
+    """Pick the pool class before db.init_app() builds the engines.
+
+    Server-side databases get TimedQueuePool so checkout waits show up in
+    /api/admin/db-pool, or NullPool behind PgBouncer with DB_POOL_SIZE=0;
+    In-memory SQLite keeps Flask-SQLAlchemy's StaticPool.
+    """
+    # Copy: the dict is shared with the Config class
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+    if 'poolclass' in options or (uri.startswith('sqlite') and uri in ('sqlite://', 'sqlite:///:memory:')):
+        return
+    if app.config.get('DB_PGBOUNCER') and app.config.get('DB_POOL_SIZE') == 0:
+        options['poolclass'] = NullPool
+    else:
+        options['poolclass'] = TimedQueuePool
+    options.setdefault('echo_pool', False)
+
+
+def install_engine_events(app, db):
+    """Per-transaction timeouts behind PgBouncer, where startup options are rejected"""
+    if not app.config.get('DB_PGBOUNCER'):
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'postgresql':
+                install_transaction_timeouts(engine, app.config)
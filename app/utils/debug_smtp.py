@@ -0,0 +1,78 @@
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib/Flask-Mail: no TLS, no auth"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode('ascii'))
+
+    def handle(self):
+        self.reply('220 debug-smtp ready')
+        envelope = {'mail_from': None, 'rcpt_tos': []}
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 debug-smtp')
+            elif verb == 'MAIL':
+                envelope = {'mail_from': command.split(':', 1)[1].strip(), 'rcpt_tos': []}
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                envelope['rcpt_tos'].append(command.split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in (b'.\r\n', b'.\n'):
+                        break
+                    # Undo dot-stuffing
+                    data.append(data_line[1:] if data_line.startswith(b'..') else data_line)
+                self.server.deliver(envelope, b''.join(data))
+                envelope = {'mail_from': None, 'rcpt_tos': []}
+                self.reply('250 OK: queued')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class DebuggingSMTPServer(socketserver.ThreadingTCPServer):
+    """Local SMTP stand-in that keeps (and prints) what it receives.
+
+    Point MAIL_SERVER/MAIL_PORT at it with MAIL_USE_TLS=false to exercise
+    the mail sender without a real mailbox.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host='127.0.0.1', port=1025, echo=True):
+        super().__init__((host, port), _SMTPHandler)
+        self.messages = []
+        self.echo = echo
+        self._lock = threading.Lock()
+
+    def deliver(self, envelope, data):
+        with self._lock:
+            self.messages.append({'mail_from': envelope['mail_from'], 'rcpt_tos': envelope['rcpt_tos'], 'data': data})
+        if self.echo:
+            print(f"📨 {envelope['mail_from']} -> {', '.join(envelope['rcpt_tos'])}")
+            print(data.decode('utf-8', 'replace'))
+
+    def start(self):
+        """Serve from a background thread (tests); returns the thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
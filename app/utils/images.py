@@ -0,0 +1,353 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from flask import current_app
+from app import db
+from app.models.product import Product
+from app.models.stored_file import StoredFile
+from app.models.uploaded_image import UploadedImage
+from app.utils.jobs import task, enqueue
+from app.utils.placeholders import encode_blurhash, average_color
+from app.utils.storage import get_storage
+from app.utils.uploads import CONTENT_TYPES, original_key_match, storage_key
+from datetime import datetime
+
+# Pillow format name, file extension and encoder options per output format
+FORMATS = {
+    'avif': ('AVIF', 'avif', lambda quality: {'quality': quality}),
+    'webp': ('WEBP', 'webp', lambda quality: {'quality': quality, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', lambda quality: {'quality': quality, 'optimize': True, 'progressive': True})
+}
+
+
+def _flatten(image, with_alpha):
+    if with_alpha and image.mode in ('RGBA', 'LA', 'P'):
+        return image.convert('RGBA')
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        from PIL import Image
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate_variants(source_path, widths, formats, quality, output_dir=None):
+    """Write resized, metadata-free copies of an image to output_dir.
+
+    Orientation from EXIF is applied to the pixels first, and nothing from
+    the original's metadata is written out. Widths larger than the original
+    are not upscaled.
+
+    Returns ((width, height), [{'width', 'height', 'format', 'filename'}, ...]).
+    """
+    from PIL import Image, ImageOps
+
+    directory = output_dir or os.path.dirname(source_path)
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    variants = []
+
+    with Image.open(source_path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        original_width, original_height = image.size
+
+        previous_width = None
+        for width in sorted(set(widths)):
+            target_width = min(width, original_width)
+            if target_width == previous_width:
+                break
+            previous_width = target_width
+
+            target_height = max(1, round(original_height * target_width / original_width))
+            resized = image if target_width == original_width else \
+                image.resize((target_width, target_height), Image.LANCZOS)
+
+            for fmt in formats:
+                pil_format, extension, options = FORMATS[fmt]
+                filename = f"{stem}_{width}w.{extension}"
+                final_path = os.path.join(directory, filename)
+                temp_path = f"{final_path}.tmp"
+
+                output = _flatten(resized, with_alpha=fmt != 'jpeg')
+                output.save(temp_path, pil_format, **options(quality))
+                os.replace(temp_path, final_path)
+
+                variants.append({
+                    'width': target_width,
+                    'height': target_height,
+                    'format': fmt,
+                    'filename': filename
+                })
+
+    return (original_width, original_height), variants
+
+
+def describe_image(source_path):
+    """Width, height and placeholder of an image, as displayed (EXIF-rotated)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as opened:
+        image = _flatten(ImageOps.exif_transpose(opened), with_alpha=False)
+        return {
+            'width': image.width,
+            'height': image.height,
+            'placeholder': encode_blurhash(image),
+            'color': average_color(image)
+        }
+
+
+def _variant_formats():
+    from PIL import features
+
+    formats = current_app.config.get('IMAGE_VARIANT_FORMATS', ['webp', 'jpeg'])
+    # AVIF needs a Pillow build with libavif; skip it quietly otherwise
+    return [fmt for fmt in formats if fmt in FORMATS and (fmt != 'avif' or features.check('avif'))]
+
+
+def _store_on_product(product_id, url, meta):
+    """Merge one image's metadata into product.image_variants.
+
+    The row is locked for the read-modify-write, so jobs for two images
+    of the same product cannot overwrite each other's entries.
+    """
+    product = db.session.get(Product, product_id, with_for_update=True, populate_existing=True)
+    if product is None or url not in (product.image_urls or []):
+        db.session.commit()  # release the lock
+        return
+
+    image_variants = dict(product.image_variants or {})
+    image_variants[url] = meta
+
+    table = Product.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == product_id)
+        # Keep updated_at: new variants are not a seller edit
+        .values(image_variants=image_variants, updated_at=table.c.updated_at)
+    )
+    db.session.commit()
+
+
+class ContentMismatch(Exception):
+    pass
+
+
+def _check_content_hash(key, path):
+    """Make sure a content-addressed file really has the hash in its name.
+
+    Uploads through the API are hashed on the way in; presigned uploads
+    to object storage are only checked here.
+    """
+    match = original_key_match(key)
+    if match is None:
+        return
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    if digest.hexdigest() != match.group(2):
+        raise ContentMismatch(f'SHA-256 {digest.hexdigest()} does not match {key}')
+
+
+@task('process_product_image', max_attempts=3)
+def process_product_image(image_id):
+    """Background task: build the responsive variants of an upload"""
+    image = db.session.get(UploadedImage, image_id)
+    if image is None:
+        return
+
+    storage = get_storage()
+    key = storage_key(image.url)
+    url_prefix = image.url.rsplit('/', 1)[0]
+    key_prefix = key.rsplit('/', 1)[0]
+    output_dir = tempfile.mkdtemp(prefix='variants-')
+
+    try:
+        with storage.local_copy(key) as source_path:
+            _check_content_hash(key, source_path)
+            description = describe_image(source_path)
+            (width, height), variants = generate_variants(
+                source_path,
+                current_app.config.get('IMAGE_VARIANT_WIDTHS', [320, 800, 1600]),
+                _variant_formats(),
+                current_app.config.get('IMAGE_VARIANT_QUALITY', 80),
+                output_dir=output_dir
+            )
+        for variant in variants:
+            storage.save_file(
+                f"{key_prefix}/{variant['filename']}",
+                os.path.join(output_dir, variant['filename']),
+                CONTENT_TYPES.get(variant['filename'].rsplit('.', 1)[-1])
+            )
+    except ContentMismatch as e:
+        # A direct upload whose bytes do not match the key it claimed
+        print(f"❌ Rejected upload {image.url}: {str(e)}")
+        storage.delete(key)
+        StoredFile.query.filter_by(url=image.url).delete(synchronize_session=False)
+        image.status = UploadedImage.STATUS_FAILED
+        image.error = str(e)
+        image.processed_at = datetime.utcnow()
+        db.session.commit()
+        return
+    except Exception as e:
+        # Unreadable or missing source - retrying will not help
+        print(f"❌ Image processing failed for {image.url}: {str(e)}")
+        image.status = UploadedImage.STATUS_FAILED
+        image.error = str(e)
+        image.processed_at = datetime.utcnow()
+        db.session.commit()
+        return
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    image.width = width
+    image.height = height
+    image.placeholder = description['placeholder']
+    image.color = description['color']
+    image.variants = [
+        {
+            'width': variant['width'],
+            'height': variant['height'],
+            'format': variant['format'],
+            'url': f"{url_prefix}/{variant['filename']}"
+        }
+        for variant in variants
+    ]
+    image.status = UploadedImage.STATUS_READY
+    image.error = None
+    image.processed_at = datetime.utcnow()
+    db.session.commit()
+
+    print(f"✅ Built {len(variants)} variants for {image.url}")
+
+    if image.product_id:
+        _store_on_product(image.product_id, image.url, image.meta())
+
+
+@task('describe_product_image', max_attempts=3)
+def describe_product_image(image_id):
+    """Background task: fill in size and placeholder of an already processed upload"""
+    image = db.session.get(UploadedImage, image_id)
+    if image is None:
+        return
+
+    try:
+        with get_storage().local_copy(storage_key(image.url)) as source_path:
+            description = describe_image(source_path)
+    except Exception as e:
+        print(f"❌ Could not describe {image.url}: {str(e)}")
+        return
+
+    image.width = description['width']
+    image.height = description['height']
+    image.placeholder = description['placeholder']
+    image.color = description['color']
+    db.session.commit()
+
+    if image.product_id:
+        _store_on_product(image.product_id, image.url, image.meta())
+
+
+def backfill_image_metadata(batch_size=200, log=print):
+    """Queue size/placeholder extraction for product images that lack it.
+
+    Images uploaded before variants existed get an uploaded_images row and
+    the full processing task; processed ones only get described. Products
+    are walked in primary-key batches. Returns the number of queued jobs.
+    """
+    from sqlalchemy import select
+
+    queued = 0
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Product.id, Product.user_id, Product.image_urls, Product.image_variants)
+            .where(Product.id > last_id)
+            .order_by(Product.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        for row in rows:
+            image_urls = row.image_urls if isinstance(row.image_urls, list) else []
+            image_variants = row.image_variants or {}
+            for url in image_urls:
+                if not isinstance(url, str) or storage_key(url) is None:
+                    continue
+                meta = image_variants.get(url) or {}
+                if meta.get('placeholder') and meta.get('width'):
+                    continue
+
+                image = UploadedImage.query.filter_by(url=url).first()
+                if image is None:
+                    image = UploadedImage(url=url, user_id=row.user_id, product_id=row.id)
+                    db.session.add(image)
+                    db.session.flush()
+                    enqueue('process_product_image', {'image_id': image.id}, commit=False)
+                elif image.status == UploadedImage.STATUS_READY:
+                    image.product_id = image.product_id or row.id
+                    if image.placeholder and image.width:
+                        # Described already, the product just never got the copy
+                        db.session.commit()
+                        _store_on_product(image.product_id, image.url, image.meta())
+                        continue
+                    enqueue('describe_product_image', {'image_id': image.id}, commit=False)
+                else:
+                    # Pending images are described when they are processed
+                    continue
+                queued += 1
+
+        db.session.commit()
+        log(f"🔄 Backfill at product {last_id}: {queued} images queued")
+
+    return queued
+
+
+def attach_product_images(product):
+    """Link a product's uploads to it and copy over any finished variants.
+
+    Call before committing a create/update that sets image_urls. Uploads
+    still being processed are filled in by the task when it finishes.
+    """
+    urls = [url for url in (product.image_urls or []) if isinstance(url, str)]
+    if not urls:
+        product.image_variants = {}
+        return
+
+    if product.id is None:
+        db.session.flush()
+
+    image_variants = {}
+    for image in UploadedImage.query.filter(UploadedImage.url.in_(urls)).all():
+        image.product_id = product.id
+        if image.status == UploadedImage.STATUS_READY:
+            image_variants[image.url] = image.meta()
+
+    product.image_variants = image_variants
+
+
+def release_uploaded_images(image_urls):
+    """Forget uploads that are being deleted.
+
+    Returns the given URLs plus the URLs of their generated variants, so
+    the caller can unlink every file that belonged to them.
+    """
+    urls = [url for url in image_urls if url and isinstance(url, str)]
+    if not urls:
+        return []
+
+    # Stored URLs are relative; accept absolute ones too
+    relative = {url: '/uploads/' + url.split('/uploads/', 1)[1] if '/uploads/' in url else url for url in urls}
+
+    all_urls = list(urls)
+    images = UploadedImage.query.filter(UploadedImage.url.in_(set(relative.values()))).all()
+    for image in images:
+        all_urls.extend(variant['url'] for variant in image.variants or [])
+        db.session.delete(image)
+    db.session.commit()
+
+    return all_urls
@@ -0,0 +1,236 @@
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import traceback
+from flask import current_app
+from sqlalchemy import select, or_, and_
+from app import db
+from app.models.job import Job
+from datetime import datetime, timedelta
+
+# Task name -> (function, max_attempts)
+_tasks = {}
+
+# (attempt, max_attempts) of the job running on this thread
+_running = threading.local()
+
+
+def task(name, max_attempts=5):
+    """Register a function as a background task.
+
+    Tasks receive the enqueued payload as keyword arguments and run inside
+    an app context. A task may run more than once (retries, expired
+    visibility timeouts), so it must be safe to repeat.
+    """
+    def decorator(f):
+        _tasks[name] = (f, max_attempts)
+        return f
+    return decorator
+
+
+def is_final_attempt():
+    """True when a failure of the running task will not be retried.
+
+    Always True outside the worker (JOBS_EAGER runs tasks once, inline).
+    """
+    attempt = getattr(_running, 'attempt', None)
+    return attempt is None or attempt[0] >= attempt[1]
+
+
+def enqueue(name, payload=None, delay=0, commit=True):
+    """Queue a task and return the Job row.
+
+    With JOBS_EAGER the task runs inline instead (tests, local debugging)
+    and None is returned. With commit=False the job is only added to the
+    session, so it is committed together with the caller's own changes.
+    """
+    if name not in _tasks:
+        raise KeyError(f'Unknown task: {name}')
+
+    payload = payload or {}
+
+    if current_app.config.get('JOBS_EAGER'):
+        if not commit:
+            db.session.flush()
+        _tasks[name][0](**payload)
+        return None
+
+    job = Job(
+        name=name,
+        payload=payload,
+        max_attempts=_tasks[name][1],
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.session.add(job)
+    if commit:
+        db.session.commit()
+    return job
+
+
+def _claimable(now):
+    return or_(
+        and_(Job.status == Job.STATUS_QUEUED, Job.run_at <= now),
+        and_(Job.status == Job.STATUS_RUNNING, Job.locked_until < now)
+    )
+
+
+def claim_jobs(worker_id, limit=1):
+    """Lease up to `limit` due jobs to this worker.
+
+    Postgres uses SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers
+    never wait on each other. Other databases claim each candidate with a
+    conditional UPDATE and keep the ones whose update took effect.
+    """
+    now = datetime.utcnow()
+    lease = timedelta(seconds=current_app.config.get('JOBS_VISIBILITY_TIMEOUT', 300))
+    table = Job.__table__
+
+    candidates = select(Job.id).where(_claimable(now)).order_by(Job.run_at, Job.id).limit(limit)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+        if ids:
+            db.session.execute(
+                table.update()
+                .where(table.c.id.in_(ids))
+                .values(
+                    status=Job.STATUS_RUNNING,
+                    locked_by=worker_id,
+                    locked_until=now + lease,
+                    attempts=table.c.attempts + 1
+                )
+            )
+    else:
+        ids = []
+        for job_id in db.session.execute(candidates).scalars().all():
+            result = db.session.execute(
+                table.update()
+                .where(table.c.id == job_id)
+                .where(or_(
+                    and_(table.c.status == Job.STATUS_QUEUED, table.c.run_at <= now),
+                    and_(table.c.status == Job.STATUS_RUNNING, table.c.locked_until < now)
+                ))
+                .values(
+                    status=Job.STATUS_RUNNING,
+                    locked_by=worker_id,
+                    locked_until=now + lease,
+                    attempts=table.c.attempts + 1
+                )
+            )
+            if result.rowcount == 1:
+                ids.append(job_id)
+
+    db.session.commit()
+
+    if not ids:
+        return []
+    return Job.query.filter(Job.id.in_(ids)).order_by(Job.run_at, Job.id).all()
+
+
+def release_jobs(jobs):
+    """Hand claimed-but-unstarted jobs back to the queue"""
+    table = Job.__table__
+    ids = [job.id for job in jobs]
+    if not ids:
+        return
+    db.session.execute(
+        table.update()
+        .where(table.c.id.in_(ids), table.c.status == Job.STATUS_RUNNING)
+        .values(
+            status=Job.STATUS_QUEUED,
+            locked_by=None,
+            locked_until=None,
+            attempts=table.c.attempts - 1
+        )
+    )
+    db.session.commit()
+
+
+def _backoff(attempts):
+    base = current_app.config.get('JOBS_RETRY_BACKOFF', 10)
+    cap = current_app.config.get('JOBS_RETRY_BACKOFF_MAX', 3600)
+    delay = min(base * (2 ** max(attempts - 1, 0)), cap)
+    # Jitter so a burst of failures does not retry in lockstep
+    return delay * random.uniform(0.8, 1.2)
+
+
+def run_job(job):
+    """Run one claimed job and record the outcome"""
+    job_id = job.id
+    name = job.name
+    payload = job.payload or {}
+    registered = _tasks.get(name)
+
+    _running.attempt = (job.attempts, job.max_attempts)
+    try:
+        if registered is None:
+            raise KeyError(f'Unknown task: {name}')
+        registered[0](**payload)
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(Job, job_id)
+        job.last_error = f"{e}\n{traceback.format_exc()}"
+        job.locked_by = None
+        job.locked_until = None
+        if job.attempts >= job.max_attempts or registered is None:
+            job.status = Job.STATUS_FAILED
+            job.finished_at = datetime.utcnow()
+            print(f"❌ Job {job_id} ({name}) failed permanently: {str(e)}")
+        else:
+            job.status = Job.STATUS_QUEUED
+            job.run_at = datetime.utcnow() + timedelta(seconds=_backoff(job.attempts))
+            print(f"⚠️ Job {job_id} ({name}) failed, retry {job.attempts}/{job.max_attempts} at {job.run_at}")
+        db.session.commit()
+        return False
+    finally:
+        _running.attempt = None
+
+    job = db.session.get(Job, job_id)
+    job.status = Job.STATUS_DONE
+    job.finished_at = datetime.utcnow()
+    job.locked_by = None
+    job.locked_until = None
+    db.session.commit()
+    return True
+
+
+def work(poll_interval=None, batch_size=None, once=False):
+    """Worker loop: claim due jobs, run them, sleep when the queue is empty.
+
+    Stops cleanly on SIGTERM/SIGINT after the job in hand. With once=True
+    it returns as soon as the queue is drained.
+    """
+    poll_interval = poll_interval or current_app.config.get('JOBS_POLL_INTERVAL', 1.0)
+    batch_size = batch_size or current_app.config.get('JOBS_BATCH_SIZE', 10)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    state = {'running': True}
+
+    def stop(signum, frame):
+        state['running'] = False
+
+    if not once:
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+    print(f"👷 Job worker {worker_id} started")
+    processed = 0
+    while state['running']:
+        jobs = claim_jobs(worker_id, limit=batch_size)
+        for index, job in enumerate(jobs):
+            if not state['running']:
+                release_jobs(jobs[index:])
+                break
+            run_job(job)
+            processed += 1
+        db.session.remove()
+
+        if not jobs:
+            if once:
+                break
+            time.sleep(poll_interval)
+
+    print(f"👷 Job worker {worker_id} stopped after {processed} jobs")
+    return processed
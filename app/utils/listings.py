@@ -0,0 +1,119 @@
+from flask import current_app
+from sqlalchemy import select, insert, case, literal, or_
+from app import db
+from app.models.product import Product
+from app.models.product_archive import ProductArchive
+from app.models.similar_product import SimilarProduct
+from app.utils.rollups import record_daily
+from app.utils.site_stats import adjust_site_stats, mark_site_stats_stale
+from datetime import datetime, timedelta
+
+
+def listing_expires_at(now=None):
+    """Expiry for a listing created or renewed now; None when LISTING_TTL_DAYS is 0"""
+    ttl = current_app.config.get('LISTING_TTL_DAYS', 60)
+    if not ttl:
+        return None
+    return (now or datetime.utcnow()) + timedelta(days=ttl)
+
+
+def expire_listings(batch_size=None, now=None):
+    """Deactivate active listings past expires_at, in primary-key batches.
+
+    Each batch is one UPDATE, committed on its own. Bulk updates skip the
+    model hooks, so the dashboard counters and daily rollups are adjusted
+    here. Returns the number of listings expired.
+    """
+    batch_size = batch_size or current_app.config.get('LISTING_BATCH_SIZE', 500)
+    now = now or datetime.utcnow()
+    table = Product.__table__
+    expired = 0
+    last_id = 0
+
+    while True:
+        rows = db.session.execute(
+            select(Product.id, Product.category_id)
+            .where(Product.is_active == True, Product.expires_at <= now, Product.id > last_id)
+            .order_by(Product.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        result = db.session.execute(
+            table.update()
+            .where(table.c.id.in_([row.id for row in rows]), table.c.is_active == True)
+            .values(is_active=False, expired=True, updated_at=now)
+        )
+        if result.rowcount:
+            per_category = {}
+            for row in rows:
+                per_category[row.category_id] = per_category.get(row.category_id, 0) + 1
+            connection = db.session.connection()
+            for category_id, count in per_category.items():
+                record_daily(connection, category_id=category_id, deactivated_listings=count)
+            if result.rowcount == len(rows):
+                adjust_site_stats(active_products=-len(rows))
+            else:
+                # Someone changed a row in between - let the next read recount
+                mark_site_stats_stale()
+        expired += result.rowcount
+        db.session.commit()
+
+    return expired
+
+
+def _archive_reason():
+    return case(
+        (Product.is_sold == True, literal(ProductArchive.REASON_SOLD)),
+        (Product.expired == True, literal(ProductArchive.REASON_EXPIRED)),
+        else_=literal(ProductArchive.REASON_INACTIVE)
+    )
+
+
+def archive_listings(batch_size=None, now=None):
+    """Move listings sold or inactive for LISTING_ARCHIVE_AFTER_DAYS into products_archive.
+
+    Each batch is copied with INSERT ... SELECT and deleted from products
+    in the same transaction, so a row is always in exactly one of the two
+    tables. Image files stay: archived rows still reference them. Returns
+    the number of listings archived.
+    """
+    batch_size = batch_size or current_app.config.get('LISTING_BATCH_SIZE', 500)
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(days=current_app.config.get('LISTING_ARCHIVE_AFTER_DAYS', 30))
+    columns = ProductArchive.PRODUCT_COLUMNS
+    candidate = (or_(Product.is_sold == True, Product.is_active == False), Product.updated_at < cutoff)
+    archived = 0
+
+    while True:
+        ids = db.session.execute(
+            select(Product.id).where(*candidate).order_by(Product.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        db.session.execute(
+            insert(ProductArchive.__table__).from_select(
+                [*columns, 'archived_at', 'archive_reason'],
+                select(*(Product.__table__.c[name] for name in columns), literal(now), _archive_reason())
+                .where(Product.id.in_(ids), *candidate)
+            )
+        )
+        moved = db.session.execute(
+            select(ProductArchive.id).where(ProductArchive.id.in_(ids))
+        ).scalars().all()
+        Product.query.filter(Product.id.in_(moved)).delete(synchronize_session=False)
+        SimilarProduct.query.filter(SimilarProduct.product_id.in_(moved)).delete(synchronize_session=False)
+
+        archived += len(moved)
+        db.session.commit()
+        if len(ids) < batch_size:
+            break
+
+    if archived:
+        # users_with_products cannot be adjusted from a bulk delete; recount on the next read
+        mark_site_stats_stale()
+        db.session.commit()
+    return archived
@@ -0,0 +1,268 @@
+import os
+import random
+import signal
+import smtplib
+import socket
+import time
+from flask import current_app
+from sqlalchemy import select, or_, and_
+from app import db
+from app.models.outbox_email import OutboxEmail
+from datetime import datetime, timedelta
+
+# Contact form messages and test emails go to the marketplace inbox
+CONTACT_ADDRESS = 'hillsmarket.official@gmail.com'
+
+
+def default_sender():
+    return current_app.config.get('MAIL_DEFAULT_SENDER') or CONTACT_ADDRESS
+
+
+def queue_email(subject, body, recipients, reply_to=None, kind='contact', commit=True):
+    """Persist an email for the mail sender and return the outbox row.
+
+    Nothing talks to SMTP here, so callers can acknowledge immediately.
+    """
+    email = OutboxEmail(
+        kind=kind,
+        sender=default_sender(),
+        recipients=list(recipients),
+        reply_to=reply_to,
+        subject=subject,
+        body=body,
+        max_attempts=current_app.config.get('MAIL_OUTBOX_MAX_ATTEMPTS', 8)
+    )
+    db.session.add(email)
+    if commit:
+        db.session.commit()
+    return email
+
+
+def _claimable(now):
+    return or_(
+        and_(OutboxEmail.status == OutboxEmail.STATUS_PENDING, OutboxEmail.next_attempt_at <= now),
+        and_(OutboxEmail.status == OutboxEmail.STATUS_SENDING, OutboxEmail.locked_until < now)
+    )
+
+
+def claim_emails(limit):
+    """Lease up to `limit` due emails, the same way claim_jobs leases jobs"""
+    now = datetime.utcnow()
+    lease = timedelta(seconds=current_app.config.get('MAIL_OUTBOX_LEASE', 300))
+    table = OutboxEmail.__table__
+    claimed_values = dict(
+        status=OutboxEmail.STATUS_SENDING,
+        locked_until=now + lease,
+        attempts=table.c.attempts + 1
+    )
+
+    candidates = select(OutboxEmail.id).where(_claimable(now)) \
+        .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id).limit(limit)
+
+    if db.session.get_bind().dialect.name == 'postgresql':
+        ids = db.session.execute(candidates.with_for_update(skip_locked=True)).scalars().all()
+        if ids:
+            db.session.execute(table.update().where(table.c.id.in_(ids)).values(**claimed_values))
+    else:
+        ids = []
+        for email_id in db.session.execute(candidates).scalars().all():
+            result = db.session.execute(
+                table.update()
+                .where(table.c.id == email_id)
+                .where(or_(
+                    and_(table.c.status == OutboxEmail.STATUS_PENDING, table.c.next_attempt_at <= now),
+                    and_(table.c.status == OutboxEmail.STATUS_SENDING, table.c.locked_until < now)
+                ))
+                .values(**claimed_values)
+            )
+            if result.rowcount == 1:
+                ids.append(email_id)
+
+    db.session.commit()
+
+    if not ids:
+        return []
+    return OutboxEmail.query.filter(OutboxEmail.id.in_(ids)) \
+        .order_by(OutboxEmail.next_attempt_at, OutboxEmail.id).all()
+
+
+class SMTPSession:
+    """One SMTP connection, opened lazily and reused across batches.
+
+    The connection is checked with NOOP before reuse and dropped after
+    MAIL_CONNECTION_IDLE_TIMEOUT seconds without sends, so servers that
+    close idle sessions never see a half-dead one.
+    """
+
+    def __init__(self, idle_timeout=60):
+        self.idle_timeout = idle_timeout
+        self.connection = None
+        self.last_used = 0
+
+    def _alive(self):
+        if self.connection.host is None:
+            # MAIL_SUPPRESS_SEND: nothing to check
+            return True
+        try:
+            return self.connection.host.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def get(self):
+        if self.connection is not None:
+            if time.monotonic() - self.last_used > self.idle_timeout or not self._alive():
+                self.close()
+        if self.connection is None:
+            self.connection = _mail().connect().__enter__()
+            print("📮 SMTP connection opened")
+        self.last_used = time.monotonic()
+        return self.connection
+
+    def send(self, message):
+        try:
+            self.get().send(message)
+        except smtplib.SMTPServerDisconnected:
+            # Dropped between the check and the send - reconnect once
+            self.close()
+            self.get().send(message)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.__exit__(None, None, None)
+        except (smtplib.SMTPException, OSError):
+            pass
+        self.connection = None
+
+
+def _mail():
+    """Flask-Mail state for the current app, set up on first use.
+
+    Only the mail sender process sends mail, so web workers never import
+    flask_mail (and the email package behind it).
+    """
+    from flask_mail import Mail
+
+    if 'mail' not in current_app.extensions:
+        Mail(current_app)
+    return current_app.extensions['mail']
+
+
+def _message(email):
+    from flask_mail import Message
+
+    return Message(
+        subject=email.subject,
+        sender=email.sender,
+        recipients=email.recipients,
+        reply_to=email.reply_to,
+        body=email.body
+    )
+
+
+def _backoff(attempts):
+    base = current_app.config.get('MAIL_RETRY_BACKOFF', 30)
+    cap = current_app.config.get('MAIL_RETRY_BACKOFF_MAX', 3600)
+    delay = min(base * (2 ** max(attempts - 1, 0)), cap)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _unreachable(error):
+    """True when the server, not the message, is the problem.
+
+    smtplib's exceptions subclass OSError, so a refused recipient or a
+    rejected message body is told apart from a socket error explicitly.
+    """
+    if isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError,
+                          smtplib.SMTPAuthenticationError)):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def send_batch(session, emails):
+    """Deliver claimed emails over the shared connection; returns the number sent.
+
+    Each outcome is committed on its own, so a crash mid-batch never
+    resends what already went out. A message the server rejects
+    (refused sender or recipients, data error) is retried on its own and
+    the batch goes on. If the SMTP server cannot be reached, the rest of
+    the batch is put back untried, with the same delay.
+    """
+    sent = 0
+    for index, email in enumerate(emails):
+        try:
+            session.send(_message(email))
+        except Exception as e:
+            unreachable = _unreachable(e)
+            if unreachable:
+                session.close()
+            email.last_error = str(e)
+            email.locked_until = None
+            if email.attempts >= email.max_attempts:
+                email.status = OutboxEmail.STATUS_FAILED
+                print(f"❌ Email {email.id} failed permanently: {str(e)}")
+            else:
+                email.status = OutboxEmail.STATUS_PENDING
+                email.next_attempt_at = datetime.utcnow() + timedelta(seconds=_backoff(email.attempts))
+                print(f"⚠️ Email {email.id} failed, retry {email.attempts}/{email.max_attempts} at {email.next_attempt_at}")
+
+            if unreachable:
+                for untried in emails[index + 1:]:
+                    untried.status = OutboxEmail.STATUS_PENDING
+                    untried.attempts -= 1
+                    untried.locked_until = None
+                    untried.next_attempt_at = email.next_attempt_at
+                db.session.commit()
+                return sent
+        else:
+            email.status = OutboxEmail.STATUS_SENT
+            email.sent_at = datetime.utcnow()
+            email.locked_until = None
+            email.last_error = None
+            sent += 1
+        db.session.commit()
+    return sent
+
+
+def run_sender(poll_interval=None, batch_size=None, once=False):
+    """Mail sender loop: claim due emails in batches and send them over one connection.
+
+    Stops cleanly on SIGTERM/SIGINT. With once=True it returns as soon as
+    the outbox is drained.
+    """
+    poll_interval = poll_interval or current_app.config.get('MAIL_OUTBOX_POLL_INTERVAL', 2.0)
+    batch_size = batch_size or current_app.config.get('MAIL_OUTBOX_BATCH_SIZE', 20)
+    session = SMTPSession(current_app.config.get('MAIL_CONNECTION_IDLE_TIMEOUT', 60))
+    sender_id = f"{socket.gethostname()}:{os.getpid()}"
+    state = {'running': True}
+
+    def stop(signum, frame):
+        state['running'] = False
+
+    if not once:
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+    print(f"📮 Mail sender {sender_id} started")
+    total = 0
+    try:
+        while state['running']:
+            emails = claim_emails(batch_size)
+            if emails:
+                total += send_batch(session, emails)
+            db.session.remove()
+
+            if not emails:
+                if once:
+                    break
+                if session.connection is not None and \
+                        time.monotonic() - session.last_used > session.idle_timeout:
+                    session.close()
+                time.sleep(poll_interval)
+    finally:
+        session.close()
+
+    print(f"📮 Mail sender {sender_id} stopped after {total} emails")
+    return total
@@ -0,0 +1,90 @@
+import math
+
+# https://github.com/woltapp/blurhash - a ~20-30 character image placeholder
+BASE83 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# BlurHash only needs the low frequencies, so a thumbnail this size is plenty
+SAMPLE_SIZE = 32
+
+
+def _encode83(value, length):
+    return ''.join(BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def _srgb_to_linear(value):
+    v = value / 255
+    return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def _sample(image):
+    from PIL import Image
+
+    sample = image.convert('RGB')
+    sample.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR)
+    return sample
+
+
+def encode_blurhash(image, x_components=4, y_components=3):
+    """BlurHash of a Pillow image (4x3 components is ~28 characters)"""
+    sample = _sample(image)
+    width, height = sample.size
+    table = [_srgb_to_linear(v) for v in range(256)]
+    pixels = [(table[r], table[g], table[b]) for r, g, b in sample.getdata()]
+
+    factors = []
+    for j in range(y_components):
+        cos_y = [math.cos(math.pi * j * y / height) for y in range(height)]
+        for i in range(x_components):
+            cos_x = [math.cos(math.pi * i * x / width) for x in range(width)]
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[x] * cos_y[y]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    blurhash = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = max(0, min(82, math.floor(actual_max * 166 - 0.5)))
+        max_value = (quantised_max + 1) / 166
+        blurhash += _encode83(quantised_max, 1)
+    else:
+        max_value = 1
+        blurhash += _encode83(0, 1)
+
+    blurhash += _encode83(
+        (_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4
+    )
+
+    def quantise(value):
+        return max(0, min(18, math.floor(_sign_pow(value / max_value, 0.5) * 9 + 9.5)))
+
+    for r, g, b in ac:
+        blurhash += _encode83(quantise(r) * 19 * 19 + quantise(g) * 19 + quantise(b), 2)
+
+    return blurhash
+
+
+def average_color(image):
+    """Average colour as '#rrggbb', usable as a CSS background right away"""
+    r, g, b = _sample(image).resize((1, 1)).getpixel((0, 0))
+    return f'#{r:02x}{g:02x}{b:02x}'
@@ -0,0 +1,104 @@
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from sqlalchemy import text
+from app import db
+from app.utils.db_pool import pool_status
+from app.utils.replica import replica_status
+
+# One probe query at a time per process; a hung one makes the next checks
+# time out too, which is the right answer while the database is stuck
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='readiness')
+
+# Last readiness result of this process, reused for READINESS_CACHE_SECONDS
+_lock = threading.Lock()
+_cached = {
+    'checked_at': None,
+    'checking': False,
+    'result': None
+}
+
+
+def _select_one(engine):
+    with engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+
+
+def check_database(engine, timeout):
+    """SELECT 1 over a pooled connection, giving up after `timeout` seconds"""
+    started = time.perf_counter()
+    try:
+        _executor.submit(_select_one, engine).result(timeout=timeout)
+    except FutureTimeout:
+        return {'ok': False, 'error': f'no answer within {timeout}s'}
+    except Exception as e:
+        return {'ok': False, 'error': str(e)}
+    return {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+
+
+def check_uploads(config):
+    """Local upload storage: the products directory exists, is writable and has free space"""
+    backend = config.get('STORAGE_BACKEND', 'local')
+    if backend != 'local':
+        return {'ok': True, 'backend': backend}
+
+    products_dir = os.path.join(config['UPLOADS_ROOT'], 'products')
+    if not os.path.isdir(products_dir):
+        return {'ok': False, 'backend': backend, 'error': f'{products_dir} does not exist'}
+    if not os.access(products_dir, os.W_OK):
+        return {'ok': False, 'backend': backend, 'error': f'{products_dir} is not writable'}
+
+    free_mb = shutil.disk_usage(products_dir).free // (1024 * 1024)
+    min_free_mb = config.get('READINESS_MIN_FREE_MB', 100)
+    status = {'ok': free_mb >= min_free_mb, 'backend': backend, 'free_mb': free_mb}
+    if not status['ok']:
+        status['error'] = f'less than {min_free_mb} MB free'
+    return status
+
+
+def _check():
+    config = current_app.config
+    database = check_database(db.engine, config.get('READINESS_DB_TIMEOUT', 2))
+    pool = pool_status(db.engine)
+    uploads = check_uploads(config)
+
+    return {
+        'ready': database['ok'] and uploads['ok'],
+        'checks': {
+            'database': database,
+            # Informational: a full pool under peak load still serves requests,
+            # and a pool that cannot hand out connections fails the SELECT 1
+            'pool': pool,
+            'uploads': uploads,
+            # Informational: reads fall back to the primary without it
+            'replica': replica_status()
+        }
+    }
+
+
+def get_readiness():
+    """Readiness of this worker process, cached for READINESS_CACHE_SECONDS.
+
+    A load balancer probing every few hundred milliseconds then costs one
+    SELECT 1 per process per interval, not one per probe.
+    """
+    ttl = current_app.config.get('READINESS_CACHE_SECONDS', 2)
+    now = time.monotonic()
+    with _lock:
+        if _cached['result'] is not None and (now - _cached['checked_at'] < ttl or _cached['checking']):
+            # Fresh, or another thread is already refreshing it
+            return _cached['result']
+        _cached['checking'] = True
+
+    result = None
+    try:
+        result = _check()
+        return result
+    finally:
+        with _lock:
+            _cached['checking'] = False
+            if result is not None:
+                _cached.update(checked_at=time.monotonic(), result=result)
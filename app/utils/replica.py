@@ -0,0 +1,140 @@
+import threading
+import time
+from functools import wraps
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event, text
+from app import db
+from app.db_session import REPLICA_BIND, RoutingSession
+
+# Set on a client after it writes: its reads go to the primary until then
+STICKY_COOKIE = 'hm_primary_until'
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# Per-process replica health, refreshed every REPLICA_CHECK_INTERVAL seconds
+_health_lock = threading.Lock()
+_health = {
+    'checked_at': None,
+    'healthy': None,
+    'lag': None,
+    'error': None
+}
+
+
+def replica_engine():
+    return db.engines.get(REPLICA_BIND)
+
+
+def check_replica(engine):
+    """Return the replica's lag in seconds; raises if it cannot be reached"""
+    with engine.connect() as connection:
+        if engine.dialect.name == 'postgresql':
+            return float(connection.execute(REPLICA_LAG_SQL).scalar() or 0)
+        connection.execute(text('SELECT 1'))
+        return 0.0
+
+
+def replica_available():
+    """Whether reads may go to the replica: configured, reachable and not lagging.
+
+    The answer is cached per process, so a dead replica costs one failed
+    connect per REPLICA_CHECK_INTERVAL rather than one per request.
+    """
+    engine = replica_engine()
+    if engine is None:
+        return False
+
+    interval = current_app.config.get('REPLICA_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    with _health_lock:
+        if _health['checked_at'] is not None and now - _health['checked_at'] < interval:
+            return bool(_health['healthy'])
+        # Claim the check, other threads keep the previous answer meanwhile
+        _health['checked_at'] = now
+        was_healthy = _health['healthy']
+
+    max_lag = current_app.config.get('REPLICA_MAX_LAG_SECONDS', 10)
+    try:
+        lag = check_replica(engine)
+        healthy, error = lag <= max_lag, None if lag <= max_lag else f'lagging {lag:.1f}s'
+    except Exception as e:
+        lag, healthy, error = None, False, str(e)
+
+    with _health_lock:
+        _health.update(healthy=healthy, lag=lag, error=error)
+
+    if healthy != was_healthy:
+        if healthy:
+            print(f"✅ Read replica available (lag {lag:.1f}s)")
+        else:
+            print(f"⚠️ Read replica unavailable, reading from the primary: {error}")
+    return healthy
+
+
+def replica_status():
+    """Last health check of this process, for the readiness/admin views"""
+    with _health_lock:
+        return {
+            'configured': replica_engine() is not None,
+            'healthy': _health['healthy'],
+            'lag_seconds': _health['lag'],
+            'error': _health['error']
+        }
+
+
+def _recently_wrote():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def replica_safe(f):
+    """Let a read-only handler query the read replica.
+
+    Falls back to the primary when no replica is configured, when it is
+    down or lagging, and for REPLICA_STICKY_SECONDS after the client wrote
+    something, so users always see their own changes.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or _recently_wrote() or not replica_available():
+            return f(*args, **kwargs)
+
+        g.read_replica = True
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.read_replica = False
+
+    return decorated
+
+
+def _remember_commit(session):
+    if has_request_context():
+        g.db_committed = True
+
+
+def _set_sticky_cookie(response):
+    if not g.get('db_committed') or replica_engine() is None:
+        return response
+    sticky = current_app.config.get('REPLICA_STICKY_SECONDS', 5)
+    response.set_cookie(
+        STICKY_COOKIE, f'{time.time() + sticky:.3f}',
+        max_age=sticky, httponly=True, samesite='Lax'
+    )
+    return response
+
+
+def init_replica_routing(app):
+    """Read-your-writes: mark clients that committed something for the sticky window"""
+    if not event.contains(RoutingSession, 'after_commit', _remember_commit):
+        event.listen(RoutingSession, 'after_commit', _remember_commit)
+    app.after_request(_set_sticky_cookie)
@@ -0,0 +1,177 @@
+from sqlalchemy import event, select, func, insert
+from app import db
+from app.models.user import User
+from app.models.product import Product
+from app.models.product_archive import ProductArchive
+from app.models.daily_stats import DailyStats
+from datetime import datetime, date, time, timedelta
+
+
+def _as_date(value):
+    # func.date() comes back as a string on SQLite and a date on Postgres
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _upsert(connection, day, category_id, deltas):
+    table = DailyStats.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(table).values(day=day, category_id=category_id, **deltas)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['category_id', 'day'],
+            set_={name: table.c[name] + stmt.excluded[name] for name in deltas}
+        )
+        connection.execute(stmt)
+        return
+
+    # Generic fallback: update, insert when the row does not exist yet
+    result = connection.execute(
+        table.update()
+        .where(table.c.category_id == category_id, table.c.day == day)
+        .values({table.c[name]: table.c[name] + delta for name, delta in deltas.items()})
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(day=day, category_id=category_id, **deltas))
+
+
+def record_daily(connection, category_id=None, day=None, **deltas):
+    """Add deltas to today's site-wide row and, if given, the category row"""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    day = day or datetime.utcnow().date()
+    _upsert(connection, day, DailyStats.ALL_CATEGORIES, deltas)
+    if category_id:
+        _upsert(connection, day, category_id, deltas)
+
+
+def get_daily_stats(start, end, category_id=DailyStats.ALL_CATEGORIES):
+    """One indexed range read; days without activity are filled with zeros"""
+    rows = DailyStats.query.filter(
+        DailyStats.category_id == category_id,
+        DailyStats.day.between(start, end)
+    ).order_by(DailyStats.day).all()
+    by_day = {row.day: row.to_dict() for row in rows}
+
+    series = []
+    day = start
+    while day <= end:
+        series.append(by_day.get(day) or dict(
+            {'day': day.isoformat(), 'category_id': category_id},
+            **dict.fromkeys(DailyStats.COUNTERS, 0)
+        ))
+        day += timedelta(days=1)
+    return series
+
+
+def get_daily_stats_by_category(start, end):
+    """Every category row in the range, grouped by category_id"""
+    rows = DailyStats.query.filter(
+        DailyStats.day.between(start, end),
+        DailyStats.category_id != DailyStats.ALL_CATEGORIES
+    ).order_by(DailyStats.category_id, DailyStats.day).all()
+
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.category_id, []).append(row.to_dict())
+    return grouped
+
+
+def backfill_daily_stats(start, end):
+    """Rebuild daily_stats for [start, end] from the base tables.
+
+    New users and listings come from created_at. Sold and deactivated
+    listings have no event history, so their day is taken from updated_at.
+    Archived listings are counted from products_archive the same way.
+    User deactivations cannot be recovered and are left at zero.
+    """
+    start_at = datetime.combine(start, time.min)
+    end_at = datetime.combine(end + timedelta(days=1), time.min)
+    rows = {}
+
+    def add(category_id, day, counter, count):
+        day = _as_date(day)
+        category_ids = [DailyStats.ALL_CATEGORIES] + ([category_id] if category_id else [])
+        for key in ((cid, day) for cid in category_ids):
+            rows.setdefault(key, dict.fromkeys(DailyStats.COUNTERS, 0))[counter] += count
+
+    user_day = func.date(User.created_at)
+    for day, count in db.session.execute(
+        select(user_day, func.count(User.id))
+        .where(User.created_at >= start_at, User.created_at < end_at)
+        .group_by(user_day)
+    ):
+        add(None, day, 'new_users', count)
+
+    for model in (Product, ProductArchive):
+        product_queries = (
+            ('new_listings', model.created_at, None),
+            ('sold_listings', model.updated_at, model.is_sold == True),
+            ('deactivated_listings', model.updated_at, model.is_active == False)
+        )
+        for counter, column, condition in product_queries:
+            day_expr = func.date(column)
+            query = select(model.category_id, day_expr, func.count(model.id))\
+                .where(column >= start_at, column < end_at)\
+                .group_by(model.category_id, day_expr)
+            if condition is not None:
+                query = query.where(condition)
+            for category_id, day, count in db.session.execute(query):
+                add(category_id, day, counter, count)
+
+    table = DailyStats.__table__
+    db.session.execute(table.delete().where(table.c.day.between(start, end)))
+    if rows:
+        db.session.execute(insert(table), [
+            dict(category_id=category_id, day=day, **counters)
+            for (category_id, day), counters in rows.items()
+        ])
+    db.session.commit()
+
+    return len(rows)
+
+
+def _flag_flipped(target, attribute, to_value):
+    history = getattr(db.inspect(target).attrs, attribute).history
+    if not history.has_changes():
+        return False
+    return getattr(target, attribute) == to_value and (not history.deleted or history.deleted[0] != to_value)
+
+
+# Model hooks - record each event on the day it happens
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    record_daily(connection, new_users=1)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if _flag_flipped(target, 'is_active', False):
+        record_daily(connection, deactivated_users=1)
+
+
+@event.listens_for(Product, 'after_insert')
+def _product_inserted(mapper, connection, target):
+    record_daily(connection, category_id=target.category_id, new_listings=1)
+
+
+@event.listens_for(Product, 'after_update')
+def _product_updated(mapper, connection, target):
+    record_daily(
+        connection,
+        category_id=target.category_id,
+        sold_listings=1 if _flag_flipped(target, 'is_sold', True) else 0,
+        deactivated_listings=1 if _flag_flipped(target, 'is_active', False) else 0
+    )
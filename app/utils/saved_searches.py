@@ -0,0 +1,209 @@
+import re
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select, insert
+from app import db
+from app.models.notification import Notification
+from app.models.product import Product
+from app.models.saved_search import SavedSearch
+from app.models.user import User
+from app.utils.jobs import task
+from datetime import datetime, timedelta
+
+_TOKEN = re.compile(r'\w+')
+
+# Rows changed this close to the last sync are read again, so a commit that
+# lands while the previous sync query runs is not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Matched search ids are re-checked against the database in chunks of this size
+_CONFIRM_CHUNK = 500
+
+
+def tokenize(text):
+    """Lowercase words of a listing or of saved-search keywords"""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+class _Search:
+    __slots__ = ('id', 'user_id', 'tokens', 'category_id', 'location', 'min_price', 'max_price', 'key')
+
+    def __init__(self, id, user_id, keywords, category_id, location, min_price, max_price):
+        self.id = id
+        self.user_id = user_id
+        self.tokens = frozenset(tokenize(keywords))
+        self.category_id = category_id
+        self.location = location.strip().lower() if location and location.strip() else None
+        self.min_price = float(min_price) if min_price is not None else None
+        self.max_price = float(max_price) if max_price is not None else None
+        # Text searches are filed under their longest (usually rarest) word,
+        # the rest under their category (None: every listing is a candidate)
+        if self.tokens:
+            self.key = ('token', max(self.tokens, key=lambda token: (len(token), token)))
+        else:
+            self.key = ('category', category_id)
+
+    def matches(self, tokens, category_id, location, price, user_id):
+        if self.user_id == user_id:
+            return False
+        if self.category_id is not None and self.category_id != category_id:
+            return False
+        if self.min_price is not None and (price is None or price < self.min_price):
+            return False
+        if self.max_price is not None and (price is None or price > self.max_price):
+            return False
+        if self.location is not None and self.location not in location:
+            return False
+        return self.tokens <= tokens
+
+
+class SavedSearchIndex:
+    """Saved searches inverted by word and by category.
+
+    A new listing only looks at the searches filed under one of its own
+    words or its category, instead of testing every saved search, so
+    matching cost follows the size of the listing, not the number of
+    searches.
+    """
+
+    def __init__(self):
+        self._searches = {}
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._searches)
+
+    def add(self, row):
+        """Insert or replace a search from a (id, user_id, keywords, category_id, location, min_price, max_price) row"""
+        search = _Search(*row)
+        self.remove(search.id)
+        self._searches[search.id] = search
+        self._buckets.setdefault(search.key, set()).add(search.id)
+
+    def remove(self, search_id):
+        search = self._searches.pop(search_id, None)
+        if search is None:
+            return
+        bucket = self._buckets.get(search.key)
+        bucket.discard(search_id)
+        if not bucket:
+            del self._buckets[search.key]
+
+    def match(self, name, description, category_id, location, price, user_id):
+        """Ids of the searches a listing matches (the seller's own excluded)"""
+        tokens = set(tokenize(name))
+        tokens.update(tokenize(description))
+        location = (location or '').lower()
+        price = float(price) if price is not None else None
+
+        candidates = set()
+        for key in (('category', None), ('category', category_id), *(('token', token) for token in tokens)):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates.update(bucket)
+
+        searches = self._searches
+        return [search_id for search_id in candidates
+                if searches[search_id].matches(tokens, category_id, location, price, user_id)]
+
+
+_COLUMNS = (
+    SavedSearch.id, SavedSearch.user_id, SavedSearch.keywords, SavedSearch.category_id,
+    SavedSearch.location, SavedSearch.min_price, SavedSearch.max_price
+)
+
+# This process's index, kept up to date incrementally from updated_at
+_lock = threading.Lock()
+_state = {
+    'index': None,
+    'built_at': None,
+    'synced_at': None
+}
+
+
+def build_saved_search_index():
+    """Load every active saved search into a new index"""
+    index = SavedSearchIndex()
+    for row in db.session.execute(select(*_COLUMNS).where(SavedSearch.is_active == True)):
+        index.add(tuple(row))
+    return index
+
+
+def _sync(index, since):
+    """Apply searches created, changed or deactivated since `since`"""
+    rows = db.session.execute(
+        select(*_COLUMNS, SavedSearch.is_active).where(SavedSearch.updated_at >= since - SYNC_OVERLAP)
+    )
+    for row in rows:
+        if row.is_active:
+            index.add(tuple(row)[:-1])
+        else:
+            index.remove(row.id)
+
+
+def get_saved_search_index():
+    """The process's index, rebuilt every SAVED_SEARCH_INDEX_REBUILD_SECONDS and synced before each use.
+
+    The full rebuild also drops searches whose rows were hard-deleted
+    (user deletion), which an updated_at sync cannot see.
+    """
+    rebuild_after = current_app.config.get('SAVED_SEARCH_INDEX_REBUILD_SECONDS', 3600)
+    with _lock:
+        started = datetime.utcnow()
+        if _state['index'] is None or time.monotonic() - _state['built_at'] >= rebuild_after:
+            index = build_saved_search_index()
+            _state.update(index=index, built_at=time.monotonic())
+        else:
+            index = _state['index']
+            _sync(index, _state['synced_at'])
+        _state['synced_at'] = started
+        return index
+
+
+def _confirm(search_ids):
+    """(search id, user id) of the matches still active, for active users"""
+    confirmed = []
+    search_ids = sorted(search_ids)
+    for start in range(0, len(search_ids), _CONFIRM_CHUNK):
+        confirmed.extend(db.session.execute(
+            select(SavedSearch.id, SavedSearch.user_id)
+            .join(User, User.id == SavedSearch.user_id)
+            .where(SavedSearch.id.in_(search_ids[start:start + _CONFIRM_CHUNK]),
+                   SavedSearch.is_active == True, User.is_active == True)
+        ).all())
+    return confirmed
+
+
+@task('match_saved_searches')
+def match_saved_searches(product_id):
+    """Background task: notify the owners of saved searches a new listing matches.
+
+    Runs once per listing, against the in-memory index; each matching user
+    gets one notification, and all of them go in one batched INSERT.
+    """
+    product = db.session.get(Product, product_id)
+    if product is None or not product.is_active:
+        return 0
+
+    matched = get_saved_search_index().match(
+        product.name, product.description, product.category_id,
+        product.location, product.price, product.user_id
+    )
+    if not matched:
+        return 0
+
+    user_ids = sorted({user_id for _, user_id in _confirm(matched)})
+    if not user_ids:
+        return 0
+
+    now = datetime.utcnow()
+    message = f'New listing matching your saved search: {product.name}'
+    db.session.execute(insert(Notification), [
+        {'user_id': user_id, 'message': message, 'is_read': False,
+         'is_admin_notification': False, 'created_at': now}
+        for user_id in user_ids
+    ])
+    db.session.commit()
+    print(f"🔔 Listing {product_id} matched saved searches of {len(user_ids)} users")
+    return len(user_ids)
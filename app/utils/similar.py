@@ -0,0 +1,308 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import Counter
+from flask import current_app
+from sqlalchemy import select, insert, distinct
+from sqlalchemy.orm import load_only
+from app import db
+from app.models.category import Category
+from app.models.product import Product
+from app.models.similar_product import SimilarProduct
+from app.models.user import User
+from app.utils.jobs import task
+from datetime import datetime, timedelta
+
+_TOKEN = re.compile(r'\w\w+')
+
+# A word in the name counts as much as this many in the description
+NAME_WEIGHT = 3
+
+# Listings whose rows are replaced per DELETE/INSERT
+_WRITE_CHUNK = 500
+
+# Rows changed this close to the last sync are read again, so a commit that
+# lands while the previous sync query runs is not missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+def tokenize(text):
+    """Lowercase words of two or more characters"""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _term_counts(name, description):
+    tf = Counter(tokenize(description))
+    for token in tokenize(name):
+        tf[token] += NAME_WEIGHT
+    return tf
+
+
+class SimilarityModel:
+    """TF-IDF vectors of one category's listings, with an inverted index.
+
+    Each listing keeps only its `terms_per_listing` heaviest terms, so a
+    neighbour query only walks the postings of those terms instead of
+    comparing against every listing in the category. Words found in every
+    listing of the category get no weight at all.
+
+    add() and remove() change one listing: the document frequencies
+    follow, but only that listing's vector is recomputed. The other
+    vectors keep the IDF they were built with until the next full build.
+    """
+
+    def __init__(self, docs=(), terms_per_listing=20):
+        self.terms_per_listing = terms_per_listing
+        self.document_frequency = Counter()
+        self.terms = {}
+        self.vectors = {}
+        self.postings = {}
+
+        counts = {product_id: _term_counts(name, description) for product_id, name, description in docs}
+        for product_id, tf in counts.items():
+            self.terms[product_id] = frozenset(tf)
+            self.document_frequency.update(tf.keys())
+        for product_id, tf in counts.items():
+            self._index(product_id, tf)
+
+    def _index(self, product_id, tf):
+        total = len(self.terms)
+        weights = []
+        for token, count in tf.items():
+            idf = math.log(total / self.document_frequency[token])
+            if idf > 0:
+                weights.append((token, (1 + math.log(count)) * idf))
+        weights = heapq.nlargest(self.terms_per_listing, weights, key=lambda item: item[1])
+        norm = math.sqrt(sum(weight * weight for _, weight in weights))
+        vector = {token: weight / norm for token, weight in weights} if norm else {}
+
+        self.vectors[product_id] = vector
+        for token, weight in vector.items():
+            self.postings.setdefault(token, {})[product_id] = weight
+
+    def remove(self, product_id):
+        terms = self.terms.pop(product_id, None)
+        if terms is None:
+            return
+        for token in self.vectors.pop(product_id):
+            posting = self.postings[token]
+            del posting[product_id]
+            if not posting:
+                del self.postings[token]
+        for token in terms:
+            self.document_frequency[token] -= 1
+            if not self.document_frequency[token]:
+                del self.document_frequency[token]
+
+    def add(self, product_id, name, description):
+        """Insert or replace one listing"""
+        self.remove(product_id)
+        tf = _term_counts(name, description)
+        self.terms[product_id] = frozenset(tf)
+        self.document_frequency.update(tf.keys())
+        self._index(product_id, tf)
+
+    def neighbours(self, product_id, limit):
+        """[(other id, cosine similarity)] best first, ties broken by the newer listing"""
+        scores = {}
+        for token, weight in self.vectors.get(product_id, {}).items():
+            for other_id, other_weight in self.postings[token].items():
+                if other_id != product_id:
+                    scores[other_id] = scores.get(other_id, 0.0) + weight * other_weight
+        return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+
+def load_category_model(category_id):
+    """SimilarityModel over the active listings of one category (a text-only projection query)"""
+    rows = db.session.execute(
+        select(Product.id, Product.name, Product.description)
+        .where(Product.category_id == category_id, Product.is_active == True)
+    )
+    return SimilarityModel(rows, current_app.config.get('SIMILAR_TERMS_PER_LISTING', 20))
+
+
+# This worker's category models, built once and then synced from updated_at.
+# Held under the lock for the whole update, so jobs on threads take turns.
+_lock = threading.Lock()
+_models = {}
+
+
+def _category_model(category_id):
+    """The cached model of a category, (re)built every SIMILAR_MODEL_REBUILD_SECONDS.
+
+    In between, only listings of the category changed since the last sync
+    (by any worker) are read and applied, through the (category_id,
+    updated_at) index. The rebuild catches what that cannot see: hard
+    deletes, archived listings and drifted IDF.
+    """
+    rebuild_after = current_app.config.get('SIMILAR_MODEL_REBUILD_SECONDS', 3600)
+    started = datetime.utcnow()
+    cached = _models.get(category_id)
+
+    if cached is None or time.monotonic() - cached['built_at'] >= rebuild_after:
+        model = load_category_model(category_id)
+        _models[category_id] = {'model': model, 'built_at': time.monotonic(), 'synced_at': started}
+        return model
+
+    model = cached['model']
+    rows = db.session.execute(
+        select(Product.id, Product.name, Product.description, Product.is_active)
+        .where(Product.category_id == category_id, Product.updated_at >= cached['synced_at'] - SYNC_OVERLAP)
+    )
+    for product_id, name, description, is_active in rows:
+        if is_active:
+            model.add(product_id, name, description)
+        else:
+            model.remove(product_id)
+    cached['synced_at'] = started
+    return model
+
+
+def _replace_rows(neighbours_by_id, now):
+    """Replace the stored neighbour lists of the given listings"""
+    product_ids = sorted(neighbours_by_id)
+    for start in range(0, len(product_ids), _WRITE_CHUNK):
+        chunk = product_ids[start:start + _WRITE_CHUNK]
+        SimilarProduct.query.filter(SimilarProduct.product_id.in_(chunk)).delete(synchronize_session=False)
+        rows = [
+            {'product_id': product_id, 'rank': rank, 'similar_id': similar_id, 'score': score, 'updated_at': now}
+            for product_id in chunk
+            for rank, (similar_id, score) in enumerate(neighbours_by_id[product_id])
+        ]
+        if rows:
+            db.session.execute(insert(SimilarProduct), rows)
+
+
+def rebuild_similar_products(category_id=None):
+    """Recompute every active listing's neighbours, one category (and one commit) at a time.
+
+    Also drops the lists of listings that are no longer active. Returns
+    the number of listings indexed.
+    """
+    limit = current_app.config.get('SIMILAR_LISTINGS_COUNT', 12)
+    if category_id is None:
+        SimilarProduct.query.filter(
+            SimilarProduct.product_id.not_in(select(Product.id).where(Product.is_active == True))
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        category_ids = db.session.execute(
+            select(distinct(Product.category_id)).where(Product.is_active == True)
+        ).scalars().all()
+    else:
+        category_ids = [category_id]
+
+    indexed = 0
+    for category_id in category_ids:
+        model = load_category_model(category_id)
+        _replace_rows({product_id: model.neighbours(product_id, limit) for product_id in model.vectors},
+                      datetime.utcnow())
+        db.session.commit()
+        indexed += len(model.vectors)
+    return indexed
+
+
+@task('update_similar_products')
+def update_similar_products(product_id):
+    """Background task: refresh one listing's neighbours after it was created or edited.
+
+    Only this listing is (re)vectorized, in the worker's cached category
+    model. It gets a fresh list, and it is merged into the lists of its
+    own neighbours, so new listings show up on the pages of similar ones
+    without waiting for the periodic rebuild. Lists it no longer belongs
+    in after an edit are left to that rebuild (`flask listings similar`).
+    """
+    product = db.session.get(Product, product_id)
+    with _lock:
+        for category_id, cached in _models.items():
+            if product is None or not product.is_active or category_id != product.category_id:
+                cached['model'].remove(product_id)
+        if product is None or not product.is_active:
+            SimilarProduct.query.filter_by(product_id=product_id).delete(synchronize_session=False)
+            db.session.commit()
+            return 0
+
+        model = _category_model(product.category_id)
+        model.add(product_id, product.name, product.description)
+        limit = current_app.config.get('SIMILAR_LISTINGS_COUNT', 12)
+        neighbours = model.neighbours(product_id, limit)
+    updated = {product_id: neighbours}
+
+    if neighbours:
+        scores = dict(neighbours)
+        current = {other_id: [] for other_id in scores}
+        rows = db.session.execute(
+            select(SimilarProduct.product_id, SimilarProduct.similar_id, SimilarProduct.score)
+            .where(SimilarProduct.product_id.in_(list(scores)))
+        )
+        for other_id, similar_id, score in rows:
+            if similar_id != product_id:
+                current[other_id].append((similar_id, score))
+        for other_id, others in current.items():
+            others.append((product_id, scores[other_id]))
+            updated[other_id] = heapq.nlargest(limit, others, key=lambda item: (item[1], item[0]))
+
+    _replace_rows(updated, datetime.utcnow())
+    db.session.commit()
+    return len(neighbours)
+
+
+def _absolute_url(url, base_url):
+    if url.startswith('/uploads/'):
+        return f"{base_url}{url}"
+    if url.startswith('uploads/'):
+        return f"{base_url}/{url}"
+    if url.startswith(('http://', 'https://')):
+        return url
+    return None
+
+
+def _card(product, seller_username, category_name, score, base_url):
+    """The fields a recommendation card shows, with the first image only"""
+    images = []
+    image_urls = product.image_urls if isinstance(product.image_urls, list) else []
+    for url in image_urls:
+        full_url = _absolute_url(url.strip(), base_url) if isinstance(url, str) else None
+        if full_url:
+            images = product._responsive_images([url.strip()], [full_url], base_url)
+            break
+
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': float(product.price) if product.price else None,
+        'price_display': f"RWF {float(product.price):,.0f}".replace(',', ' ') if product.price else None,
+        'location': product.location,
+        'is_sold': product.is_sold,
+        'image': images[0] if images else None,
+        'category_id': product.category_id,
+        'category_name': category_name or 'Uncategorized',
+        'seller_username': seller_username or 'Unknown',
+        'score': round(score, 4)
+    }
+
+
+def similar_listings(product_id, limit):
+    """Active neighbours of a listing as card dicts, best first.
+
+    One query: the precomputed rows joined to the listings, sellers and
+    categories, loading only the columns a card needs.
+    """
+    rows = db.session.execute(
+        select(Product, User.username, Category.name, SimilarProduct.score)
+        .join(SimilarProduct, SimilarProduct.similar_id == Product.id)
+        .outerjoin(User, User.id == Product.user_id)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .options(load_only(
+            Product.id, Product.name, Product.price, Product.location, Product.is_sold,
+            Product.image_urls, Product.image_variants, Product.category_id
+        ))
+        .where(SimilarProduct.product_id == product_id, Product.is_active == True)
+        .order_by(SimilarProduct.rank)
+        .limit(limit)
+    ).all()
+
+    base_url = current_app.config.get('BASE_URL', 'http://127.0.0.1:5000')
+    return [_card(product, username, category_name, score, base_url)
+            for product, username, category_name, score in rows]
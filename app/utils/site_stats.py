@@ -0,0 +1,195 @@
+from flask import current_app
+from sqlalchemy import event, select, func, case, distinct, true
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+from app import db
+from app.models.user import User
+from app.models.product import Product
+from app.models.category import Category
+from app.models.site_stats import SiteStats
+from datetime import datetime, timedelta
+
+
+def _week_ago():
+    return datetime.utcnow() - timedelta(days=7)
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def compute_site_stats():
+    """Compute every dashboard counter in a single aggregate statement"""
+    week_ago = _week_ago()
+
+    users = select(
+        func.count(User.id).label('total_users'),
+        _count_if(User.created_at >= week_ago).label('new_users_week')
+    ).subquery()
+
+    products = select(
+        func.count(Product.id).label('total_products'),
+        _count_if(Product.is_active == True).label('active_products'),
+        _count_if(Product.created_at >= week_ago).label('new_products_week'),
+        func.count(distinct(Product.user_id)).label('users_with_products')
+    ).subquery()
+
+    categories = select(
+        func.count(Category.id).label('total_categories')
+    ).subquery()
+
+    # Each subquery yields exactly one row, so joining on TRUE keeps it one row
+    query = select(users, products, categories)\
+        .select_from(users)\
+        .join(products, true())\
+        .join(categories, true())
+
+    row = db.session.execute(query).one()
+    return {key: int(value or 0) for key, value in row._mapping.items()}
+
+
+def reconcile_site_stats():
+    """Recompute the stats row from scratch and store it"""
+    values = compute_site_stats()
+
+    stats = db.session.get(SiteStats, SiteStats.SINGLETON_ID)
+    if stats is None:
+        stats = SiteStats(id=SiteStats.SINGLETON_ID)
+        db.session.add(stats)
+
+    for key, value in values.items():
+        setattr(stats, key, value)
+    stats.reconciled_at = datetime.utcnow()
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker created the row first - theirs is just as fresh
+        db.session.rollback()
+        stats = db.session.get(SiteStats, SiteStats.SINGLETON_ID)
+
+    return stats
+
+
+def get_site_stats():
+    """Return the stats row, reconciling it first if it is missing or stale.
+
+    The hooks add new users and products to the week counters, but nothing
+    ages them out between reconciles: new_users_week and new_products_week
+    may include rows up to SITE_STATS_MAX_AGE older than a week.
+    """
+    max_age = current_app.config.get('SITE_STATS_MAX_AGE', 300)
+
+    stats = db.session.get(SiteStats, SiteStats.SINGLETON_ID)
+    if stats is None or stats.reconciled_at is None or \
+            stats.reconciled_at < datetime.utcnow() - timedelta(seconds=max_age):
+        stats = reconcile_site_stats()
+
+    return stats
+
+
+def _adjust(connection, **deltas):
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    table = SiteStats.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.id == SiteStats.SINGLETON_ID)
+        .values({table.c[name]: table.c[name] + delta for name, delta in deltas.items()})
+    )
+
+
+def adjust_site_stats(**deltas):
+    """Apply counter deltas inside the current session's transaction"""
+    _adjust(db.session.connection(), **deltas)
+
+
+def mark_site_stats_stale():
+    """Force a reconcile on the next read (used after bulk deletes that skip the hooks)"""
+    table = SiteStats.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == SiteStats.SINGLETON_ID)
+        .values(reconciled_at=None)
+    )
+
+
+def _user_product_count(connection, user_id):
+    table = Product.__table__
+    return connection.execute(
+        select(func.count()).select_from(table).where(table.c.user_id == user_id)
+    ).scalar()
+
+
+def _seller_products_in_flush(target, objects):
+    """Ids of the target's seller's products among a flush's new or deleted objects.
+
+    Mapper hooks run once every row of the flush is written, so the row
+    count alone already includes a new seller's other products.
+    """
+    return sorted(obj.id for obj in objects if isinstance(obj, Product) and obj.user_id == target.user_id)
+
+
+# Model hooks - keep the counters current between reconciles
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    _adjust(connection, total_users=1, new_users_week=1)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, target):
+    recent = target.created_at is not None and target.created_at >= _week_ago()
+    _adjust(connection, total_users=-1, new_users_week=-1 if recent else 0)
+
+
+@event.listens_for(Product, 'after_insert')
+def _product_inserted(mapper, connection, target):
+    # Counted once, by the seller's first product in the flush
+    flushed = _seller_products_in_flush(target, object_session(target).new)
+    new_seller = flushed[0] == target.id and _user_product_count(connection, target.user_id) == len(flushed)
+    _adjust(
+        connection,
+        total_products=1,
+        active_products=0 if target.is_active is False else 1,
+        new_products_week=1,
+        users_with_products=1 if new_seller else 0
+    )
+
+
+@event.listens_for(Product, 'after_update')
+def _product_updated(mapper, connection, target):
+    history = db.inspect(target).attrs.is_active.history
+    if not history.has_changes():
+        return
+
+    was_active = history.deleted[0] is not False if history.deleted else True
+    is_active = target.is_active is not False
+    if was_active != is_active:
+        _adjust(connection, active_products=1 if is_active else -1)
+
+
+@event.listens_for(Product, 'after_delete')
+def _product_deleted(mapper, connection, target):
+    recent = target.created_at is not None and target.created_at >= _week_ago()
+    flushed = _seller_products_in_flush(target, object_session(target).deleted)
+    gone = flushed[0] == target.id and _user_product_count(connection, target.user_id) == 0
+    _adjust(
+        connection,
+        total_products=-1,
+        active_products=0 if target.is_active is False else -1,
+        new_products_week=-1 if recent else 0,
+        users_with_products=-1 if gone else 0
+    )
+
+
+@event.listens_for(Category, 'after_insert')
+def _category_inserted(mapper, connection, target):
+    _adjust(connection, total_categories=1)
+
+
+@event.listens_for(Category, 'after_delete')
+def _category_deleted(mapper, connection, target):
+    _adjust(connection, total_categories=-1)
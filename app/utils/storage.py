@@ -0,0 +1,253 @@
+import base64
+import os
+import shutil
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from flask import current_app, url_for
+from itsdangerous import URLSafeTimedSerializer
+from werkzeug.security import safe_join
+
+# Uploads are immutable (content-addressed), so storage copies can be cached forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class Storage(ABC):
+    """Where uploaded files live. Keys are paths like 'products/ab/<sha256>.jpg'.
+
+    A backend missing any of these methods fails when it is constructed.
+    """
+
+    is_local = False
+
+    @abstractmethod
+    def save_file(self, key, source_path, content_type=None):
+        """Store a local file under key (the source may be moved)"""
+
+    @abstractmethod
+    def exists(self, key):
+        """True if key is stored"""
+
+    @abstractmethod
+    def size(self, key):
+        """Size in bytes, or None if the key does not exist"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove key; returns True if something was deleted"""
+
+    @abstractmethod
+    def local_copy(self, key):
+        """Context manager yielding a filesystem path with the contents of key"""
+
+    @abstractmethod
+    def url(self, key):
+        """Public URL clients should fetch key from"""
+
+    @abstractmethod
+    def presign_put(self, key, content_type, expires_in, size, sha256):
+        """Return {'url', 'method', 'headers'} for a direct client upload of exactly
+        `size` bytes hashing to `sha256` (hex)"""
+
+
+class LocalStorage(Storage):
+    """Files under UPLOADS_ROOT, served by the uploads blueprint.
+
+    Direct uploads go to a signed, expiring URL on this app
+    (/api/storage/local-upload/<token>), which stands in for an S3
+    presigned PUT in development and tests.
+    """
+
+    is_local = True
+
+    def __init__(self, root, secret_key):
+        self.root = root
+        self.secret_key = secret_key
+
+    def path(self, key):
+        path = safe_join(self.root, key)
+        if path is None:
+            raise ValueError(f'Invalid storage key: {key}')
+        return path
+
+    def save_file(self, key, source_path, content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        shutil.move(source_path, temp_path)
+        os.replace(temp_path, path)
+
+    def exists(self, key):
+        return os.path.isfile(self.path(key))
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except OSError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    @contextmanager
+    def local_copy(self, key):
+        yield self.path(key)
+
+    def url(self, key):
+        return f"/uploads/{key}"
+
+    def _serializer(self):
+        return URLSafeTimedSerializer(self.secret_key, salt='local-storage-upload')
+
+    def presign_put(self, key, content_type, expires_in, size, sha256):
+        token = self._serializer().dumps({
+            'key': key, 'content_type': content_type, 'expires_in': expires_in, 'size': size
+        })
+        return {
+            'url': url_for('storage.local_upload', token=token, _external=True),
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type, 'Content-Length': str(size)}
+        }
+
+    def verify_upload_token(self, token):
+        """Key and content type of a valid upload token, or None if invalid/expired"""
+        try:
+            data = self._serializer().loads(token, max_age=current_app.config.get('PRESIGNED_UPLOAD_EXPIRES', 900))
+        except Exception:
+            return None
+        return data
+
+
+class S3Storage(Storage):
+    """Any S3-compatible object store (AWS S3, MinIO, R2, ...).
+
+    Needs boto3, which is only imported when this backend is configured.
+    """
+
+    def __init__(self, bucket, endpoint_url=None, region=None, access_key=None,
+                 secret_key=None, public_url=None, prefix=''):
+        import boto3
+        from botocore.config import Config as BotoConfig
+
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            config=BotoConfig(signature_version='s3v4')
+        )
+        if public_url:
+            self.public_url = public_url.rstrip('/')
+        elif endpoint_url:
+            self.public_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+        else:
+            self.public_url = f"https://{bucket}.s3.amazonaws.com"
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _head(self, key):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise
+
+    def save_file(self, key, source_path, content_type=None):
+        extra_args = {'CacheControl': IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra_args['ContentType'] = content_type
+        self.client.upload_file(source_path, self.bucket, self._key(key), ExtraArgs=extra_args)
+        os.remove(source_path)
+
+    def exists(self, key):
+        return self._head(key) is not None
+
+    def size(self, key):
+        head = self._head(key)
+        return head['ContentLength'] if head else None
+
+    def delete(self, key):
+        if not self.exists(key):
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+        return True
+
+    @contextmanager
+    def local_copy(self, key):
+        suffix = os.path.splitext(key)[1]
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        os.close(handle)
+        try:
+            self.client.download_file(self.bucket, self._key(key), path)
+            yield path
+        finally:
+            os.remove(path)
+
+    def url(self, key):
+        return f"{self.public_url}/{self._key(key)}"
+
+    def presign_put(self, key, content_type, expires_in, size, sha256):
+        # Length and checksum are part of the signature: the store rejects any
+        # other body instead of accepting an object of arbitrary size
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode('ascii')
+        url = self.client.generate_presigned_url(
+            'put_object',
+            Params={
+                'Bucket': self.bucket,
+                'Key': self._key(key),
+                'ContentType': content_type,
+                'ContentLength': size,
+                'ChecksumSHA256': checksum,
+                'CacheControl': IMMUTABLE_CACHE_CONTROL
+            },
+            ExpiresIn=expires_in
+        )
+        return {
+            'url': url,
+            'method': 'PUT',
+            'headers': {
+                'Content-Type': content_type,
+                'Content-Length': str(size),
+                'x-amz-checksum-sha256': checksum,
+                'Cache-Control': IMMUTABLE_CACHE_CONTROL
+            }
+        }
+
+
+def create_storage(config):
+    """Build the storage backend selected by STORAGE_BACKEND"""
+    backend = config.get('STORAGE_BACKEND', 'local')
+
+    if backend == 'local':
+        return LocalStorage(config['UPLOADS_ROOT'], config['SECRET_KEY'])
+    if backend == 's3':
+        return S3Storage(
+            bucket=config['S3_BUCKET'],
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+            access_key=config.get('S3_ACCESS_KEY_ID'),
+            secret_key=config.get('S3_SECRET_ACCESS_KEY'),
+            public_url=config.get('S3_PUBLIC_URL'),
+            prefix=config.get('S3_KEY_PREFIX', '')
+        )
+    raise ValueError(f'Unknown STORAGE_BACKEND: {backend}')
+
+
+def get_storage():
+    """The app's storage backend, created on first use"""
+    storage = current_app.extensions.get('storage')
+    if storage is None:
+        storage = current_app.extensions['storage'] = create_storage(current_app.config)
+    return storage
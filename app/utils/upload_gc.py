@@ -0,0 +1,207 @@
+import os
+import re
+import time
+from sqlalchemy import select
+from app import db
+from app.models.product import Product
+from app.models.product_archive import ProductArchive
+from app.models.stored_file import StoredFile
+from app.models.uploaded_image import UploadedImage
+from app.utils.storage import get_storage
+from app.utils.uploads import CONTENT_KEY, storage_key
+from datetime import datetime, timedelta
+
+# products/ab/<stem>_<width>w.<ext> -> products/ab/<stem>
+VARIANT_SUFFIX = re.compile(r'_\d+w$')
+
+
+def _image_list(image_urls):
+    if isinstance(image_urls, list):
+        return [url for url in image_urls if url and isinstance(url, str)]
+    if isinstance(image_urls, str) and image_urls.strip():
+        return [image_urls]
+    return []
+
+
+def _stem(key):
+    return VARIANT_SUFFIX.sub('', os.path.splitext(key)[0])
+
+
+def _digest(key):
+    """SHA-256 a content-addressed original or variant is named after"""
+    match = CONTENT_KEY.match(key)
+    return match.group(2) if match else None
+
+
+def referenced_stems(batch_size=1000):
+    """Storage keys (without extension) of every image a product uses.
+
+    Live and archived products are read in primary-key batches with a
+    projection query, so only the id and URL columns are ever loaded.
+    Variants share their original's stem, so one entry covers an image and
+    all its sizes.
+    """
+    stems = set()
+
+    for model in (Product, ProductArchive):
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(model.id, model.image_urls, model.image_variants)
+                .where(model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            for row in rows:
+                urls = _image_list(row.image_urls)
+                for meta in (row.image_variants or {}).values():
+                    urls.extend(variant['url'] for variant in (meta or {}).get('variants') or [])
+                for url in urls:
+                    key = storage_key(url)
+                    if key:
+                        stems.add(_stem(key))
+
+    return stems
+
+
+def _scan(root, prefix):
+    """Yield (key, DirEntry) for every file below root, depth first"""
+    stack = [(root, prefix)]
+    while stack:
+        directory, key_prefix = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    key = f"{key_prefix}/{entry.name}"
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, key))
+                    elif entry.is_file(follow_symlinks=False):
+                        yield key, entry
+        except FileNotFoundError:
+            continue
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _recently_referenced(keys, cutoff):
+    """Digests among keys that were (re)uploaded since the cutoff"""
+    digests = {_digest(key) for key in keys} - {None}
+    if not digests:
+        return set()
+    return set(db.session.execute(
+        select(StoredFile.sha256)
+        .where(StoredFile.sha256.in_(digests), StoredFile.last_referenced_at >= cutoff)
+    ).scalars().all())
+
+
+def _forget(keys):
+    """Drop the bookkeeping rows of deleted originals"""
+    urls = [f"/uploads/{key}" for key in keys]
+    if not urls:
+        return
+    StoredFile.query.filter(StoredFile.url.in_(urls)).delete(synchronize_session=False)
+    UploadedImage.query.filter(UploadedImage.url.in_(urls)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def collect_orphaned_uploads(grace_period=timedelta(hours=24), batch_size=500,
+                             max_deletes_per_second=None, dry_run=False, log=print):
+    """Delete upload files no product references any more.
+
+    Walks uploads/products with os.scandir in batches of batch_size files
+    and deletes those that are not referenced and were last modified
+    before the grace period - that covers uploads still waiting for their
+    product and files written by in-flight requests. Content that was
+    re-uploaded during the grace period is kept even if it is old on disk.
+
+    Returns a summary dict. With dry_run nothing is deleted.
+    """
+    storage = get_storage()
+    if not storage.is_local:
+        raise RuntimeError('Upload GC walks the local uploads directory; '
+                           'use a bucket lifecycle rule for object storage')
+
+    started = time.monotonic()
+    cutoff = datetime.utcnow() - grace_period
+    cutoff_ts = time.time() - grace_period.total_seconds()
+    stems = referenced_stems()
+
+    summary = {
+        'dry_run': dry_run,
+        'referenced_images': len(stems),
+        'scanned': 0,
+        'referenced': 0,
+        'too_new': 0,
+        'orphaned': 0,
+        'deleted': 0,
+        'bytes_freed': 0,
+        'errors': 0
+    }
+
+    root = os.path.join(storage.root, 'products')
+    for batch in _batches(_scan(root, 'products'), batch_size):
+        batch_started = time.monotonic()
+        summary['scanned'] += len(batch)
+
+        candidates = []
+        for key, entry in batch:
+            if _stem(key) in stems:
+                summary['referenced'] += 1
+                continue
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime >= cutoff_ts:
+                summary['too_new'] += 1
+                continue
+            candidates.append((key, stat.st_size))
+
+        recent = _recently_referenced([key for key, _ in candidates], cutoff)
+        deleted_originals = []
+        for key, size in candidates:
+            if _digest(key) in recent:
+                summary['too_new'] += 1
+                continue
+
+            summary['orphaned'] += 1
+            if dry_run:
+                log(f"🔍 Would delete {key} ({size} bytes)")
+                summary['bytes_freed'] += size
+                continue
+
+            try:
+                if storage.delete(key):
+                    summary['deleted'] += 1
+                    summary['bytes_freed'] += size
+                    if not VARIANT_SUFFIX.search(os.path.splitext(key)[0]):
+                        deleted_originals.append(key)
+            except OSError as e:
+                summary['errors'] += 1
+                log(f"❌ Could not delete {key}: {str(e)}")
+
+        if deleted_originals:
+            _forget(deleted_originals)
+
+        # Rate limit: spread deletions so the disk keeps serving requests
+        if max_deletes_per_second and not dry_run and candidates:
+            min_duration = len(candidates) / max_deletes_per_second
+            elapsed = time.monotonic() - batch_started
+            if elapsed < min_duration:
+                time.sleep(min_duration - elapsed)
+
+    summary['seconds'] = round(time.monotonic() - started, 2)
+    return summary
@@ -0,0 +1,296 @@
+import hashlib
+import os
+import re
+import tempfile
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.stored_file import StoredFile
+from app.utils.storage import get_storage
+from datetime import datetime
+
+CHUNK_SIZE = 64 * 1024
+PRODUCT_UPLOADS_URL = '/uploads/products/'
+
+# Storage key of a content-addressed original, products/<aa>/<sha256>.<ext>, or of one
+# of its resized variants, products/<aa>/<sha256>_<width>w.<ext>. Groups: prefix,
+# digest, variant suffix (None for originals), extension
+CONTENT_KEY = re.compile(r'^products/([0-9a-f]{2})/(\1[0-9a-f]{62})(_\d+w)?\.([a-z0-9]+)$')
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def original_key_match(key):
+    """CONTENT_KEY match for an original (not a variant), or None"""
+    match = CONTENT_KEY.match(key or '')
+    if match is None or match.group(3):
+        return None
+    return match
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+    'avif': 'image/avif'
+}
+
+
+def relative_upload_path(image_url):
+    """Path below uploads/products for an image URL, or None.
+
+    Accepts relative and absolute URLs as well as the bare filenames that
+    older rows contain. Anything escaping the uploads folder is rejected.
+    """
+    if not image_url or not isinstance(image_url, str):
+        return None
+
+    if PRODUCT_UPLOADS_URL in image_url:
+        relative = image_url.split(PRODUCT_UPLOADS_URL, 1)[1]
+    elif image_url.startswith('http'):
+        return None
+    else:
+        relative = image_url
+    relative = relative.split('?')[0].split('#')[0]
+
+    normalized = os.path.normpath(relative)
+    if not relative or normalized.startswith(('..', '/')) or os.path.isabs(normalized):
+        return None
+    return normalized
+
+
+def storage_key(image_url):
+    """Storage key ('products/...') of an image URL, or None"""
+    relative = relative_upload_path(image_url)
+    return f"products/{relative}" if relative else None
+
+
+def content_key(digest, extension):
+    # Two-character shard keeps directories small enough to scan
+    return f"products/{digest[:2]}/{digest}.{extension}"
+
+
+def _content_url(digest, extension):
+    return f"/uploads/{content_key(digest, extension)}"
+
+
+def _record_upload(digest, url, size):
+    """Make sure stored content has its row, and mark it as just uploaded.
+
+    An upload is not a reference: only the products using the content
+    count (reference_stored_files). Uploads no product ends up using are
+    left to the orphan GC, whose grace period runs from last_referenced_at.
+    """
+    table = StoredFile.__table__
+    now = datetime.utcnow()
+
+    for _ in range(2):
+        result = db.session.execute(
+            table.update()
+            .where(table.c.sha256 == digest)
+            .values(last_referenced_at=now)
+        )
+        if result.rowcount:
+            return
+        try:
+            with db.session.begin_nested():
+                db.session.add(StoredFile(sha256=digest, url=url, size=size, ref_count=0,
+                                          created_at=now, last_referenced_at=now))
+            return
+        except IntegrityError:
+            # Someone stored the same content concurrently - use their row
+            continue
+
+
+def _tracked_url(image_url):
+    """The stored_files url of an image URL (relative or absolute), or None"""
+    relative = relative_upload_path(image_url)
+    return PRODUCT_UPLOADS_URL + relative if relative else None
+
+
+def reference_stored_files(image_urls):
+    """Count one more product using each URL.
+
+    Pass the URLs a product starts using, each once, before committing
+    its create/update. URLs without a stored_files row are ignored.
+    """
+    table = StoredFile.__table__
+    now = datetime.utcnow()
+
+    for image_url in image_urls:
+        url = _tracked_url(image_url)
+        if url is None:
+            continue
+        db.session.execute(
+            table.update()
+            .where(table.c.url == url)
+            .values(ref_count=table.c.ref_count + 1, last_referenced_at=now)
+        )
+
+
+def store_upload(file_storage, extension):
+    """Save an upload under its SHA-256 and record it in stored_files.
+
+    The body is streamed to a temporary file while it is hashed, so it is
+    never held in memory. If the content is already stored the temporary
+    file is dropped and the existing copy is reused.
+
+    Returns (url, created) where created is False for a duplicate. The
+    row is added to the session; the caller commits.
+    """
+    storage = get_storage()
+    handle, temp_path = tempfile.mkstemp(prefix='upload-', suffix='.tmp')
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                temp_file.write(chunk)
+                size += len(chunk)
+
+        digest = digest.hexdigest()
+        # Same bytes under another extension (.jpg vs .jpeg) share the first URL
+        existing = db.session.get(StoredFile, digest)
+        url = existing.url if existing else _content_url(digest, extension)
+        key = storage_key(url)
+
+        created = not storage.exists(key)
+        if created:
+            storage.save_file(key, temp_path, CONTENT_TYPES.get(key.rsplit('.', 1)[-1]))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    _record_upload(digest, url, size)
+    return url, created
+
+
+def presign_upload(digest, extension, size, expires_in):
+    """Describe how a client uploads content with this SHA-256 itself.
+
+    Returns a dict with the storage key, the URL the image will have and,
+    unless the content is already stored, a presigned PUT for it. The
+    PUT is bound to the declared size and hash. The bytes go straight to
+    storage; nothing is recorded until complete_direct_upload().
+    """
+    existing = db.session.get(StoredFile, digest)
+    url = existing.url if existing else _content_url(digest, extension)
+    key = storage_key(url)
+    storage = get_storage()
+
+    result = {'key': key, 'image_url': url, 'upload_required': False}
+    if existing is None and not storage.exists(key):
+        result['upload_required'] = True
+        result['upload'] = storage.presign_put(key, CONTENT_TYPES[extension], expires_in, size, digest)
+        result['expires_in'] = expires_in
+    return result
+
+
+def complete_direct_upload(key, max_size=None):
+    """Record a directly uploaded object in stored_files.
+
+    Returns the image URL, or None if the key is not a content-addressed
+    product image or nothing has been uploaded under it yet. An object
+    over max_size is deleted and UploadTooLarge raised. The row is added
+    to the session; the caller commits.
+    """
+    match = original_key_match(key)
+    if match is None:
+        return None
+
+    storage = get_storage()
+    size = storage.size(key)
+    if size is None:
+        return None
+    if max_size and size > max_size:
+        storage.delete(key)
+        raise UploadTooLarge(f'{key} is {size} bytes, over the {max_size} byte limit')
+
+    url = f"/uploads/{key}"
+    _record_upload(match.group(2), url, size)
+    return url
+
+
+def save_verified_upload(key, stream, max_size=None):
+    """Store a stream under a content-addressed key if its SHA-256 matches.
+
+    Used by backends without native presigned uploads. Returns True when
+    stored; a mismatching or oversized body is discarded.
+    """
+    match = original_key_match(key)
+    if match is None:
+        return False
+
+    handle, temp_path = tempfile.mkstemp(prefix='upload-', suffix='.tmp')
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        with os.fdopen(handle, 'wb') as temp_file:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_size and size > max_size:
+                    return False
+                digest.update(chunk)
+                temp_file.write(chunk)
+
+        if digest.hexdigest() != match.group(2):
+            return False
+        get_storage().save_file(key, temp_path, CONTENT_TYPES.get(match.group(4)))
+        return True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def release_stored_files(image_urls):
+    """Drop one reference per URL, for products that stopped using them.
+
+    Pass each product's URLs once (the counterpart of
+    reference_stored_files). Returns the URLs whose last reference is
+    gone and whose files should be unlinked. URLs without a stored_files
+    row (uploads from before content addressing) are returned as-is, as
+    they were never shared.
+    """
+    table = StoredFile.__table__
+    started = datetime.utcnow()
+    to_unlink = []
+
+    for image_url in image_urls:
+        url = _tracked_url(image_url)
+        if url is None:
+            continue
+
+        tracked = db.session.execute(
+            table.select().where(table.c.url == url)
+        ).first()
+        if tracked is None:
+            to_unlink.append(image_url)
+            continue
+
+        db.session.execute(
+            table.update()
+            .where(table.c.url == url, table.c.ref_count > 0)
+            .values(ref_count=table.c.ref_count - 1)
+        )
+        # Only the caller whose delete wins unlinks. Content uploaded again
+        # since this started is kept for its new owner (or the orphan GC)
+        removed = db.session.execute(
+            table.delete().where(table.c.url == url, table.c.ref_count <= 0,
+                                 table.c.last_referenced_at < started)
+        )
+        if removed.rowcount:
+            to_unlink.append(image_url)
+
+    db.session.commit()
+    return to_unlink
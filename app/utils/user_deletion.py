@@ -0,0 +1,233 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.user import User
+from app.models.product import Product
+from app.models.product_archive import ProductArchive
+from app.models.product_stats import ProductStats
+from app.models.notification import Notification
+from app.models.saved_search import SavedSearch
+from app.models.similar_product import SimilarProduct
+from app.models.user_session import UserSession
+from app.models.user_deletion_job import UserDeletionJob
+from app.routes.products import delete_product_images
+from app.utils.jobs import task, enqueue, is_final_attempt
+from app.utils.site_stats import adjust_site_stats
+from datetime import datetime, timedelta
+
+# Deletions run in the job worker; file unlinks get their own thread there so
+# slow disks never hold up the row deletes.
+_file_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-cleanup')
+
+ACTIVE_STATUSES = (
+    UserDeletionJob.STATUS_PENDING,
+    UserDeletionJob.STATUS_RUNNING,
+    UserDeletionJob.STATUS_CLEANING_FILES
+)
+
+
+def start_user_deletion(user, requested_by):
+    """Create a deletion job for a user and start it in the background.
+
+    Returns (job, created). If a job for this user is already in flight it
+    is returned instead of starting a second one.
+    """
+    existing = UserDeletionJob.query.filter(
+        UserDeletionJob.user_id == user.id,
+        UserDeletionJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if existing:
+        return existing, False
+
+    # Lock the account out straight away; the rows go in the background
+    user.is_active = False
+
+    job = UserDeletionJob(
+        user_id=user.id,
+        requested_by=requested_by.id if requested_by else None,
+        username=user.username,
+        email=user.email
+    )
+    db.session.add(job)
+    db.session.flush()
+    enqueue('delete_user_data', {'job_id': job.id}, commit=False)
+    db.session.commit()
+
+    return job, True
+
+
+@task('delete_user_data', max_attempts=3)
+def delete_user_data(job_id):
+    """Background task wrapper that records failures on the deletion job.
+
+    While the queue will still retry, the job goes back to PENDING (with
+    the error kept), so it still counts as in flight and no second
+    deletion can be started for the user. Only the last attempt marks it
+    FAILED.
+    """
+    try:
+        run_user_deletion(job_id)
+    except Exception as e:
+        db.session.rollback()
+        final = is_final_attempt()
+        print(f"❌ User deletion job {job_id} failed{'' if final else ', will retry'}: {str(e)}")
+        job = db.session.get(UserDeletionJob, job_id)
+        if job:
+            job.error = str(e)
+            if final:
+                job.status = UserDeletionJob.STATUS_FAILED
+                job.finished_at = datetime.utcnow()
+            else:
+                job.status = UserDeletionJob.STATUS_PENDING
+            db.session.commit()
+        # Let the job queue retry; every step picks up where it stopped
+        raise
+
+
+def _image_list(image_urls):
+    """A row's image URLs, each once: one product holds one reference per file"""
+    if isinstance(image_urls, list):
+        return list(dict.fromkeys(url for url in image_urls if url))
+    if isinstance(image_urls, str) and image_urls.strip():
+        return [image_urls]
+    return []
+
+
+def _delete_files(app, job_id, image_urls):
+    with app.app_context():
+        deleted = delete_product_images(image_urls)
+
+        table = UserDeletionJob.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id == job_id)
+            .values(images_deleted=table.c.images_deleted + len(deleted))
+        )
+        db.session.commit()
+        return len(deleted)
+
+
+def run_user_deletion(job_id):
+    """Delete a user's rows in primary-key batches, then the user.
+
+    Each product batch is read with a projection query (no full model
+    loading), deleted by PK range and committed on its own, and its image
+    paths are handed to the file-cleanup worker.
+    """
+    job = db.session.get(UserDeletionJob, job_id)
+    if job is None or job.status == UserDeletionJob.STATUS_COMPLETED:
+        return job
+
+    app = current_app._get_current_object()
+    batch_size = current_app.config.get('USER_DELETION_BATCH_SIZE', 500)
+    user_id = job.user_id
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    file_futures = []
+    products_deleted = 0
+
+    job.status = UserDeletionJob.STATUS_RUNNING
+    job.error = None
+    job.started_at = job.started_at or datetime.utcnow()
+    db.session.commit()
+
+    # Products
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            select(Product.id, Product.image_urls, Product.is_active, Product.created_at)
+            .where(Product.user_id == user_id, Product.id > last_id)
+            .order_by(Product.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        first_id, last_id = rows[0].id, rows[-1].id
+        deleted_count = Product.query.filter(
+            Product.user_id == user_id,
+            Product.id.between(first_id, last_id)
+        ).delete(synchronize_session=False)
+        ProductStats.query.filter(ProductStats.product_id.in_([row.id for row in rows]))\
+            .delete(synchronize_session=False)
+        SimilarProduct.query.filter(SimilarProduct.product_id.in_([row.id for row in rows]))\
+            .delete(synchronize_session=False)
+
+        # Bulk deletes skip the model hooks, so adjust the counters here
+        adjust_site_stats(
+            total_products=-deleted_count,
+            active_products=-sum(1 for row in rows if row.is_active is not False),
+            new_products_week=-sum(1 for row in rows if row.created_at and row.created_at >= week_ago)
+        )
+
+        image_urls = [url for row in rows for url in _image_list(row.image_urls)]
+        products_deleted += deleted_count
+        job.products_deleted += deleted_count
+        job.images_queued += len(image_urls)
+        db.session.commit()
+
+        # Files only go once the rows referencing them are gone
+        if image_urls:
+            file_futures.append(_file_executor.submit(_delete_files, app, job_id, image_urls))
+
+    if products_deleted:
+        adjust_site_stats(users_with_products=-1)
+
+    # Archived listings (not part of the dashboard counters)
+    while True:
+        rows = db.session.execute(
+            select(ProductArchive.id, ProductArchive.image_urls)
+            .where(ProductArchive.user_id == user_id)
+            .order_by(ProductArchive.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+
+        ids = [row.id for row in rows]
+        ProductArchive.query.filter(ProductArchive.id.in_(ids)).delete(synchronize_session=False)
+        ProductStats.query.filter(ProductStats.product_id.in_(ids)).delete(synchronize_session=False)
+        image_urls = [url for row in rows for url in _image_list(row.image_urls)]
+        job.products_deleted += len(rows)
+        job.images_queued += len(image_urls)
+        db.session.commit()
+
+        if image_urls:
+            file_futures.append(_file_executor.submit(_delete_files, app, job_id, image_urls))
+
+    # Notifications
+    while True:
+        ids = db.session.execute(
+            select(Notification.id)
+            .where(Notification.user_id == user_id)
+            .order_by(Notification.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+        job.notifications_deleted += len(ids)
+        db.session.commit()
+
+    # Sessions and saved searches, then the user itself
+    UserSession.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    SavedSearch.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    user = db.session.get(User, user_id)
+    if user:
+        db.session.delete(user)
+
+    job.status = UserDeletionJob.STATUS_CLEANING_FILES if file_futures else UserDeletionJob.STATUS_COMPLETED
+    if not file_futures:
+        job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    if file_futures:
+        wait(file_futures)
+        job.status = UserDeletionJob.STATUS_COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+    print(f"🗑️ User {user_id} deleted: {job.products_deleted} products, "
+          f"{job.notifications_deleted} notifications, {job.images_queued} images queued")
+    return job
@@ -0,0 +1,234 @@
+import atexit
+import os
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.product_stats import ProductStats
+from datetime import datetime
+
+
+def add_product_views(connection, counts):
+    """Add {product_id: views} to product_stats in one batched upsert"""
+    if not counts:
+        return
+
+    table = ProductStats.__table__
+    now = datetime.utcnow()
+    rows = [{'product_id': product_id, 'views': views, 'updated_at': now}
+            for product_id, views in sorted(counts.items())]
+    dialect = connection.dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['product_id'],
+            set_={'views': table.c.views + stmt.excluded.views, 'updated_at': stmt.excluded.updated_at}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Generic fallback: update, insert the rows that do not exist yet
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.product_id == row['product_id'])
+            .values(views=table.c.views + row['views'], updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(**row))
+
+
+def product_views(product_ids):
+    """{product_id: views} for a page of listings, in one query"""
+    product_ids = list(product_ids)
+    if not product_ids:
+        return {}
+    rows = db.session.execute(
+        select(ProductStats.product_id, ProductStats.views).where(ProductStats.product_id.in_(product_ids))
+    )
+    return {product_id: int(views or 0) for product_id, views in rows}
+
+
+class DatabaseSink:
+    """Each process writes its own batches straight to product_stats"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def write(self, counts):
+        with self.engine.begin() as connection:
+            add_product_views(connection, counts)
+
+
+class RedisSink:
+    """Processes add their batches to one Redis hash; whichever process
+    holds the flush lock moves the totals to product_stats.
+
+    That makes it one database upsert per interval for the whole fleet
+    instead of one per worker. Needs the redis package, which is only
+    imported when this backend is configured.
+    """
+
+    PENDING_KEY = 'hm:product_views'
+    LOCK_KEY = 'hm:product_views:flush-lock'
+
+    def __init__(self, engine, url, interval):
+        import redis
+
+        self.engine = engine
+        self.client = redis.Redis.from_url(url)
+        self.interval = interval
+
+    def write(self, counts):
+        pipe = self.client.pipeline(transaction=False)
+        for product_id, views in counts.items():
+            pipe.hincrby(self.PENDING_KEY, product_id, views)
+        pipe.execute()
+        # The counts are safe in Redis now; a failed move is retried by the next flush
+        try:
+            self._move_to_database()
+        except Exception as e:
+            print(f"⚠️ Moving view counts from Redis to the database failed: {str(e)}")
+
+    def _move_to_database(self):
+        import redis
+
+        if not self.client.set(self.LOCK_KEY, os.getpid(), nx=True, ex=max(int(self.interval), 1)):
+            return
+        # RENAME is atomic: increments arriving from now on go to a fresh hash
+        claimed = f'{self.PENDING_KEY}:{os.getpid()}:{time.time():.6f}'
+        try:
+            self.client.rename(self.PENDING_KEY, claimed)
+        except redis.ResponseError:
+            return  # nothing pending
+        totals = {int(product_id): int(views) for product_id, views in self.client.hgetall(claimed).items()}
+        try:
+            with self.engine.begin() as connection:
+                add_product_views(connection, totals)
+        except Exception:
+            # Put them back for the next flush
+            pipe = self.client.pipeline(transaction=False)
+            for product_id, views in totals.items():
+                pipe.hincrby(self.PENDING_KEY, product_id, views)
+            pipe.execute()
+            raise
+        finally:
+            self.client.delete(claimed)
+
+
+class ViewCounter:
+    """In-process buffer of listing views, flushed in batches.
+
+    record() is a dict increment under a lock, so counting a view adds no
+    database write to the request. A daemon thread flushes the buffer
+    every VIEW_COUNTER_FLUSH_INTERVAL seconds (and at exit) through the
+    sink. A failed flush puts the counts back into the buffer.
+    """
+
+    def __init__(self, sink, interval=5.0, max_pending=10000):
+        self.sink = sink
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._atexit_registered = False
+
+    def record(self, product_id, views=1):
+        with self._lock:
+            if self._pid != os.getpid():
+                # First view in this process (or in a forked worker): own buffer, own flusher
+                self._pid = os.getpid()
+                self._pending = {}
+                self._start()
+            self._pending[product_id] = self._pending.get(product_id, 0) + views
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        """Write the buffered counts now; returns the number of listings written"""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._pending = self._pending, {}
+            if not counts:
+                return 0
+            try:
+                self.sink.write(counts)
+            except Exception as e:
+                with self._lock:
+                    for product_id, views in counts.items():
+                        self._pending[product_id] = self._pending.get(product_id, 0) + views
+                print(f"⚠️ View counter flush failed, {len(counts)} listings kept for the next one: {str(e)}")
+                return 0
+            return len(counts)
+
+    def _start(self):
+        self._wakeup = threading.Event()
+        threading.Thread(target=self._run, name='view-counter', daemon=True).start()
+        if not self._atexit_registered:
+            # Forked workers inherit the registration
+            atexit.register(self.flush)
+            self._atexit_registered = True
+
+    def _run(self):
+        pid = os.getpid()
+        while self._pid == pid:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+def create_view_counter(app):
+    """Build the view counter selected by VIEW_COUNTER_BACKEND"""
+    config = app.config
+    backend = config.get('VIEW_COUNTER_BACKEND', 'database')
+    interval = config.get('VIEW_COUNTER_FLUSH_INTERVAL', 5.0)
+
+    with app.app_context():
+        engine = db.engine
+    if backend == 'database':
+        sink = DatabaseSink(engine)
+    elif backend == 'redis':
+        sink = RedisSink(engine, config['VIEW_COUNTER_REDIS_URL'], interval)
+    else:
+        raise ValueError(f'Unknown VIEW_COUNTER_BACKEND: {backend}')
+    return ViewCounter(sink, interval=interval, max_pending=config.get('VIEW_COUNTER_MAX_PENDING', 10000))
+
+
+_create_lock = threading.Lock()
+
+
+def get_view_counter():
+    """The app's view counter, created on first use"""
+    counter = current_app.extensions.get('view_counter')
+    if counter is None:
+        with _create_lock:
+            counter = current_app.extensions.get('view_counter')
+            if counter is None:
+                app = current_app._get_current_object()
+                counter = app.extensions['view_counter'] = create_view_counter(app)
+    return counter
+
+
+def record_view(product_id):
+    """Count one view of a listing (buffered; never fails the request)"""
+    if not current_app.config.get('VIEW_COUNTER_ENABLED', True):
+        return
+    try:
+        get_view_counter().record(product_id)
+    except Exception as e:
+        print(f"⚠️ Could not record view of product {product_id}: {str(e)}")
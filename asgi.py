@@ -0,0 +1,9 @@
+"""ASGI entry point for the optional async serving mode (see app/asgi.py).
+
+    uvicorn asgi:app --workers 4
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+"""
+from app.asgi import create_asgi_app
+import os
+
+app = create_asgi_app(os.getenv('FLASK_ENV', 'production'))
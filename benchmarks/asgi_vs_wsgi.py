@@ -0,0 +1,105 @@
+"""Concurrency of the sync WSGI workers against the ASGI mode at the same worker count.
+
+Starts gunicorn with gunicorn.conf.py twice with the same number of
+processes: sync workers serving run:app, then uvicorn workers serving
+asgi:app. Each one is loaded with the same number of keep-alive clients
+on the catalogue, category and notification reads, and the script reports
+requests/second, latency percentiles and the resident memory of the
+whole server process tree. Uses a throwaway SQLite database seeded with
+realistic listings; --database-url points it at an empty scratch Postgres
+database instead, where the async mode pays off most because every query
+waits on the network.
+
+    python benchmarks/asgi_vs_wsgi.py [--workers 2] [--concurrency 64] [--duration 10]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load import free_port, run_load, tree_rss_mb, wait_ready
+from seed import seed_listings
+
+PATHS = ['/api/products/?per_page=20', '/api/categories/', '/api/notifications/']
+
+MODES = {
+    'wsgi sync': ['-k', 'sync', 'run:app'],
+    'asgi uvicorn': ['-k', 'uvicorn.workers.UvicornWorker', 'asgi:app']
+}
+
+
+def run(mode, env, args, headers):
+    port = free_port()
+    env = dict(env, GUNICORN_WORKERS=str(args.workers), GUNICORN_BIND=f'127.0.0.1:{port}',
+               GUNICORN_MAX_REQUESTS='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null',
+         *MODES[mode]],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(port, PATHS[0]):
+            return None
+        results = {}
+        for path in PATHS:
+            results[path] = run_load(port, path, args.concurrency, args.duration, headers=headers)
+            results[path]['rss'] = tree_rss_mb(server.pid)
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--database-url', help='Empty scratch database to seed and use instead of a fresh SQLite file.')
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if not database_url:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    env = dict(os.environ, DATABASE_URL=database_url, FLASK_ENV='production')
+    os.environ['DATABASE_URL'] = database_url
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app, db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            token = seed_listings(db, args.products, random.Random(42))
+
+    headers = {'Accept-Encoding': 'gzip', 'Authorization': f'Bearer {token}'}
+
+    if importlib.util.find_spec('uvicorn'):
+        modes = list(MODES)
+    else:
+        print('uvicorn is not installed, only the WSGI baseline will run')
+        modes = ['wsgi sync']
+
+    print(f"{args.workers} workers, {args.concurrency} clients, {args.duration:.0f}s per endpoint\n")
+    print(f"{'mode':<14}{'path':<30}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}{'RSS MB':>9}")
+    for mode in modes:
+        results = run(mode, env, args, headers)
+        if results is None:
+            print(f"{mode:<14}  did not start")
+            continue
+        for path, result in results.items():
+            print(f"{mode:<14}{path:<30}{result['rps']:>9.1f}{result['p50']:>9.1f}{result['p95']:>9.1f}"
+                  f"{result['p99']:>9.1f}{result['errors']:>8}{result['rss']:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Bytes saved vs. CPU spent compressing real listing responses.
+
+Seeds a throwaway SQLite database with products shaped like production
+listings (long descriptions, several images with variants), fetches the
+uncompressed JSON from the listing endpoints and compresses it with every
+available encoding and a few levels.
+
+    python benchmarks/compression.py [--products 200] [--repeat 50]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import seed_listings
+
+LEVELS = {'gzip': (1, 6, 9), 'br': (1, 4, 11), 'zstd': (1, 3, 10)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app, db
+        from app.utils.compression import Compressor
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            token = seed_listings(db, args.products, random.Random(42))
+
+        client = app.test_client()
+        identity = {'Accept-Encoding': 'identity', 'Authorization': f'Bearer {token}'}
+        payloads = {
+            'GET /api/products/?per_page=20': client.get('/api/products/?per_page=20', headers=identity).get_data(),
+            'GET /api/products/?per_page=100': client.get('/api/products/?per_page=100', headers=identity).get_data(),
+            'GET /api/admin/products?per_page=100': client.get('/api/admin/products?per_page=100', headers=identity).get_data()
+        }
+        compressor = Compressor(app)
+
+    available = ['gzip'] + [name for name, module in (('br', compressor.brotli), ('zstd', compressor.zstd)) if module]
+    print(f"Encodings available: {', '.join(available)} (install brotli / zstandard for the others)\n")
+
+    for name, body in payloads.items():
+        print(f"{name}: {len(body):,} bytes uncompressed")
+        print(f"  {'encoding':<10}{'level':>6}{'bytes':>12}{'saved':>9}{'ms/resp':>10}{'MB/s':>9}")
+        for encoding in available:
+            for level in LEVELS[encoding]:
+                compressor.levels[encoding] = level
+                started = time.perf_counter()
+                for _ in range(args.repeat):
+                    compressed = compressor.compress(encoding, body)
+                elapsed = (time.perf_counter() - started) / args.repeat
+                saved = 1 - len(compressed) / len(body)
+                print(f"  {encoding:<10}{level:>6}{len(compressed):>12,}{saved:>9.1%}"
+                      f"{elapsed * 1000:>10.2f}{len(body) / elapsed / 1e6:>9.1f}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
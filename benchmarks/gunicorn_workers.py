@@ -0,0 +1,86 @@
+"""Throughput of the listing endpoint under each gunicorn worker class.
+
+Starts gunicorn with gunicorn.conf.py for every worker class (gevent only
+if installed), loads GET /api/products/?per_page=20 from concurrent
+keep-alive clients and reports requests/second and latency percentiles.
+Uses a throwaway SQLite database seeded with realistic listings.
+
+    python benchmarks/gunicorn_workers.py [--workers 2] [--concurrency 16] [--duration 10]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load import free_port, run_load, wait_ready
+from seed import seed_listings
+
+PATH = '/api/products/?per_page=20'
+
+
+def run(worker_class, env, args):
+    port = free_port()
+    env = dict(env, GUNICORN_WORKER_CLASS=worker_class, GUNICORN_WORKERS=str(args.workers),
+               GUNICORN_THREADS=str(args.threads), GUNICORN_BIND=f'127.0.0.1:{port}',
+               GUNICORN_MAX_REQUESTS='0')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--access-logfile', '/dev/null', 'run:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        if not wait_ready(port, PATH):
+            return None
+        return run_load(port, PATH, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gthread worker.')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--products', type=int, default=500)
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{database}', FLASK_ENV='production')
+    os.environ['DATABASE_URL'] = env['DATABASE_URL']
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app, db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            seed_listings(db, args.products, random.Random(42))
+
+    worker_classes = ['sync', 'gthread']
+    if importlib.util.find_spec('gevent'):
+        worker_classes.append('gevent')
+    else:
+        print('gevent is not installed, skipping the gevent worker class')
+
+    print(f"GET {PATH}: {args.workers} workers, {args.concurrency} clients, {args.duration:.0f}s each\n")
+    print(f"{'worker class':<14}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for worker_class in worker_classes:
+        result = run(worker_class, env, args)
+        if result is None:
+            print(f"{worker_class:<14}  did not start")
+            continue
+        print(f"{worker_class:<14}{result['rps']:>9.1f}{result['p50']:>9.1f}{result['p95']:>9.1f}"
+              f"{result['p99']:>9.1f}{result['errors']:>8}")
+
+
+if __name__ == '__main__':
+    main()
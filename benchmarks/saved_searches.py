@@ -0,0 +1,118 @@
+"""Saved-search matching: inverted index vs. testing every search.
+
+Builds the in-memory index from synthetic saved searches (a mix of
+keyword, category-only and keyword + filter searches over the seed
+vocabulary plus model-number words like "iphone12"), then matches synthetic new listings against it and against
+a linear scan of the same searches, checking both give the same result.
+
+    python benchmarks/saved_searches.py [--searches 100000] [--listings 1000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import WORDS
+
+CATEGORIES = range(1, 6)
+LOCATIONS = ('Gasabo', 'Kicukiro', 'Nyarugenge')
+# Real alerts are mostly for specific things; a few thousand words keeps each one selective
+VOCABULARY = WORDS + [f'{word}{n}' for word in WORDS for n in range(60)]
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(VOCABULARY) for _ in range(words)).capitalize() + '.'
+
+
+def saved_search(rng, search_id):
+    """(id, user_id, keywords, category_id, location, min_price, max_price), shaped like real alerts"""
+    kind = rng.random()
+    keywords = ' '.join(rng.sample(VOCABULARY, rng.randint(1, 3))) if kind < 0.8 else None
+    category_id = rng.choice(CATEGORIES) if kind >= 0.5 else None
+    location = rng.choice(LOCATIONS) if rng.random() < 0.3 else None
+    min_price = rng.randint(5, 1000) * 1000 if rng.random() < 0.3 else None
+    max_price = rng.randint(1000, 5000) * 1000 if rng.random() < 0.4 else None
+    return search_id, rng.randint(1, 50000), keywords, category_id, location, min_price, max_price
+
+
+def listing(rng):
+    return {
+        'name': _text(rng, 5),
+        'description': _text(rng, rng.randint(40, 250)),
+        'category_id': rng.choice(CATEGORIES),
+        'location': 'Kigali, ' + rng.choice(LOCATIONS),
+        'price': rng.randint(5, 5000) * 1000,
+        'user_id': 0
+    }
+
+
+def timed(f, *args):
+    started = time.perf_counter()
+    result = f(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--searches', type=int, default=100000)
+    parser.add_argument('--listings', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app.utils.saved_searches import SavedSearchIndex, tokenize
+
+    rng = random.Random(args.seed)
+    rows = [saved_search(rng, search_id) for search_id in range(1, args.searches + 1)]
+    listings = [listing(rng) for _ in range(args.listings)]
+
+    def build():
+        index = SavedSearchIndex()
+        for row in rows:
+            index.add(row)
+        return index
+
+    tracemalloc.start()
+    index, build_ms = timed(build)
+    index_mb = tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+    tracemalloc.stop()
+    searches = list(index._searches.values())
+
+    def scan(item):
+        tokens = set(tokenize(item['name'])) | set(tokenize(item['description']))
+        location = item['location'].lower()
+        return [search.id for search in searches
+                if search.matches(tokens, item['category_id'], location, float(item['price']), item['user_id'])]
+
+    indexed, linear, matches = [], [], []
+    for item in listings:
+        found, indexed_ms = timed(index.match, item['name'], item['description'], item['category_id'],
+                                  item['location'], item['price'], item['user_id'])
+        expected, linear_ms = timed(scan, item)
+        if sorted(found) != sorted(expected):
+            sys.exit(f"❌ Index and scan disagree on a listing: {len(found)} vs {len(expected)} matches")
+        indexed.append(indexed_ms)
+        linear.append(linear_ms)
+        matches.append(len(found))
+
+    def p95(values):
+        return sorted(values)[int(len(values) * 0.95)]
+
+    print(f"{args.searches} saved searches: index built in {build_ms:.0f} ms, {index_mb:.1f} MB")
+    print(f"matches per listing: median {statistics.median(matches):.0f}, max {max(matches)}\n")
+    print(f"{'per listing':<12} {'median ms':>10} {'p95 ms':>8}")
+    print(f"{'index':<12} {statistics.median(indexed):>10.2f} {p95(indexed):>8.2f}")
+    print(f"{'linear scan':<12} {statistics.median(linear):>10.2f} {p95(linear):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
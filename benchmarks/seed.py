@@ -0,0 +1,51 @@
+"""Realistic listing data shared by the benchmarks"""
+
+WORDS = ('phone used condition excellent battery charger original box screen camera warranty '
+         'kigali delivery price negotiable contact call whatsapp sofa wooden table chairs fridge '
+         'samsung iphone laptop dell hp core ram storage ssd shoes size leather new bag car toyota '
+         'rav4 mileage automatic diesel apartment rent bedroom kitchen parking water electricity').split()
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def seed_listings(db, products, rng):
+    """Add an admin, 20 sellers, 5 categories and `products` listings; returns an admin token"""
+    from app.models import User, Category, Product
+
+    admin = User(username='bench-admin', email='admin@bench.local', is_admin=True)
+    admin.set_password('bench')
+    sellers = [User(username=f'seller{i}', email=f'seller{i}@bench.local') for i in range(20)]
+    for seller in sellers:
+        seller.password_hash = admin.password_hash
+    categories = [Category(name=name) for name in ('Electronics', 'Furniture', 'Vehicles', 'Fashion', 'Property')]
+    db.session.add_all([admin, *sellers, *categories])
+    db.session.flush()
+
+    for i in range(products):
+        urls = [f"/uploads/products/{rng.getrandbits(8):02x}/{rng.getrandbits(256):064x}.jpg"
+                for _ in range(rng.randint(1, 4))]
+        variants = {
+            url: {
+                'width': 1600, 'height': 1200, 'placeholder': 'LEHV6nWB2yk8pyo0adR*.7kCMdnj', 'color': '#8a7f6c',
+                'variants': [
+                    {'width': w, 'height': w * 3 // 4, 'format': fmt, 'url': url.replace('.jpg', f'_{w}w.{ext}')}
+                    for w in (320, 800, 1600) for fmt, ext in (('webp', 'webp'), ('jpeg', 'jpg'))
+                ]
+            }
+            for url in urls
+        }
+        db.session.add(Product(
+            user_id=rng.choice(sellers).id,
+            category_id=rng.choice(categories).id,
+            name=_text(rng, 5),
+            description=_text(rng, rng.randint(40, 250)),
+            price=rng.randint(5, 5000) * 1000,
+            location='Kigali, ' + rng.choice(['Gasabo', 'Kicukiro', 'Nyarugenge']),
+            image_urls=urls,
+            image_variants=variants,
+            contact_info=f"+2507{rng.randint(10000000, 99999999)}"
+        ))
+    db.session.commit()
+    return admin.generate_auth_token()
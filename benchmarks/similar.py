@@ -0,0 +1,95 @@
+"""Similar listings: precomputed index vs. computing neighbours per request.
+
+Seeds a throwaway SQLite database, builds the similar_products index
+with the same code as `flask listings similar`, then times
+GET /api/products/<id>/similar against building the category's TF-IDF
+model at request time, which is what the endpoint would cost without
+the index, and updating one listing in a cached category model, which
+is what the job worker does per listing write.
+
+    python benchmarks/similar.py [--products 5000] [--requests 300]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from seed import seed_listings
+
+
+def timed(f, *args):
+    started = time.perf_counter()
+    result = f(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--on-demand', type=int, default=20, help='Requests timed without the index.')
+    args = parser.parse_args()
+
+    database = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import create_app, db
+        from app.models import Product
+        from app.utils.similar import rebuild_similar_products, load_category_model
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            seed_listings(db, args.products, random.Random(7))
+
+    with app.app_context():
+        indexed, build_ms = timed(rebuild_similar_products)
+        products = db.session.query(Product.id, Product.category_id).all()
+
+    rng = random.Random(11)
+    client = app.test_client()
+    served = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.requests):
+            product_id = rng.choice(products).id
+            response, elapsed = timed(client.get, f'/api/products/{product_id}/similar')
+            assert response.status_code == 200 and response.get_json()['total'], response.get_json()
+            served.append(elapsed)
+
+    on_demand, incremental = [], []
+    limit = app.config['SIMILAR_LISTINGS_COUNT']
+    with app.app_context():
+        for _ in range(args.on_demand):
+            product = rng.choice(products)
+            _, elapsed = timed(lambda: load_category_model(product.category_id).neighbours(product.id, limit))
+            on_demand.append(elapsed)
+
+        # What update_similar_products does per listing write once the worker's model is cached
+        models = {category_id: load_category_model(category_id) for category_id in {p.category_id for p in products}}
+        for product in rng.sample(products, min(args.requests, len(products))):
+            name, description = db.session.query(Product.name, Product.description).filter_by(id=product.id).one()
+            model = models[product.category_id]
+            _, elapsed = timed(lambda: (model.add(product.id, name, description), model.neighbours(product.id, limit)))
+            incremental.append(elapsed)
+
+    def p95(values):
+        return sorted(values)[int(len(values) * 0.95)]
+
+    print(f"{indexed} listings indexed in {build_ms:.0f} ms\n")
+    print(f"{'per request':<28} {'median ms':>10} {'p95 ms':>8}")
+    print(f"{'GET .../similar (index)':<28} {statistics.median(served):>10.2f} {p95(served):>8.2f}")
+    print(f"{'computed per request':<28} {statistics.median(on_demand):>10.2f} {p95(on_demand):>8.2f}")
+    print(f"\n{'per listing write':<28} {'median ms':>10} {'p95 ms':>8}")
+    print(f"{'cached model, one listing':<28} {statistics.median(incremental):>10.2f} {p95(incremental):>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
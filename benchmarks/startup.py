@@ -0,0 +1,85 @@
+"""Cold-start budget for the web process.
+
+Imports run.py (module import plus create_app) in fresh interpreters
+with `python -X importtime`, reports the median wall time and the
+slowest imports, and exits non-zero when the median is over the budget
+or the import prints anything. Run it in CI or before a deploy so
+autoscaled dynos keep starting quickly.
+
+    python benchmarks/startup.py [--runs 5] [--budget-ms 600] [--top 15]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    "import time; started = time.perf_counter(); import run; "
+    "import sys; sys.stderr.write(f'startup-ms: {(time.perf_counter() - started) * 1000:.1f}\\n')"
+)
+
+
+def measure(env):
+    """(wall ms, {module: cumulative import us}, stdout) for one fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    wall, imports = None, {}
+    for line in result.stderr.splitlines():
+        if line.startswith('startup-ms:'):
+            wall = float(line.split(':', 1)[1])
+        elif line.startswith('import time:') and not line.rstrip().endswith('| package'):
+            _, cumulative, module = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                imports[module.strip()] = int(cumulative)
+    return wall, imports, result.stdout
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('STARTUP_BUDGET_MS', 600)))
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list.')
+    args = parser.parse_args()
+
+    env = dict(os.environ, FLASK_ENV='production')
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+
+    # The first run warms the filesystem and bytecode caches and is not counted
+    measure(env)
+    walls, runs, output = [], [], ''
+    for _ in range(args.runs):
+        wall, imports, stdout = measure(env)
+        walls.append(wall)
+        runs.append(imports)
+        output = output or stdout
+
+    slowest = sorted(runs[0], key=lambda module: statistics.median(run.get(module, 0) for run in runs),
+                     reverse=True)[:args.top]
+    print(f"{'cumulative ms':>14}  module")
+    for module in slowest:
+        print(f"{statistics.median(run.get(module, 0) for run in runs) / 1000:>14.1f}  {module}")
+
+    median = statistics.median(walls)
+    print(f"\nimport run (create_app included): median {median:.0f} ms over {args.runs} runs, "
+          f"min {min(walls):.0f} ms, budget {args.budget_ms:.0f} ms")
+
+    failed = False
+    if output:
+        print(f"\n❌ Importing the app printed to stdout:\n{output}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"❌ Startup is {median - args.budget_ms:.0f} ms over budget")
+        failed = True
+    if not failed:
+        print("✅ Within budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
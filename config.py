@@ -1,7 +1,8 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+# Settings are read from os.environ when this module is imported. .env is not
+# read here: create_app() and gunicorn.conf.py call app.load_environment() first
+# (and the flask CLI loads .env itself), so importing config does no file I/O.
 
 class Config:
     """Base configuration"""
@@ -26,6 +27,57 @@ class Config:
         SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool, per process: workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) must fit max_connections
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))  # seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds; reconnect before server/proxy idle limits
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'  # survive failovers and restarts
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 0))  # every process, CLIs and migrations included; 0 = no limit
+    WEB_STATEMENT_TIMEOUT_MS = int(os.environ.get('WEB_STATEMENT_TIMEOUT_MS', 30000))  # web workers only (gunicorn/uvicorn); 0 = no limit
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.environ.get('DB_IDLE_IN_TRANSACTION_TIMEOUT_MS', 60000))  # 0 = no limit
+    # PgBouncer in transaction mode rejects startup options; timeouts are then SET LOCAL per transaction.
+    # With DB_POOL_SIZE=0 the app keeps no connections of its own (NullPool) and PgBouncer does all pooling
+    DB_PGBOUNCER = os.environ.get('DB_PGBOUNCER', 'false').lower() == 'true'
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': DB_POOL_PRE_PING,
+        'pool_recycle': DB_POOL_RECYCLE
+    }
+    if SQLALCHEMY_DATABASE_URI.startswith('postgresql') and not (DB_PGBOUNCER and DB_POOL_SIZE == 0):
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT
+        )
+    if SQLALCHEMY_DATABASE_URI.startswith('postgresql') and not DB_PGBOUNCER:
+        _server_options = []
+        if DB_STATEMENT_TIMEOUT_MS:
+            _server_options.append(f'-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}')
+        if DB_IDLE_IN_TRANSACTION_TIMEOUT_MS:
+            _server_options.append(f'-c idle_in_transaction_session_timeout={DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}')
+        if _server_options:
+            SQLALCHEMY_ENGINE_OPTIONS['connect_args'] = {'options': ' '.join(_server_options)}
+
+    # ASGI mode (asgi.py): catalogue/category/notification reads use an async driver, the rest runs in threads
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')  # default: DATABASE_URL with asyncpg/aiosqlite
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', 8))  # per process, for the routes that stay sync
+
+    # Optional read replica: GET handlers marked @replica_safe read from it (app/utils/replica.py)
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    if REPLICA_DATABASE_URL and REPLICA_DATABASE_URL.startswith("postgres://"):
+        REPLICA_DATABASE_URL = REPLICA_DATABASE_URL.replace("postgres://", "postgresql://", 1)
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))  # primary reads after a client's write
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', 10))  # beyond this, read the primary
+    REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL', 5))  # seconds between health/lag checks
+    if REPLICA_DATABASE_URL:
+        SQLALCHEMY_BINDS = {'replica': {'url': REPLICA_DATABASE_URL}}
+        if REPLICA_DATABASE_URL.startswith('postgresql'):
+            # Give up on an unreachable replica quickly; reads then fall back to the primary
+            SQLALCHEMY_BINDS['replica']['connect_args'] = dict(
+                SQLALCHEMY_ENGINE_OPTIONS.get('connect_args', {}), connect_timeout=3
+            )
     
     # Security
     BCRYPT_LOG_ROUNDS = 12
@@ -35,6 +87,40 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+    # Responsive variants built for every product image upload
+    IMAGE_VARIANT_WIDTHS = [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '320,800,1600').split(',')]
+    IMAGE_VARIANT_FORMATS = os.environ.get('IMAGE_VARIANT_FORMATS', 'webp,jpeg').split(',')  # add 'avif' if Pillow supports it
+    IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+
+    # Upload serving: 'direct' (Flask sends the file), 'x-accel-redirect' (nginx)
+    # or 'x-sendfile' (Apache/lighttpd)
+    UPLOADS_SERVE_MODE = os.environ.get('UPLOADS_SERVE_MODE', 'direct').lower()
+    UPLOADS_ACCEL_PREFIX = os.environ.get('UPLOADS_ACCEL_PREFIX', '/_protected_uploads/')  # nginx internal location
+    UPLOADS_MAX_AGE = int(os.environ.get('UPLOADS_MAX_AGE', 86400))  # non content-addressed files
+
+    # Response compression for /api/ (br and zstd need the brotli / zstandard packages)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))  # bytes; smaller bodies go out as-is
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip 1-9
+    COMPRESS_BR_LEVEL = int(os.environ.get('COMPRESS_BR_LEVEL', 4))  # brotli 0-11
+    COMPRESS_ZSTD_LEVEL = int(os.environ.get('COMPRESS_ZSTD_LEVEL', 3))  # zstd 1-22
+    COMPRESS_ALGORITHMS = os.environ.get('COMPRESS_ALGORITHMS', 'zstd,br,gzip').split(',')  # server preference
+
+    # Frontend assets (css/, js/, images/); ?v=<etag> URLs (index.html uses them) are cached for a year
+    STATIC_MAX_AGE = int(os.environ.get('STATIC_MAX_AGE', 0))  # for plain URLs; 0 = revalidate every time
+    STATIC_MANIFEST_RELOAD = os.environ.get('STATIC_MANIFEST_RELOAD', 'false').lower() == 'true'  # rescan per request (development)
+
+    # Upload storage: 'local' (UPLOADS_ROOT) or 's3' (any S3-compatible store, needs boto3)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').lower()
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL')  # CDN/bucket URL uploads are served from
+    S3_KEY_PREFIX = os.environ.get('S3_KEY_PREFIX', '')
+    PRESIGNED_UPLOAD_EXPIRES = int(os.environ.get('PRESIGNED_UPLOAD_EXPIRES', 900))  # seconds
     
     # Base URL - PRODUCTION READY
     BASE_URL = os.environ.get('BASE_URL', 'http://localhost:5000')
@@ -49,6 +135,74 @@ class Config:
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', '')
     MAIL_DEBUG = 0
 
+    # Email outbox, delivered by the mail sender process (mailer.py)
+    MAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('MAIL_OUTBOX_BATCH_SIZE', 20))
+    MAIL_OUTBOX_POLL_INTERVAL = float(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL', 2.0))  # seconds when idle
+    MAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('MAIL_OUTBOX_MAX_ATTEMPTS', 8))
+    MAIL_OUTBOX_LEASE = int(os.environ.get('MAIL_OUTBOX_LEASE', 300))  # seconds before a stuck send is retried
+    MAIL_RETRY_BACKOFF = int(os.environ.get('MAIL_RETRY_BACKOFF', 30))  # first retry delay, doubled per attempt
+    MAIL_RETRY_BACKOFF_MAX = int(os.environ.get('MAIL_RETRY_BACKOFF_MAX', 3600))
+    MAIL_CONNECTION_IDLE_TIMEOUT = int(os.environ.get('MAIL_CONNECTION_IDLE_TIMEOUT', 60))  # close SMTP after this idle
+
+    # Readiness probe (/api/health/ready); liveness (/api/health/live) never touches the database
+    READINESS_CACHE_SECONDS = float(os.environ.get('READINESS_CACHE_SECONDS', 2))  # reuse the last result this long
+    READINESS_DB_TIMEOUT = float(os.environ.get('READINESS_DB_TIMEOUT', 2))  # seconds for the pooled SELECT 1
+    READINESS_MIN_FREE_MB = int(os.environ.get('READINESS_MIN_FREE_MB', 100))  # local upload storage
+
+    # Admin dashboard stats - seconds before site_stats is reconciled on read (and the
+    # new_*_week counters age out; until then they only grow)
+    SITE_STATS_MAX_AGE = int(os.environ.get('SITE_STATS_MAX_AGE', 300))
+
+    # Public category list cache
+    CATEGORY_CACHE_TTL = int(os.environ.get('CATEGORY_CACHE_TTL', 5))  # seconds between version checks
+    CATEGORY_CACHE_MAX_AGE = int(os.environ.get('CATEGORY_CACHE_MAX_AGE', 60))  # Cache-Control max-age
+
+    # Listing lifecycle (flask listings expire / archive, run from cron)
+    LISTING_TTL_DAYS = int(os.environ.get('LISTING_TTL_DAYS', 60))  # new listings expire after this; 0 = never
+    LISTING_ARCHIVE_AFTER_DAYS = int(os.environ.get('LISTING_ARCHIVE_AFTER_DAYS', 30))  # sold/inactive this long -> products_archive
+    LISTING_BATCH_SIZE = int(os.environ.get('LISTING_BATCH_SIZE', 500))  # rows expired/archived per batch/commit
+
+    # Listing view counts: buffered per process, flushed to product_stats in one upsert per interval.
+    # 'redis' pools every worker's counts in Redis first (needs the redis package)
+    VIEW_COUNTER_ENABLED = os.environ.get('VIEW_COUNTER_ENABLED', 'true').lower() == 'true'
+    VIEW_COUNTER_BACKEND = os.environ.get('VIEW_COUNTER_BACKEND', 'database').lower()  # database or redis
+    VIEW_COUNTER_REDIS_URL = os.environ.get('VIEW_COUNTER_REDIS_URL', 'redis://localhost:6379/0')
+    VIEW_COUNTER_FLUSH_INTERVAL = float(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 5))  # seconds
+    VIEW_COUNTER_MAX_PENDING = int(os.environ.get('VIEW_COUNTER_MAX_PENDING', 10000))  # listings buffered before an early flush
+
+    # Saved searches: new listings are matched once, in the job worker, against an in-memory index
+    SAVED_SEARCH_LIMIT_PER_USER = int(os.environ.get('SAVED_SEARCH_LIMIT_PER_USER', 20))
+    SAVED_SEARCH_INDEX_REBUILD_SECONDS = int(os.environ.get('SAVED_SEARCH_INDEX_REBUILD_SECONDS', 3600))  # full reload; synced from updated_at in between
+
+    # Similar listings: TF-IDF neighbours within a category, precomputed into similar_products
+    SIMILAR_LISTINGS_COUNT = int(os.environ.get('SIMILAR_LISTINGS_COUNT', 12))  # neighbours stored per listing (and the endpoint's max limit)
+    SIMILAR_TERMS_PER_LISTING = int(os.environ.get('SIMILAR_TERMS_PER_LISTING', 20))  # heaviest words kept per listing
+    SIMILAR_MODEL_REBUILD_SECONDS = int(os.environ.get('SIMILAR_MODEL_REBUILD_SECONDS', 3600))  # job worker's cached category models; synced from updated_at in between
+
+    # Background user deletion - rows deleted per batch/commit
+    USER_DELETION_BATCH_SIZE = int(os.environ.get('USER_DELETION_BATCH_SIZE', 500))
+
+    # Background jobs (worker.py)
+    JOBS_EAGER = os.environ.get('JOBS_EAGER', 'False').lower() == 'true'  # run tasks inline, for tests
+    JOBS_VISIBILITY_TIMEOUT = int(os.environ.get('JOBS_VISIBILITY_TIMEOUT', 300))  # seconds a claimed job stays leased
+    JOBS_POLL_INTERVAL = float(os.environ.get('JOBS_POLL_INTERVAL', 1.0))
+    JOBS_BATCH_SIZE = int(os.environ.get('JOBS_BATCH_SIZE', 10))
+    JOBS_RETRY_BACKOFF = int(os.environ.get('JOBS_RETRY_BACKOFF', 10))  # first retry delay, doubled per attempt
+    JOBS_RETRY_BACKOFF_MAX = int(os.environ.get('JOBS_RETRY_BACKOFF_MAX', 3600))
+
+    # gunicorn (gunicorn.conf.py reads these; workers default to 2 x CPUs + 1)
+    GUNICORN_BIND = os.environ.get('GUNICORN_BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+    GUNICORN_WORKERS = int(os.environ.get('GUNICORN_WORKERS', 0)) or None
+    GUNICORN_WORKER_CLASS = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')  # sync, gthread or gevent
+    GUNICORN_THREADS = int(os.environ.get('GUNICORN_THREADS', 4))  # per worker, gthread only
+    GUNICORN_WORKER_CONNECTIONS = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))  # gevent only
+    GUNICORN_PRELOAD = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'  # build the app once, before forking
+    GUNICORN_TIMEOUT = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+    GUNICORN_GRACEFUL_TIMEOUT = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+    GUNICORN_KEEPALIVE = int(os.environ.get('GUNICORN_KEEPALIVE', 5))  # seconds; keep above the proxy's idle timeout
+    GUNICORN_MAX_REQUESTS = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))  # recycle workers to cap leaks (0 = never)
+    GUNICORN_MAX_REQUESTS_JITTER = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))  # so workers don't restart together
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
@@ -0,0 +1,65 @@
+"""gunicorn settings, taken from config.py (GUNICORN_* / environment).
+
+    gunicorn -c gunicorn.conf.py run:app
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:app
+
+With preload_app the app is created once in the master and inherited by
+the workers, so create_app and its imports run once instead of per worker.
+Connections the master opened while loading must not be shared across
+processes, so post_fork throws the inherited pool away in each worker
+(and sets the web-only statement timeout on it).
+"""
+import multiprocessing
+import os
+
+from app import load_environment
+
+# .env has to be in os.environ before config.py reads it
+load_environment()
+
+from config import config as config_dict
+
+_settings = config_dict[os.getenv('FLASK_ENV', 'production')]
+
+bind = _settings.GUNICORN_BIND
+workers = _settings.GUNICORN_WORKERS or multiprocessing.cpu_count() * 2 + 1
+worker_class = _settings.GUNICORN_WORKER_CLASS
+threads = _settings.GUNICORN_THREADS if worker_class == 'gthread' else 1
+worker_connections = _settings.GUNICORN_WORKER_CONNECTIONS
+preload_app = _settings.GUNICORN_PRELOAD
+timeout = _settings.GUNICORN_TIMEOUT
+graceful_timeout = _settings.GUNICORN_GRACEFUL_TIMEOUT
+keepalive = _settings.GUNICORN_KEEPALIVE
+max_requests = _settings.GUNICORN_MAX_REQUESTS
+max_requests_jitter = _settings.GUNICORN_MAX_REQUESTS_JITTER
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections"""
+    if worker_class == 'gevent':
+        try:
+            # psycopg2 blocks the whole gevent loop unless patched
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            server.log.warning('psycogreen is not installed; database calls will block gevent workers')
+
+    from app import db
+    from app.utils.db_pool import install_web_timeouts
+
+    app = worker.app.wsgi()
+    # asgi:app (uvicorn workers) wraps the Flask app and owns an async engine too
+    async_engine = getattr(app, 'engine', None)
+    app = getattr(app, 'flask_app', app)
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: leave the parent's sockets alone, just stop using them
+            engine.dispose(close=False)
+            install_web_timeouts(engine, app.config)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+        install_web_timeouts(async_engine.sync_engine, app.config)
+    server.log.info(f"Worker {worker.pid}: database pool reset after fork")
@@ -0,0 +1,12 @@
+from app import create_app
+from app.utils.outbox import run_sender
+import os
+
+app = create_app(os.getenv('FLASK_ENV', 'production'))
+
+if __name__ == '__main__':
+    print("📮 Marketplace mail sender starting...")
+    print("🏷️ Environment:", os.getenv('FLASK_ENV', 'production'))
+
+    with app.app_context():
+        run_sender()
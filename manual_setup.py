@@ -12,9 +12,9 @@ def setup_database():
     
     with app.app_context():
         try:
-            # Drop all tables and recreate
-            db.drop_all()
-            db.create_all()
+            # Drop all tables and recreate (primary only, never the read replica)
+            db.drop_all(bind_key=None)
+            db.create_all(bind_key=None)
             
             print("✅ Tables created successfully!")
             
@@ -0,0 +1,50 @@
+"""Add uploaded_images table and products.image_variants
+
+Revision ID: 0b9e6d2f4a51
+Revises: f2a7c4d83e16
+Create Date: 2026-10-19 16:25:09.613342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b9e6d2f4a51'
+down_revision = 'f2a7c4d83e16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uploaded_images',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('width', sa.Integer(), nullable=True),
+    sa.Column('height', sa.Integer(), nullable=True),
+    sa.Column('variants', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('url')
+    )
+    with op.batch_alter_table('uploaded_images', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_uploaded_images_product_id'), ['product_id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('image_variants', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('image_variants')
+
+    with op.batch_alter_table('uploaded_images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_uploaded_images_product_id'))
+
+    op.drop_table('uploaded_images')
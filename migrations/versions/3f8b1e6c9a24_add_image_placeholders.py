@@ -0,0 +1,28 @@
+"""Add placeholder and colour to uploaded_images
+
+Revision ID: 3f8b1e6c9a24
+Revises: 7d3a5f9b2c08
+Create Date: 2026-10-19 19:02:37.512903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8b1e6c9a24'
+down_revision = '7d3a5f9b2c08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('uploaded_images', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('placeholder', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('color', sa.String(length=7), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('uploaded_images', schema=None) as batch_op:
+        batch_op.drop_column('color')
+        batch_op.drop_column('placeholder')
@@ -0,0 +1,45 @@
+"""Add user_deletion_jobs table
+
+Revision ID: 5be2a8f0c913
+Revises: d17f40b2c6a9
+Create Date: 2026-10-19 11:41:05.302871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5be2a8f0c913'
+down_revision = 'd17f40b2c6a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_deletion_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('requested_by', sa.Integer(), nullable=True),
+    sa.Column('username', sa.String(length=50), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('products_deleted', sa.Integer(), nullable=False),
+    sa.Column('notifications_deleted', sa.Integer(), nullable=False),
+    sa.Column('images_queued', sa.Integer(), nullable=False),
+    sa.Column('images_deleted', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('user_deletion_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_deletion_jobs_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_deletion_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_deletion_jobs_user_id'))
+
+    op.drop_table('user_deletion_jobs')
@@ -0,0 +1,33 @@
+"""Add stored_files table for content-addressed uploads
+
+Revision ID: 7d3a5f9b2c08
+Revises: 0b9e6d2f4a51
+Create Date: 2026-10-19 17:48:21.084457
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3a5f9b2c08'
+down_revision = '0b9e6d2f4a51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('stored_files',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_referenced_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('sha256'),
+    sa.UniqueConstraint('url')
+    )
+
+
+def downgrade():
+    op.drop_table('stored_files')
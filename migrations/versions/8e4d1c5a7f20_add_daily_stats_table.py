@@ -0,0 +1,40 @@
+"""Add daily_stats rollup table
+
+Revision ID: 8e4d1c5a7f20
+Revises: 5be2a8f0c913
+Create Date: 2026-10-19 13:20:51.774130
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4d1c5a7f20'
+down_revision = '5be2a8f0c913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('new_users', sa.Integer(), nullable=False),
+    sa.Column('deactivated_users', sa.Integer(), nullable=False),
+    sa.Column('new_listings', sa.Integer(), nullable=False),
+    sa.Column('sold_listings', sa.Integer(), nullable=False),
+    sa.Column('deactivated_listings', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('category_id', 'day', name='uq_daily_stats_category_day')
+    )
+    with op.batch_alter_table('daily_stats', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_daily_stats_day'), ['day'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_stats', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_daily_stats_day'))
+
+    op.drop_table('daily_stats')
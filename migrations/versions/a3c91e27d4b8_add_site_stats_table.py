@@ -0,0 +1,40 @@
+"""Add site_stats table and products.user_id index
+
+Revision ID: a3c91e27d4b8
+Revises: 56fd3689e550
+Create Date: 2026-10-19 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c91e27d4b8'
+down_revision = '56fd3689e550'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('site_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_users', sa.Integer(), nullable=False),
+    sa.Column('total_products', sa.Integer(), nullable=False),
+    sa.Column('active_products', sa.Integer(), nullable=False),
+    sa.Column('total_categories', sa.Integer(), nullable=False),
+    sa.Column('users_with_products', sa.Integer(), nullable=False),
+    sa.Column('new_users_week', sa.Integer(), nullable=False),
+    sa.Column('new_products_week', sa.Integer(), nullable=False),
+    sa.Column('reconciled_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_user_id'))
+
+    op.drop_table('site_stats')
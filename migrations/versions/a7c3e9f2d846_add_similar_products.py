@@ -0,0 +1,32 @@
+"""Add the similar_products table
+
+Revision ID: a7c3e9f2d846
+Revises: f4b8d1c6a295
+Create Date: 2026-10-19 23:58:12.904316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f2d846'
+down_revision = 'f4b8d1c6a295'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Filled by `flask listings similar` after deploying
+    op.create_table('similar_products',
+    sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('rank', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('similar_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('product_id', 'rank')
+    )
+
+
+def downgrade():
+    op.drop_table('similar_products')
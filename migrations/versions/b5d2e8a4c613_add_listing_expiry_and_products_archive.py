@@ -0,0 +1,71 @@
+"""Add listing expiry columns and the products_archive table
+
+Revision ID: b5d2e8a4c613
+Revises: 9c2e4a7b1f35
+Create Date: 2026-10-19 20:24:51.330872
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d2e8a4c613'
+down_revision = '9c2e4a7b1f35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing listings keep expires_at NULL and never expire until the owner renews them
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expires_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('expired', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    op.create_index('ix_products_expires_at', 'products', ['expires_at'], unique=False,
+                    postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active'))
+    op.create_index('ix_products_archive_candidates', 'products', ['updated_at'], unique=False,
+                    postgresql_where=sa.text('is_sold OR NOT is_active'),
+                    sqlite_where=sa.text('is_sold OR NOT is_active'))
+
+    op.create_table('products_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('image_urls', sa.JSON(), nullable=True),
+    sa.Column('image_variants', sa.JSON(), nullable=True),
+    sa.Column('contact_info', sa.Text(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_sold', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=True),
+    sa.Column('expired', sa.Boolean(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.Column('archive_reason', sa.String(length=20), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('products_archive', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_archive_archived_at'), ['archived_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_products_archive_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products_archive', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_archive_user_id'))
+        batch_op.drop_index(batch_op.f('ix_products_archive_archived_at'))
+
+    op.drop_table('products_archive')
+
+    op.drop_index('ix_products_archive_candidates', table_name='products')
+    op.drop_index('ix_products_expires_at', table_name='products')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_column('expired')
+        batch_op.drop_column('expires_at')
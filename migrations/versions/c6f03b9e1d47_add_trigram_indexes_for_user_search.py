@@ -0,0 +1,39 @@
+"""Add pg_trgm and email prefix indexes for admin user search
+
+Revision ID: c6f03b9e1d47
+Revises: 8e4d1c5a7f20
+Create Date: 2026-10-19 14:02:37.560913
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f03b9e1d47'
+down_revision = '8e4d1c5a7f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Postgres only - SQLite keeps the unindexed substring search
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Substring (ILIKE '%term%') search
+    op.execute('CREATE INDEX IF NOT EXISTS ix_users_username_trgm ON users USING gin (username gin_trgm_ops)')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_users_email_trgm ON users USING gin (email gin_trgm_ops)')
+
+    # Full-address (LIKE 'name@domain%') search, independent of the database collation
+    op.execute('CREATE INDEX IF NOT EXISTS ix_users_email_lower_prefix ON users (lower(email) text_pattern_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS ix_users_email_lower_prefix')
+    op.execute('DROP INDEX IF EXISTS ix_users_email_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_users_username_trgm')
@@ -0,0 +1,23 @@
+"""Index products by category and updated_at for the similar-listings sync
+
+Revision ID: c6f2a8d4e193
+Revises: a7c3e9f2d846
+Create Date: 2026-10-20 10:12:45.207731
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f2a8d4e193'
+down_revision = 'a7c3e9f2d846'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_products_category_updated_at', 'products', ['category_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_products_category_updated_at', table_name='products')
@@ -0,0 +1,29 @@
+"""Add cache_versions table
+
+Revision ID: d17f40b2c6a9
+Revises: a3c91e27d4b8
+Create Date: 2026-10-19 10:03:12.447019
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd17f40b2c6a9'
+down_revision = 'a3c91e27d4b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('cache_versions')
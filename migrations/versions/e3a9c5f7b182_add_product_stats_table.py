@@ -0,0 +1,29 @@
+"""Add product_stats table for batched listing view counts
+
+Revision ID: e3a9c5f7b182
+Revises: b5d2e8a4c613
+Create Date: 2026-10-19 20:58:06.114529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c5f7b182'
+down_revision = 'b5d2e8a4c613'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('product_stats',
+    sa.Column('product_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('views', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+
+
+def downgrade():
+    op.drop_table('product_stats')
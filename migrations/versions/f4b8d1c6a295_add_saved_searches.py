@@ -0,0 +1,45 @@
+"""Add the saved_searches table
+
+Revision ID: f4b8d1c6a295
+Revises: e3a9c5f7b182
+Create Date: 2026-10-19 22:41:07.518240
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b8d1c6a295'
+down_revision = 'e3a9c5f7b182'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('saved_searches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('keywords', sa.String(length=200), nullable=True),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('min_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('max_price', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False, server_default=sa.true()),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('saved_searches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_saved_searches_updated_at'), ['updated_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_saved_searches_user_id'), ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('saved_searches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_saved_searches_user_id'))
+        batch_op.drop_index(batch_op.f('ix_saved_searches_updated_at'))
+
+    op.drop_table('saved_searches')
@@ -0,0 +1,18 @@
+import os
+
+import pytest
+
+# config.py reads the environment at import time
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app, db
+
+
+@pytest.fixture
+def app():
+    app = create_app('development')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
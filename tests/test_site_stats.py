@@ -0,0 +1,37 @@
+from app import db
+from app.models import Category, Product, User
+from app.utils.site_stats import compute_site_stats, get_site_stats, reconcile_site_stats
+
+
+def _products(user, category, count):
+    return [
+        Product(user_id=user.id, category_id=category.id, name=f'Listing {i}',
+                description='Description', location='Kigali', contact_info='0780000000')
+        for i in range(count)
+    ]
+
+
+def test_users_with_products_counts_a_multi_product_flush_once(app):
+    category = Category(name='Phones')
+    seller = User(username='seller', email='seller@example.com', password_hash='x')
+    db.session.add_all([category, seller])
+    db.session.commit()
+    reconcile_site_stats()
+
+    products = _products(seller, category, 3)
+    db.session.add_all(products)
+    db.session.commit()
+
+    assert get_site_stats().users_with_products == 1
+    assert compute_site_stats()['users_with_products'] == 1
+
+    db.session.delete(products[0])
+    db.session.commit()
+    assert get_site_stats().users_with_products == 1
+
+    for product in products[1:]:
+        db.session.delete(product)
+    db.session.commit()
+    stats = get_site_stats()
+    assert stats.users_with_products == 0
+    assert stats.total_products == 0